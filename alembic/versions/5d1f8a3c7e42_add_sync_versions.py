@@ -0,0 +1,94 @@
+"""Add row versions and tombstones for the sync feed
+
+Revision ID: 5d1f8a3c7e42
+Revises: 9c4e2a7b1d35
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db import changefeed, partitioning
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1f8a3c7e42'
+down_revision = '9c4e2a7b1d35'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+TABLES = ('modules', 'module_accesses', 'cards', 'interval_repetitions')
+INDEXES = (
+    ('ix_cards_module_id_version', 'cards', ['module_id', 'version']),
+    ('ix_interval_repetitions_user_id_version', 'interval_repetitions', ['user_id', 'version']),
+)
+BACKFILL_BATCH_SIZE = 10_000
+
+
+def upgrade() -> None:
+    op.execute(f"CREATE SEQUENCE IF NOT EXISTS {changefeed.SEQUENCE}")
+    # Колонка без значения по умолчанию добавляется без перезаписи таблицы
+    for table in TABLES:
+        op.add_column(table, sa.Column('version', sa.BigInteger(), nullable=True))
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('module_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('version'),
+    )
+    op.create_index('ix_sync_tombstones_module_id', 'sync_tombstones', ['module_id'])
+
+    # Сначала триггеры: строки, изменённые во время заполнения, сразу получают версии
+    connection = op.get_bind()
+    for table in TABLES:
+        changefeed.install_triggers(connection, table)
+
+    concurrently = not partitioning.is_partitioned(connection)
+    with op.get_context().autocommit_block():
+        # Существующие строки получают версии короткими транзакциями (значение ставит триггер)
+        for table in TABLES:
+            updated = 0
+            while True:
+                batch = connection.execute(sa.text(
+                    f"UPDATE {table} SET version = nextval('{changefeed.SEQUENCE}') WHERE id IN "
+                    f"(SELECT id FROM {table} WHERE version IS NULL ORDER BY id LIMIT :limit)"
+                ), {"limit": BACKFILL_BATCH_SIZE}).rowcount
+                updated += batch
+                if batch < BACKFILL_BATCH_SIZE:
+                    break
+            logger.info(f"{table}: {updated} rows versioned")
+
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                # На партиционированной interval_repetitions CONCURRENTLY не поддерживается
+                postgresql_concurrently=concurrently or table != 'interval_repetitions',
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+    concurrently = not partitioning.is_partitioned(connection)
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True,
+                          postgresql_concurrently=concurrently or table != 'interval_repetitions')
+
+    for table in TABLES:
+        changefeed.drop_triggers(connection, table)
+        op.execute(f"DROP FUNCTION IF EXISTS {table}_sync_tombstone()")
+    op.execute(f"DROP FUNCTION IF EXISTS {changefeed.BUMP_FUNCTION}()")
+    op.drop_index('ix_sync_tombstones_module_id', table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    for table in reversed(TABLES):
+        op.drop_column(table, 'version')
+    op.execute(f"DROP SEQUENCE IF EXISTS {changefeed.SEQUENCE}")
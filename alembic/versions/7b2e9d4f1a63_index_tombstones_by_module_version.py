@@ -0,0 +1,36 @@
+"""Replace sync_tombstones.module_id index with (module_id, version)
+
+Revision ID: 7b2e9d4f1a63
+Revises: 5d1f8a3c7e42
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2e9d4f1a63'
+down_revision = '5d1f8a3c7e42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Версия модуля для ETag берёт max(version) надгробий модуля одним чтением индекса
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_sync_tombstones_module_id_version', 'sync_tombstones', ['module_id', 'version'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index('ix_sync_tombstones_module_id', table_name='sync_tombstones',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_sync_tombstones_module_id', 'sync_tombstones', ['module_id'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index('ix_sync_tombstones_module_id_version', table_name='sync_tombstones',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,47 @@
+"""Index interval_repetitions columns used by delete cascades
+
+Revision ID: 9c4e2a7b1d35
+Revises: f4b8d2e61c07
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+
+from app.db import partitioning
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e2a7b1d35'
+down_revision = 'f4b8d2e61c07'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_interval_repetitions_card_id', ['card_id']),
+    ('ix_interval_repetitions_module_id', ['module_id']),
+)
+
+
+def _concurrently() -> bool:
+    # На партиционированной таблице CONCURRENTLY не поддерживается: индекс строится с блокировкой записи
+    connection = op.get_bind()
+    return connection.dialect.name == 'postgresql' and not partitioning.is_partitioned(connection)
+
+
+def upgrade() -> None:
+    # Без этих индексов ON DELETE CASCADE из cards и modules читает interval_repetitions целиком
+    concurrently = _concurrently()
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name, 'interval_repetitions', columns, unique=False,
+                postgresql_concurrently=concurrently, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    concurrently = _concurrently()
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='interval_repetitions',
+                          postgresql_concurrently=concurrently, if_exists=True)
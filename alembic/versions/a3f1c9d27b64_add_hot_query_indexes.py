@@ -0,0 +1,74 @@
+"""Add indexes for interval_repetitions hot queries
+
+Revision ID: a3f1c9d27b64
+Revises: 7e80f1c7e2a7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c9d27b64'
+down_revision = '7e80f1c7e2a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Перед уникальным индексом убираем дубли (user_id, module_id, card_id):
+    # оставляем запись с самым свежим повторением, при равенстве - с большим id
+    op.execute("""
+        DELETE FROM interval_repetitions ir
+        USING (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY user_id, module_id, card_id
+                ORDER BY last_review DESC NULLS LAST, id DESC
+            ) AS position
+            FROM interval_repetitions
+        ) ranked
+        WHERE ir.id = ranked.id AND ranked.position > 1
+    """)
+
+    # CONCURRENTLY не блокирует запись в таблицы, но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_interval_repetitions_user_module_due', 'interval_repetitions',
+            ['user_id', 'module_id', 'due'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'uq_interval_repetitions_user_module_card', 'interval_repetitions',
+            ['user_id', 'module_id', 'card_id'], unique=True,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_cards_module_id', 'cards', ['module_id'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_module_accesses_module_id_view_access', 'module_accesses',
+            ['module_id', 'view_access'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        # Рассылка напоминаний идёт только по пользователям с push-токеном
+        op.create_index(
+            'ix_users_push_id_not_null', 'users', ['id'], unique=False,
+            postgresql_where=sa.text('push_id IS NOT NULL'),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_push_id_not_null', table_name='users',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_module_accesses_module_id_view_access', table_name='module_accesses',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_cards_module_id', table_name='cards',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('uq_interval_repetitions_user_module_card', table_name='interval_repetitions',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_interval_repetitions_user_module_due', table_name='interval_repetitions',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,53 @@
+"""Optionally hash-partition interval_repetitions by user_id
+
+Revision ID: c58e0b3a9d17
+Revises: a3f1c9d27b64
+Create Date: 2026-10-19 13:00:00.000000
+
+Миграция необязательная и по умолчанию ничего не меняет. Включается так:
+
+    alembic -x partition_repetitions=16 upgrade head
+
+и переливает таблицу целиком в одной миграции (подходит для небольших баз).
+Большие базы переводятся онлайн через scripts/partition_repetitions.py - до или
+после этой ревизии, результат одинаковый.
+"""
+import logging
+
+from alembic import context, op
+
+from app.db import partitioning
+
+
+# revision identifiers, used by Alembic.
+revision = 'c58e0b3a9d17'
+down_revision = 'a3f1c9d27b64'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade() -> None:
+    partitions = int(context.get_x_argument(as_dictionary=True).get("partition_repetitions", 0))
+    connection = op.get_bind()
+    if not partitions:
+        logger.info("interval_repetitions partitioning skipped (pass -x partition_repetitions=N to enable)")
+        return
+    if partitioning.is_partitioned(connection):
+        logger.info("interval_repetitions is already partitioned")
+        return
+
+    partitioning.create_shadow_table(connection, partitions)
+    partitioning.copy_all(connection, batch_size=50_000)
+    partitioning.swap_tables(connection, drop_old=True)
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+    if not partitioning.is_partitioned(connection):
+        return
+
+    partitioning.create_shadow_table(connection, partitions=None)
+    partitioning.copy_all(connection, batch_size=50_000)
+    partitioning.swap_tables(connection, drop_old=True)
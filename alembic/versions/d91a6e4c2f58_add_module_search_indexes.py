@@ -0,0 +1,36 @@
+"""Add full-text and trigram indexes for module search
+
+Revision ID: d91a6e4c2f58
+Revises: c58e0b3a9d17
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd91a6e4c2f58'
+down_revision = 'c58e0b3a9d17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Выражение должно совпадать с app.db.fulltext.search_vector, иначе планировщик не возьмёт индекс
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_modules_search_vector ON modules
+            USING gin (to_tsvector('simple', (coalesce(name, '') || ' ') || coalesce(description, '')))
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_modules_name_trgm ON modules
+            USING gin (name gin_trgm_ops)
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_modules_name_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_modules_search_vector")
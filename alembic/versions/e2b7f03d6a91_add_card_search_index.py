@@ -0,0 +1,29 @@
+"""Add full-text index for card search
+
+Revision ID: e2b7f03d6a91
+Revises: d91a6e4c2f58
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7f03d6a91'
+down_revision = 'd91a6e4c2f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Выражение должно совпадать с app.db.fulltext.search_vector(Card.question, Card.answer)
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cards_search_vector ON cards
+            USING gin (to_tsvector('simple', (coalesce(question, '') || ' ') || coalesce(answer, '')))
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_cards_search_vector")
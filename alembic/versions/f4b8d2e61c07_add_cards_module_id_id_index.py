@@ -0,0 +1,37 @@
+"""Replace cards.module_id index with (module_id, id)
+
+Revision ID: f4b8d2e61c07
+Revises: e2b7f03d6a91
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b8d2e61c07'
+down_revision = 'e2b7f03d6a91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # (module_id, id) отдаёт страницу карточек модуля по порядку id без сортировки
+    # и покрывает всё, для чего был нужен индекс по одному module_id
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_cards_module_id_id', 'cards', ['module_id', 'id'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index('ix_cards_module_id', table_name='cards',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_cards_module_id', 'cards', ['module_id'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index('ix_cards_module_id_id', table_name='cards',
+                      postgresql_concurrently=True, if_exists=True)
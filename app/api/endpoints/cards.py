@@ -1,73 +1,120 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from ...db.database import get_db
 from ...models.user import User
 from ...models.module import Module
-from ...models.module_access import AccessLevel
+from ...models.module_access import AccessLevel, ModuleAccess
 from ...models.card import Card
-from ...schemas.card import Card as CardSchema, CreateCardRequest, PatchCardRequest, GetCardResponse, CardInDB
+from ...schemas.card import (
+    Card as CardSchema, CreateCardRequest, PatchCardRequest, GetCardResponse, CardInDB, CardImportResponse
+)
 from ...core.deps import get_current_active_user
+from ...core.http_cache import PRIVATE, not_modified, public_cache_control, set_cache_headers, weak_etag
+from ...core.request_context import timed_phase
+from ...services.anki_service import AnkiService
+from ...services.answer_variants import get_three_answer, session_seed, variant_random
+from ...services.card_import_service import CardImportService, detect_format
+from ...services.module_cache import CachedCard, ModuleCache, invalidate_module
+from ...services.module_service import ModuleService
+from ...services.repetition_service import RepetitionService
 import random
+import shutil
+import tempfile
 
 router = APIRouter()
 
+# Сколько ответов модуля добавляется к ответам страницы для неверных вариантов
+DISTRACTOR_POOL_SIZE = 32
+
 
 @router.get("/", response_model=GetCardResponse)
-async def get_module_cards(
+def get_module_cards(
     module_id: int,
-    skip: int = 0,
-    take: int = 10,
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    take: int = Query(10, ge=1, le=100),
+    after_id: Optional[int] = None,
+    seed: Optional[str] = Query(None, max_length=64),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    module = db.query(Module).filter(
-        Module.id == module_id
-    ).first()
-    
-    if not module:
+    """
+    Cards of a module, ordered by id.
+
+    Pass next_after_id from the previous page as after_id for keyset paging;
+    skip/take without after_id is still supported. Answer variants are the same
+    for the same seed (default: the current UTC day), so pages can be revalidated
+    with If-None-Match; send a new seed to reshuffle them for a study session.
+    """
+    seed = session_seed(seed)
+    version = ModuleService(db).content_version(module_id)
+    if version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Module not found"
         )
+    etag = weak_etag(current_user.id, module_id, version, seed, skip, take, after_id)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
 
-    cards = db.query(Card).filter(Card.module_id == module_id).all()
-    
-    correct_cards = cardsdb_to_cards(cards)
+    # Страница и окно ответов одинаковы для всех пользователей - из кэша; варианты - свои.
+    # Эндпоинт синхронный: в пуле потоков ожидание чужой загрузки кэша не блокирует event loop
+    page = ModuleCache(db).card_page(module_id, version, skip, take, after_id)
+    cards = [CachedCard(*card) for card in page["cards"]]
+    total_count = page["total_count"]
+
+    rng = variant_random(seed, current_user.id, module_id, cards[0].id) if cards else None
+    answers = distractor_pool(db, module_id, version, total_count, cards, rng)
 
+    set_cache_headers(response, etag)
     return GetCardResponse(
-        items=correct_cards[skip:max(skip+take, len(correct_cards))],
-        total_count=min(take, len(correct_cards) - skip)
+        items=cardsdb_to_cards(cards, answers, rng),
+        total_count=total_count,
+        next_after_id=cards[-1].id if len(cards) == take else None
     )
 
-def cardsdb_to_cards(cardsdb: List[Card]) -> List[CardSchema]:
-    all_answers = [card.answer for card in cardsdb]
+def distractor_pool(
+    db: Session,
+    module_id: int,
+    version: Tuple,
+    total_count: int,
+    cards: List[Card],
+    rng: Optional[random.Random] = None
+) -> List[str]:
+    """Ответы страницы плюс случайное окно ответов модуля - из них выбираются неверные варианты"""
+    answers = [card.answer for card in cards]
+    if total_count <= len(cards):
+        return answers
+
+    # Окна выровнены по DISTRACTOR_POOL_SIZE (последнее - по концу модуля): их немного,
+    # и каждое кэшируется для всех страниц и пользователей
+    windows = -(-total_count // DISTRACTOR_POOL_SIZE)
+    last = max(total_count - DISTRACTOR_POOL_SIZE, 0)
+    offset = min((rng or random).randrange(windows) * DISTRACTOR_POOL_SIZE, last)
+    return answers + ModuleCache(db).answer_window(module_id, version, offset, DISTRACTOR_POOL_SIZE)
+
+def cardsdb_to_cards(
+    cardsdb: List[Card], answers: Optional[List[str]] = None, rng: Optional[random.Random] = None
+) -> List[CardSchema]:
+    all_answers = [card.answer for card in cardsdb] if answers is None else answers
     result = []
     for card in sorted(cardsdb, key=lambda x: x.id):
-        ans, id = get_three_answer(all_answers, card.answer)
-        result.append(CardSchema(id=str(card.id),
-                                 question=card.question,
-                                 answer_variant=ans,
-                                 right_answer=id))
+        with timed_phase("distractors"):
+            ans, id = get_three_answer(all_answers, card.answer, rng)
+        with timed_phase("serialize"):
+            result.append(CardSchema(id=str(card.id),
+                                     question=card.question,
+                                     answer_variant=ans,
+                                     right_answer=id))
         
     return result
 
-def get_three_answer(answers: List[str], right_answer: str):
-    i = 0
-    result = []
-    for answer in random.sample(answers, len(answers)):
-        result.append(answer)
-        i += 1
-        if i == 4:
-            break
-        
-    if right_answer in result:
-        return result, result.index(right_answer)
-    
-    result.pop()
-    result.insert(len(result) // 2, answer)
-    return result, (len(result) // 2)
-
 
 @router.post("/", response_model=CardInDB)
 async def create_card(
@@ -96,20 +143,157 @@ async def create_card(
     )
     
     db.add(db_card)
+    db.flush()
+    # Новая карточка сразу попадает в повторения всех, кто учит модуль
+    RepetitionService(db).sync_repetitions(module_id, card_ids=[db_card.id])
     db.commit()
+    invalidate_module(module_id)
     db.refresh(db_card)
 
     return db_card
 
 
+@router.post("/import", response_model=CardImportResponse)
+def import_cards(
+    module_id: int,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv, tsv or ndjson; detected from the file name by default"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Import cards from a CSV, TSV or NDJSON file.
+
+    CSV/TSV: question and answer columns (header row optional).
+    NDJSON: one {"question": ..., "answer": ...} object per line.
+    Invalid rows are skipped and reported with their line numbers.
+    """
+    module = db.query(Module).filter(
+        Module.id == module_id,
+        Module.owner_id == current_user.id
+    ).first()
+
+    if not module:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Module not found"
+        )
+
+    try:
+        file_format = detect_format(file.filename, format)
+        result = CardImportService(db).import_cards(module_id, file.file, file_format)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return result
+
+
+@router.post("/import/anki", response_model=CardImportResponse)
+def import_anki_package(
+    module_id: int,
+    file: UploadFile = File(...),
+    include_scheduling: bool = True,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Import an Anki deck (.apkg).
+
+    The first note field becomes the question, the second the answer.
+    With include_scheduling the Anki review schedule becomes the user's interval repetitions.
+    """
+    module = db.query(Module).filter(
+        Module.id == module_id,
+        Module.owner_id == current_user.id
+    ).first()
+
+    if not module:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Module not found"
+        )
+
+    try:
+        result = AnkiService(db).import_package(current_user.id, module_id, file.file, include_scheduling)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return result
+
+
+@router.get("/export/anki")
+def export_anki_package(
+    module_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Export the module as an Anki deck (.apkg) with the current user's review schedule"""
+    module = db.query(Module).filter(
+        Module.id == module_id,
+        (Module.owner_id == current_user.id) | Module.access.any(
+            ModuleAccess.view_access == AccessLevel.ALL_USERS.value
+        )
+    ).first()
+
+    if not module:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Module not found"
+        )
+
+    directory = tempfile.mkdtemp(prefix="anki-export-")
+    try:
+        path = AnkiService(db).export_package(current_user.id, module, directory)
+    except Exception:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename=f"module-{module_id}.apkg",
+        background=BackgroundTask(shutil.rmtree, directory, ignore_errors=True)
+    )
+
+
 @router.get("/{card_id}", response_model=CardInDB)
 async def get_card(
     module_id: int,
     card_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get card by ID"""
+    """
+    Get card by ID.
+
+    Supports If-None-Match; cards of public modules are the same for every user and may be
+    cached by the proxy for HTTP_CACHE_PUBLIC_SECONDS.
+    """
+    # Версия карточки и открытость модуля - одним запросом, до загрузки карточки
+    state = db.query(
+        Card.version,
+        exists().where(
+            ModuleAccess.module_id == Card.module_id,
+            ModuleAccess.view_access == AccessLevel.ALL_USERS.value
+        )
+    ).filter(Card.id == card_id, Card.module_id == module_id).first()
+    etag, cache_control = None, PRIVATE
+    if state is not None:
+        version, public = state
+        etag = weak_etag(card_id, version)
+        cache_control = public_cache_control() if public else PRIVATE
+    cached = not_modified(request, etag, cache_control)
+    if cached:
+        return cached
+
     card = db.query(Card).join(Module).filter(
         Card.id == card_id,
         Module.id == module_id
@@ -121,6 +305,7 @@ async def get_card(
             detail="Card not found"
         )
 
+    set_cache_headers(response, etag, cache_control)
     return card
 
 
@@ -149,6 +334,7 @@ async def update_card(
         setattr(card, field, value)
     
     db.commit()
+    invalidate_module(module_id)
     db.refresh(card)
     
     return card
@@ -176,5 +362,6 @@ async def delete_card(
     
     db.delete(card)
     db.commit()
+    invalidate_module(module_id)
 
     return {"message": "Card deleted successfully"}
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from ...db.database import SessionLocal, get_db
+from ...models.user import User
+from ...schemas.export import RestoreResponse
+from ...core.deps import get_current_active_user
+from ...services.export_service import ExportService, export_stream
+
+router = APIRouter()
+
+
+@router.get("/")
+async def export_user_data(
+    gzip: bool = False,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Stream the user's modules, access settings, cards and review state as NDJSON.
+
+    Every line is a JSON object with a "type" field; the file can be loaded back with POST /export/import.
+    """
+    extension = "ndjson.gz" if gzip else "ndjson"
+    return StreamingResponse(
+        export_stream(SessionLocal, current_user.id, compress=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="tprep-export.{extension}"'}
+    )
+
+
+@router.post("/import", response_model=RestoreResponse)
+def restore_user_data(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Load an export (NDJSON or gzip NDJSON) as new modules of the current user"""
+    try:
+        result = ExportService(db).restore(current_user.id, file.file)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return result
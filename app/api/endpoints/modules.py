@@ -1,20 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ...db.database import get_db
+from ...db.database import SessionLocal, get_db
 from ...models.user import User
 from ...models.module import Module
 from ...models.interval_repetition import IntervalRepetition
 from ...models.module_access import ModuleAccess, AccessLevel as AL
-from ...schemas.module import Module as ModuleSchema, ModuleCreate, ModuleUpdate, ModuleWithCards, GetModulesResponse, AccessLevel as SchemaAccessLevel
+from ...schemas.module import Module as ModuleSchema, ModuleCreate, ModuleUpdate, ModuleClone, ModuleWithCards, GetModulesResponse, AccessLevel as SchemaAccessLevel
+from ...core.config import settings
 from ...core.deps import get_current_active_user
+from ...core.http_cache import not_modified, set_cache_headers, weak_etag
+from ...core.request_context import timed_phase
+from ...services.module_cache import ModuleCache, invalidate_module
+from ...services.module_service import ModuleService, ModuleVersion, delete_module_in_batches
+from ...services.search_service import SearchService
 from datetime import datetime, timezone
 
 router = APIRouter()
 
 
+# Чтения модулей синхронные: FastAPI выполняет их в пуле потоков, где single-flight кэша
+# может ждать чужую загрузку, не блокируя event loop
 @router.get("/", response_model=GetModulesResponse)
-async def get_user_modules(
+def get_user_modules(
+    request: Request,
+    response: Response,
     skip: int = 0,
     take: int = 10,
     search_string: Optional[str] = None,
@@ -22,50 +32,109 @@ async def get_user_modules(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    search_string = "" if search_string is None else search_string
-    if filter == SchemaAccessLevel.ONLY_ME:
-        modules = db.query(Module).filter(
-            Module.owner_id == current_user.id,
-            Module.name.ilike(f"%{search_string}%")
-        ).all()
+    """
+    Own modules or the public catalog, one page.
+
+    Responses carry a weak ETag; with a matching If-None-Match the page is answered with 304
+    before the modules themselves are read. Module metadata and the unfiltered catalog come
+    from the read cache.
+    """
+    catalog = None
+    if filter != SchemaAccessLevel.ONLY_ME and not search_string:
+        catalog = ModuleCache(db).catalog()
+
+    if catalog is not None:
+        # Тот же отбор, что и в запросе ниже: открытые модули, кроме своих
+        catalog_ids = [module_id for module_id, owner_id in catalog if owner_id != current_user.id]
+        total_count = len(catalog_ids)
+        module_ids = catalog_ids[skip:skip + take]
     else:
-        modules = db.query(Module).join(ModuleAccess).filter(
-            Module.owner_id != current_user.id,
-            ModuleAccess.view_access == AL.ALL_USERS.value,
-            Module.name.ilike(f"%{search_string}%")
-        ).all()
-
-    if len(modules) < skip:
-        return GetModulesResponse(items=[], total_count=len(modules))
-
-    return GetModulesResponse(
-        items=[CreateModuleScema(module, GetModuleAccessByUserId(module, current_user.id), db, current_user.id) for module in modules[skip:min(len(modules), skip + take)]], 
-        total_count=len(modules)
-    )
+        if filter == SchemaAccessLevel.ONLY_ME:
+            query = db.query(Module.id).filter(Module.owner_id == current_user.id)
+        else:
+            query = db.query(Module.id).join(ModuleAccess).filter(
+                Module.owner_id != current_user.id,
+                ModuleAccess.view_access == AL.ALL_USERS.value
+            )
+
+        query = SearchService(db).search_modules(query, search_string)
+        total_count = query.order_by(None).count()
+        module_ids = [module_id for (module_id,) in query.offset(skip).limit(take).all()]
+
+    versions = ModuleService(db).versions(module_ids, current_user.id)
+    etag = weak_etag(current_user.id, total_count, [(module_id, versions.get(module_id)) for module_id in module_ids])
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    summaries = ModuleCache(db).summaries({
+        module_id: versions[module_id].content for module_id in module_ids if module_id in versions
+    })
+    items = [
+        CreateCachedModuleSchema(summaries[module_id], versions[module_id], current_user.id)
+        for module_id in module_ids if module_id in summaries and module_id in versions
+    ]
+    set_cache_headers(response, etag)
+    return GetModulesResponse(items=items, total_count=total_count)
     
 @router.get("/{module_id}", response_model=ModuleSchema)
-async def get_user_modules(
+def get_user_modules(
     module_id: int,
+    request: Request,
+    response: Response,
     filter: SchemaAccessLevel = SchemaAccessLevel.ONLY_ME,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    module = db.query(Module).filter(
-        Module.id == module_id
-    ).first()
+    """Module with the current user's review counters; supports If-None-Match"""
+    # ETag и счётчики пользователя - одним запросом; модуль - из кэша
+    version = ModuleService(db).versions([module_id], current_user.id).get(module_id)
+    summary = None
+    if version is not None:
+        etag = weak_etag(current_user.id, module_id, version)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        summary = ModuleCache(db).summaries({module_id: version.content}).get(module_id)
+
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Module not found"
+        )
 
-    return CreateModuleScema(module, GetModuleAccessByUserId(module, current_user.id), db, current_user.id)
+    result = CreateCachedModuleSchema(summary, version, current_user.id)
+    set_cache_headers(response, etag)
+    return result
 
 
-def GetModuleAccessByUserId(module: Module, user_id: int):
-    for access in module.access:
-        if access.view_access == AL.ALL_USERS or access.owner_id == user_id:
-            return access
-    raise HTTPException(
+def CreateCachedModuleSchema(summary: dict, version: ModuleVersion, user_id: int):
+    """Ответ по метаданным из ModuleCache и счётчикам пользователя из ModuleService.versions"""
+    access = next((
+        access for access in summary["accesses"]
+        if access["view_access"] == AL.ALL_USERS or access["owner_id"] == user_id
+    ), None)
+    if access is None:
+        raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Module with same access not found"
         )
 
+    with timed_phase("serialize"):
+        return ModuleSchema(
+            name=summary["name"],
+            description=summary["description"],
+            id=summary["id"],
+            owner_id=summary["owner_id"],
+            created_at=summary["created_at"],
+            updated_at=summary["updated_at"],
+            ViewAccess=access["view_access"],
+            EditAccess=access["edit_access"],
+            IsIntervalRepetitionsEnabled=version.repetitions_enabled,
+            TotalCards=summary["total_cards"],
+            CardsToRepeatCount=version.cards_to_repeat
+        )
+
 
 @router.post("/", response_model=ModuleSchema)
 async def create_module(
@@ -95,28 +164,59 @@ async def create_module(
     db.add(module_with_access)
     db.commit()
     db.refresh(module_with_access)
+    invalidate_module(db_module.id, catalog=True)
 
     return CreateModuleScema(db_module, module_with_access, db, current_user.id)
 
+@router.post("/{module_id}/clone", response_model=ModuleSchema)
+async def clone_module(
+    module_id: int,
+    clone: ModuleClone = ModuleClone(),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Copy an own or public module with all its cards into a new module of the current user"""
+    db_module = ModuleService(db).clone_module(
+        module_id,
+        current_user.id,
+        name=clone.name,
+        view_access=AL(clone.ViewAccess.value) if clone.ViewAccess else None,
+        edit_access=AL(clone.EditAccess.value) if clone.EditAccess else None,
+        enable_repetitions=clone.EnableIntervalRepetitions
+    )
+
+    if not db_module:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Module not found"
+        )
+
+    return CreateModuleScema(db_module, db_module.access[0], db, current_user.id)
+
 def CreateModuleScema(bd_model: Module, access_model: ModuleAccess, db: Session, user_id: int):
     interval_reps = db.query(IntervalRepetition).filter(
         IntervalRepetition.module_id == bd_model.id,
         IntervalRepetition.user_id == user_id
     ).all()
 
-    return ModuleSchema(
-        name=bd_model.name,
-        description=bd_model.description,
-        id=bd_model.id,
-        owner_id=bd_model.owner_id,
-        created_at=bd_model.created_at,
-        updated_at=bd_model.updated_at,
-        ViewAccess=access_model.view_access,
-        EditAccess=access_model.edit_access,
-        IsIntervalRepetitionsEnabled=len(interval_reps) > 0,
-        TotalCards=len(bd_model.cards),
-        CardsToRepeatCount=len(set(rep.card_id for rep in interval_reps if rep.due < datetime.now(timezone.utc)))
-    )
+    total_cards = len(bd_model.cards)
+    now = datetime.now(timezone.utc)
+
+    with timed_phase("serialize"):
+        return ModuleSchema(
+            name=bd_model.name,
+            description=bd_model.description,
+            id=bd_model.id,
+            owner_id=bd_model.owner_id,
+            created_at=bd_model.created_at,
+            updated_at=bd_model.updated_at,
+            ViewAccess=access_model.view_access,
+            EditAccess=access_model.edit_access,
+            IsIntervalRepetitionsEnabled=len(interval_reps) > 0,
+            TotalCards=total_cards,
+            CardsToRepeatCount=len(set(rep.card_id for rep in interval_reps if rep.due < now))
+        )
+
 
 @router.patch("/{module_id}", response_model=ModuleSchema)
 async def update_module(
@@ -157,6 +257,7 @@ async def update_module(
         module_access.view_access = module_update.ViewAccess.value
 
     db.commit()
+    invalidate_module(module_id, catalog=True)
     db.refresh(module_access)
     db.refresh(module)
 
@@ -166,21 +267,35 @@ async def update_module(
 @router.delete("/{module_id}")
 async def delete_module(
     module_id: int,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    background: bool = False,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    module = db.query(Module).filter(
+    """
+    Delete a module with its cards and review state.
+
+    Modules with more than MODULE_DELETE_BACKGROUND_CARDS cards (or any module with background=true)
+    are deleted in the background: the response is 202 and the rows disappear in batches.
+    """
+    module_exists = db.query(Module.id).filter(
         Module.id == module_id,
         Module.owner_id == current_user.id
     ).first()
     
-    if not module:
+    if not module_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Module not found"
         )
-    
-    db.delete(module)
-    db.commit()
+
+    service = ModuleService(db)
+    if background or service.card_count(module_id) > settings.MODULE_DELETE_BACKGROUND_CARDS:
+        background_tasks.add_task(delete_module_in_batches, SessionLocal, module_id)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"message": "Module deletion started"}
+
+    service.delete_module(module_id)
     
     return {"message": "Module deleted successfully"}
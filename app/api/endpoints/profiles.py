@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from typing import Dict, List
+from ...core.deps import get_current_admin_user
+from ...core.profiling import profile_store
+from ...models.user import User
+
+router = APIRouter()
+
+
+@router.get("/")
+async def list_profiles(
+    current_user: User = Depends(get_current_admin_user)
+) -> List[Dict[str, object]]:
+    """Saved request profiles, newest first"""
+    return profile_store.list()
+
+
+@router.get("/{name}")
+async def download_profile(
+    name: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Download a .prof file (open with snakeviz or pstats)"""
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
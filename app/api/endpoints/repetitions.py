@@ -44,6 +44,20 @@ async def disable_interval_repetitions(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/sync")
+async def sync_interval_repetitions(
+    module_id: str,
+    user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Schedule the module cards added since interval repetitions were enabled"""
+    service = RepetitionService(db)
+    if not service.is_enabled(user.id, module_id):
+        raise HTTPException(status_code=404, detail="Interval repetitions are not enabled for this module")
+    created = service.sync_repetitions(module_id, user_id=user.id)
+    db.commit()
+    return {"created": created}
+
 @router.post("/{card_id}")
 async def update_card_status(
     module_id: str,
@@ -66,12 +80,14 @@ async def get_cards_for_repetition(
     module_id: str,
     skip: int = Query(0, ge=0),
     take: int = Query(10, ge=1, le=100),
+    seed: Optional[str] = Query(None, max_length=64),
     user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ) -> GetInternalRepetitionCardResponse:
+    """Cards due for review; answer variants are stable for the same seed (default: the current UTC day)"""
     try:
         service = RepetitionService(db)
-        return service.get_cards_for_repetition(user.id, module_id, skip, take)
+        return service.get_cards_for_repetition(user.id, module_id, skip, take, seed)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from ...db.database import get_db
+from ...models.user import User
+from ...schemas.card import CardSearchResponse
+from ...core.deps import get_current_active_user
+from ...services.search_service import SearchService
+
+router = APIRouter()
+
+
+@router.get("/cards", response_model=CardSearchResponse)
+async def search_cards(
+    q: str = Query(..., min_length=1, max_length=200),
+    module_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Search card questions and answers in own and public modules"""
+    try:
+        items, next_cursor = SearchService(db).search_cards(current_user.id, q, module_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return CardSearchResponse(items=items, next_cursor=next_cursor)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from ...db.database import get_db
+from ...models.user import User
+from ...schemas.sync import SyncResponse
+from ...core.deps import get_current_active_user
+from ...services.sync_service import SyncService
+
+router = APIRouter()
+
+
+@router.get("/", response_model=SyncResponse)
+def get_changes(
+    cursor: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=1000),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Changes to own and studied modules, their cards and the user's review state since `cursor`.
+
+    Without a cursor (or with one older than the tombstone retention) the whole state is returned
+    with reset=true. Apply upserts first, then deletions, store the new cursor and repeat while has_more.
+    """
+    try:
+        return SyncService(db).changes(current_user.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from ..endpoints import auth, users, modules, cards, repetitions, push_test
+from ..endpoints import auth, users, modules, cards, repetitions, push_test, profiles, search, export, sync
 
 api_router = APIRouter()
 
@@ -8,4 +8,8 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(modules.router, prefix="/modules", tags=["modules"])
 api_router.include_router(cards.router, prefix="/modules/{module_id}/cards", tags=["cards"])
 api_router.include_router(repetitions.router, prefix="/modules/{module_id}/interval-repetitions", tags=["interval_repetitions"])
-api_router.include_router(push_test.router, prefix="/push-test", tags=["push_test"])
\ No newline at end of file
+api_router.include_router(push_test.router, prefix="/push-test", tags=["push_test"])
+api_router.include_router(profiles.router, prefix="/profiles", tags=["profiles"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
+api_router.include_router(export.router, prefix="/export", tags=["export"])
+api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
@@ -0,0 +1,352 @@
+"""
+Двухуровневый кэш чтения: LRU в процессе и общий уровень (Redis) для всех воркеров.
+
+Локальный уровень отвечает без сети; общий хранит JSON и общий для всех воркеров и
+перезапусков. Без CACHE_SHARED_BACKEND остаётся только локальный уровень.
+
+Инвалидация - через поколения: ключи данных содержат поколение пространства имён
+(модуль, каталог), invalidate заменяет его новым значением, и старые записи больше
+не читаются, а истекают сами. Поколение меняется после commit, поэтому запрос,
+прочитавший старые данные до commit, кладёт их под старым поколением и не портит кэш.
+Другие воркеры видят новое поколение не позже CACHE_LOCAL_TTL_SECONDS.
+
+Значения должны быть JSON (dict, list, str, числа): локальный уровень отдаёт тот же
+объект всем запросам, поэтому изменять полученные значения нельзя.
+"""
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import settings
+from .metrics import cache_requests
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+# Сколько ждать чужую загрузку того же ключа, прежде чем загрузить самому
+SINGLE_FLIGHT_TIMEOUT = 10.0
+# Сколько не обращаться к общему уровню после ошибки
+SHARED_RETRY_SECONDS = 5.0
+
+
+class LocalCache:
+    """LRU со сроком жизни записей; потокобезопасный"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SharedCache(ABC):
+    """Общий для воркеров уровень кэша (протокол Redis)"""
+
+    name = "base"
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Значения ключей в том же порядке; None - нет значения"""
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, bytes], ttl: int) -> None:
+        """Записать значения со сроком жизни в секундах"""
+
+    def clear(self) -> None:
+        """Удалить все значения (для тестов)"""
+
+
+class MemorySharedCache(SharedCache):
+    """Замена Redis в тестах: словарь в памяти процесса с теми же сроками жизни"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        now = time.monotonic()
+        with self._lock:
+            entries = [self._values.get(key) for key in keys]
+        return [value if expires > now else None for value, expires in (entry or (None, 0) for entry in entries)]
+
+    def set_many(self, items: Dict[str, bytes], ttl: int) -> None:
+        expires = time.monotonic() + ttl
+        with self._lock:
+            self._values.update((key, (value, expires)) for key, value in items.items())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class RedisCache(SharedCache):
+    """Redis или совместимый сервер (Valkey, KeyDB)"""
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        # Пакет redis нужен, только если общий уровень включён
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self.client.mget(keys)
+
+    def set_many(self, items: Dict[str, bytes], ttl: int) -> None:
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipeline.set(key, value, ex=ttl)
+        pipeline.execute()
+
+    def clear(self) -> None:
+        self.client.flushdb()
+
+
+class _Flight:
+    """Загрузка ключа, которую ждут остальные запросы того же ключа"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = MISSING
+
+
+class TwoTierCache:
+    def __init__(
+        self,
+        local: LocalCache,
+        shared: Optional[SharedCache] = None,
+        local_ttl: float = 5,
+        shared_ttl: int = 300,
+        enabled: bool = True
+    ):
+        """
+        Кэш чтения: локальный LRU, за ним общий уровень, за ним загрузчик.
+
+        Args:
+            local: Локальный уровень
+            shared: Общий уровень; None - только локальный
+            local_ttl: Сколько секунд воркер верит своему поколению, не спрашивая общий уровень
+            shared_ttl: Срок жизни данных (в обоих уровнях)
+            enabled: False - всегда вызывать загрузчик
+        """
+        self.local = local
+        self.shared = shared
+        self.local_ttl = local_ttl
+        self.shared_ttl = shared_ttl
+        self.enabled = enabled
+        # Поколения - отдельно от LRU: вытеснение вернуло бы старое поколение и старые данные
+        self._generations: Dict[str, Tuple[str, float]] = {}
+        self._generations_lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._shared_down_until = 0.0
+
+    def key(self, namespace: str, *parts) -> str:
+        """Ключ данных пространства имён: namespace@поколение:части"""
+        return ":".join([f"{namespace}@{self.generation(namespace)}", *map(str, parts)])
+
+    def generation(self, namespace: str) -> str:
+        now = time.monotonic()
+        with self._generations_lock:
+            entry = self._generations.get(namespace)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        generation = entry[0] if entry is not None else "0"
+        if self.shared is None:
+            # Единственный уровень: поколение меняет только этот процесс
+            expires = float("inf")
+        else:
+            stored = self._shared_get([self._generation_key(namespace)])
+            if stored is None:
+                # Общий уровень недоступен: остаёмся на известном поколении и спросим позже
+                return generation
+            generation = stored[0].decode() if stored[0] is not None else "0"
+            expires = now + self.local_ttl
+        with self._generations_lock:
+            if len(self._generations) >= max(self.local.max_entries, 1):
+                # Поколения можно забыть только вместе с локальными данными, записанными под ними
+                self._generations.clear()
+                self.local.clear()
+            self._generations[namespace] = (generation, expires)
+        return generation
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Сделать недоступными все данные пространств имён; вызывать после commit"""
+        if not self.enabled:
+            return
+        generation = str(time.time_ns())
+        expires = float("inf") if self.shared is None else time.monotonic() + self.local_ttl
+        with self._generations_lock:
+            for namespace in namespaces:
+                self._generations[namespace] = (generation, expires)
+        if self.shared is not None:
+            # Поколение живёт дольше данных, записанных под прежним: иначе после его истечения
+            # вернулось бы поколение "0" вместе с данными, записанными воркерами со старым поколением
+            self._shared_set(
+                {self._generation_key(namespace): generation.encode() for namespace in namespaces},
+                self.shared_ttl + int(self.local_ttl) + 1
+            )
+
+    def get_many(self, keys: Iterable[str], kind: str) -> Dict[str, Any]:
+        """Найденные значения по ключам: сначала локальный уровень, затем один запрос к общему"""
+        keys = list(keys)
+        if not self.enabled or not keys:
+            return {}
+        found = {}
+        for key in keys:
+            value = self.local.get(key)
+            if value is not MISSING:
+                found[key] = value
+        if found:
+            cache_requests.inc(kind, "local_hit", amount=len(found))
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.shared is not None:
+            for key, raw in zip(missing, self._shared_get(missing) or [None] * len(missing)):
+                if raw is not None:
+                    value = json.loads(raw)
+                    self.local.set(key, value, self.shared_ttl)
+                    found[key] = value
+                    cache_requests.inc(kind, "shared_hit")
+        misses = len(keys) - len(found)
+        if misses:
+            cache_requests.inc(kind, "miss", amount=misses)
+        return found
+
+    def set_many(self, items: Dict[str, Any]) -> None:
+        if not self.enabled or not items:
+            return
+        for key, value in items.items():
+            self.local.set(key, value, self.shared_ttl)
+        if self.shared is not None:
+            self._shared_set({key: json.dumps(value).encode() for key, value in items.items()}, self.shared_ttl)
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], kind: str) -> Any:
+        """
+        Значение из кэша или из loader.
+
+        Одновременные промахи по одному ключу в процессе загружают его один раз (single-flight):
+        остальные ждут результат первого. Между воркерами загрузка может повториться -
+        по разу на воркер, а не на запрос.
+
+        Ожидание блокирует поток, поэтому вызывать только из синхронного кода: sync (def)
+        эндпоинтов, которые FastAPI выполняет в пуле потоков. В async-эндпоинте все запросы
+        идут в одном потоке - загрузки не пересекаются, а ожидание остановило бы event loop.
+        """
+        if not self.enabled:
+            return loader()
+        found = self.get_many([key], kind)
+        if key in found:
+            return found[key]
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait(SINGLE_FLIGHT_TIMEOUT)
+            return flight.value if flight.value is not MISSING else loader()
+
+        try:
+            flight.value = loader()
+            self.set_many({key: flight.value})
+            return flight.value
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def clear(self) -> None:
+        """Очистить оба уровня и поколения (для тестов)"""
+        self.local.clear()
+        with self._generations_lock:
+            self._generations.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    @staticmethod
+    def _generation_key(namespace: str) -> str:
+        return f"generation:{namespace}"
+
+    def _shared_get(self, keys: List[str]) -> Optional[List[Optional[bytes]]]:
+        """Значения из общего уровня; None - уровень недоступен"""
+        if time.monotonic() < self._shared_down_until:
+            return None
+        try:
+            return self.shared.get_many(keys)
+        except Exception as e:
+            self._shared_failed(e)
+            return None
+
+    def _shared_set(self, items: Dict[str, bytes], ttl: int) -> None:
+        if time.monotonic() < self._shared_down_until:
+            return
+        try:
+            self.shared.set_many(items, ttl)
+        except Exception as e:
+            self._shared_failed(e)
+
+    def _shared_failed(self, error: Exception) -> None:
+        # Кэш не должен ронять запросы: без общего уровня работаем через локальный и БД
+        self._shared_down_until = time.monotonic() + SHARED_RETRY_SECONDS
+        logger.warning(f"⚠️ Shared cache unavailable for {SHARED_RETRY_SECONDS:.0f}s: {error}")
+
+
+def create_shared_cache(name: str) -> Optional[SharedCache]:
+    """Общий уровень по имени из настроек CACHE_SHARED_BACKEND; пустое имя - без общего уровня"""
+    if not name:
+        return None
+    if name == MemorySharedCache.name:
+        return MemorySharedCache()
+    if name == RedisCache.name:
+        return RedisCache(settings.CACHE_REDIS_URL)
+    raise ValueError(f"Unknown shared cache backend: {name}")
+
+
+cache = TwoTierCache(
+    LocalCache(settings.CACHE_LOCAL_MAX_ENTRIES),
+    create_shared_cache(settings.CACHE_SHARED_BACKEND),
+    local_ttl=settings.CACHE_LOCAL_TTL_SECONDS,
+    shared_ttl=settings.CACHE_SHARED_TTL_SECONDS,
+    enabled=settings.CACHE_ENABLED
+)
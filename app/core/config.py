@@ -1,11 +1,16 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 
 class Settings(BaseSettings):
     # Database - автоматически определяем URL в зависимости от окружения
-    database_url: str = None
+    database_url: Optional[str] = None
+    # Создавать таблицы при старте; выключите, если схемой управляет Alembic
+    DB_AUTO_CREATE: bool = True
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -15,14 +20,12 @@ class Settings(BaseSettings):
             # В локальной разработке используем 'localhost'
             if os.getenv('DOCKER_CONTAINER') == '1' or os.path.exists('/.dockerenv'):
                 host = 'db'
-                print(f"🐳 Docker environment detected, using host: {host}")
             else:
                 host = 'localhost'
-                print(f"💻 Local environment detected, using host: {host}")
             
             postgres_password = os.getenv('POSTGRES_PASSWORD', 'tprep_password')
             self.database_url = f"postgresql://tprep_user:{postgres_password}@{host}:5432/tprep_db"
-            print(f"🔗 Database URL: {self.database_url}")
+            logger.info(f"DATABASE_URL not set, using database host: {host}")
     
     # JWT
     secret_key: str = "your-secret-key-here-change-in-production"
@@ -40,6 +43,47 @@ class Settings(BaseSettings):
     # App settings
     debug: bool = True
     allowed_origins: str = "*"  # CORS origins, can be comma-separated
+    # Сбор метрик; /metrics отдаётся только с заголовком Authorization: Bearer METRICS_TOKEN
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+    # Заголовок Server-Timing (db, auth, serialize, distractors, total)
+    SERVER_TIMING_ENABLED: bool = True
+    # Логировать SQL-шаблоны, повторившиеся за запрос больше QUERY_REPEAT_THRESHOLD раз (N+1)
+    QUERY_DEBUG: bool = False
+    QUERY_REPEAT_THRESHOLD: int = 10
+    # Профилирование запросов (cProfile); при False middleware не подключается
+    PROFILING_ENABLED: bool = False
+    # Доля профилируемых запросов, фильтры через запятую: шаблоны путей (fnmatch) и oidc_sub
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_ROUTES: str = ""
+    PROFILE_USER_SUBS: str = ""
+    # Администраторы: заголовок X-Profile: 1 и доступ к /api/v1/profiles
+    PROFILE_ADMIN_SUBS: str = ""
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 50
+    # Импорт карточек: строк в одной пачке INSERT/COPY, сколько ошибок строк вернуть в ответе
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 100
+    IMPORT_MAX_FIELD_LENGTH: int = 10000
+    # Экспорт данных пользователя: строк на одну выборку серверного курсора
+    EXPORT_BATCH_SIZE: int = 1000
+    # Модули с большим числом карточек удаляются в фоне пачками по MODULE_DELETE_BATCH_SIZE строк
+    MODULE_DELETE_BACKGROUND_CARDS: int = 5000
+    MODULE_DELETE_BATCH_SIZE: int = 5000
+    # Лента изменений GET /sync: сколько дней хранить надгробия удалённых строк; более старые курсоры сбрасываются
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 90
+    # Сколько секунд nginx может отдавать из кэша одинаковые для всех ответы открытых модулей
+    HTTP_CACHE_PUBLIC_SECONDS: int = 5
+    # Кэш чтения модулей, страниц карточек и каталога: LRU в процессе и общий уровень (redis, memory или пусто)
+    CACHE_ENABLED: bool = True
+    CACHE_LOCAL_MAX_ENTRIES: int = 10000
+    # Через сколько секунд воркер замечает инвалидацию, сделанную другим воркером
+    CACHE_LOCAL_TTL_SECONDS: float = 5
+    CACHE_SHARED_BACKEND: str = ""
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_SHARED_TTL_SECONDS: int = 300
+    # Каталог кэшируется списком id целиком, если в нём не больше стольких модулей
+    CACHE_CATALOG_MAX_ITEMS: int = 2000
     
     model_config = {
         "env_file": ".env",
@@ -49,7 +93,19 @@ class Settings(BaseSettings):
     
     FCM_PROJECT_ID: str = "your-project-id"
     PUSH_INTERVAL_MINUTES: float = 10
+    # Планировщик напоминаний; при нескольких воркерах включайте только в одном
+    PUSH_SCHEDULER_ENABLED: bool = True
     FCM_SERVICE_ACCOUNT_FILE: str = "path-to-file"
+    # firebase - реальная отправка, fake - локальная замена FCM для нагрузочных тестов
+    PUSH_TRANSPORT: str = "firebase"
+    FAKE_FCM_LATENCY_MS: float = 50
+    FAKE_FCM_ERROR_RATE: float = 0.0
+    FAKE_FCM_UNREGISTERED_RATE: float = 0.0
+    # Рассылка напоминаний растягивается на окно, чтобы пользователи не открывали приложение одновременно
+    PUSH_DISPATCH_WINDOW_SECONDS: float = 300
+    # Глобальный лимит отправок (token bucket); 0 - без ограничения
+    PUSH_RATE_LIMIT_PER_SECOND: float = 20
+    PUSH_RATE_LIMIT_BURST: int = 20
 
 
 settings = Settings()
@@ -4,6 +4,8 @@ from sqlalchemy.orm import Session
 from ..db.database import get_db
 from ..services.auth_service import AuthService
 from ..models.user import User
+from .profiling import admin_subs
+from .request_context import timed_phase
 
 security = HTTPBearer()
 
@@ -20,8 +22,9 @@ async def get_current_user(
     )
     
     try:
-        auth_service = AuthService(db)
-        user = auth_service.get_current_user(credentials.credentials)
+        with timed_phase("auth"):
+            auth_service = AuthService(db)
+            user = auth_service.get_current_user(credentials.credentials)
         
         if user is None:
             raise credentials_exception
@@ -36,3 +39,15 @@ async def get_current_active_user(
 ) -> User:
     """Get current active user (alias for get_current_user)"""
     return current_user
+
+
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """Current user, if listed in PROFILE_ADMIN_SUBS"""
+    if current_user.oidc_sub not in admin_subs():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
@@ -0,0 +1,49 @@
+"""
+Условные GET: слабые ETag из версий данных и ответ 304 до тяжёлых запросов.
+
+Обработчик сначала дешёво считает ETag (версии строк из app/db/changefeed.py),
+сравнивает его с If-None-Match и только при несовпадении загружает и сериализует данные.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from .config import settings
+
+# Ответ зависит от пользователя: кэшировать только у клиента и всегда перепроверять
+PRIVATE = "private, no-cache"
+
+
+def public_cache_control() -> str:
+    """Одинаковый для всех ответ открытого модуля: nginx держит его HTTP_CACHE_PUBLIC_SECONDS, клиент перепроверяет"""
+    return f"public, max-age=0, s-maxage={settings.HTTP_CACHE_PUBLIC_SECONDS}"
+
+
+def weak_etag(*parts) -> str:
+    """W/"<хэш частей>" - слабый, потому что nginx сжимает тело ответа"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Слабое сравнение с If-None-Match (список тегов или *)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str = PRIVATE) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(request: Request, etag: Optional[str], cache_control: str = PRIVATE) -> Optional[Response]:
+    """Готовый ответ 304, если у клиента актуальная версия; иначе None"""
+    if etag is None or not etag_matches(request, etag):
+        return None
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": cache_control})
@@ -0,0 +1,202 @@
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from .request_context import RequestStats, request_stats, route_template
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+REGISTRY: List["Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        """Строки с значениями метрики в текстовом формате Prometheus"""
+
+    def collect(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            *self.samples()
+        ]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labelvalues, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # counts хранит попадания в каждый бакет (последний - +Inf), накопление считается при выдаче
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            series = [(labels, list(counts), total[0]) for labels, (counts, total) in self._series.items()]
+        for labelvalues, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                le_label = f'le="{le}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le_label)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labelvalues)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labelvalues)} {cumulative}"
+
+
+class GaugeFunc(Metric):
+    """Значение считается в момент выдачи метрик"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, func: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.func = func
+
+    def samples(self) -> Iterable[str]:
+        try:
+            yield f"{self.name} {float(self.func())}"
+        except Exception:
+            return
+
+
+def render_metrics() -> str:
+    """Все метрики в текстовом формате Prometheus"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status")
+)
+db_queries_per_request = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ("route",),
+    buckets=QUERY_COUNT_BUCKETS
+)
+db_time_per_request = Histogram(
+    "db_query_duration_per_request_seconds",
+    "Total SQL execution time per HTTP request",
+    ("route",)
+)
+reminder_run_duration = Histogram(
+    "push_reminder_run_duration_seconds",
+    "Duration of a send_study_reminders run",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200)
+)
+push_sends = Counter("push_sends_total", "Push notification sends by outcome", ("outcome",))
+fsrs_reviews = Counter("fsrs_reviews_total", "Interval repetition reviews by rating", ("rating",))
+cache_requests = Counter("cache_requests_total", "Read cache lookups by kind and result", ("kind", "result"))
+
+
+def register_pool_metrics(engine) -> None:
+    """Состояние пула соединений SQLAlchemy"""
+    pool = engine.pool
+    for name, attr, documentation in (
+        ("db_pool_size", "size", "Configured connection pool size"),
+        ("db_pool_checked_out", "checkedout", "Connections currently checked out"),
+        ("db_pool_overflow", "overflow", "Connections opened above pool size"),
+        ("db_pool_checked_in", "checkedin", "Idle connections in the pool"),
+    ):
+        if hasattr(pool, attr):
+            GaugeFunc(name, documentation, getattr(pool, attr))
+
+
+class MetricsMiddleware:
+    """Латентность запросов по шаблону маршрута и учёт SQL-запросов на запрос"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Статистику запроса могла уже завести внешняя middleware (Server-Timing)
+        stats = request_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            if token is not None:
+                request_stats.reset(token)
+            route = route_template(scope)
+            http_request_duration.observe(elapsed, scope["method"], route, str(status_code))
+            db_queries_per_request.observe(stats.db_queries, route)
+            db_time_per_request.observe(stats.db_seconds, route)
@@ -0,0 +1,167 @@
+import cProfile
+import fnmatch
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from jose import JWTError, jwt
+
+from .config import settings
+from .request_context import route_template
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+# cProfile профилирует весь поток event loop, а не запрос: активным может быть только один
+# профиль на процесс, даже если middleware создан несколько раз
+_active_profile = threading.Lock()
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def admin_subs() -> List[str]:
+    """oidc_sub администраторов из PROFILE_ADMIN_SUBS"""
+    return _split(settings.PROFILE_ADMIN_SUBS)
+
+
+class ProfileStore:
+    """Кольцевой буфер .prof файлов на диске: хранится не больше max_files последних профилей"""
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max(max_files, 1)
+        self._lock = threading.Lock()
+
+    def save(self, profiler: cProfile.Profile, method: str, route: str, sub: str, seconds: float) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        name = _SAFE_NAME.sub("_", f"{time.time_ns()}_{method}_{route.strip('/')}_{sub}")[:180] + ".prof"
+        with self._lock:
+            profiler.dump_stats(os.path.join(self.directory, name))
+            self._trim()
+        logger.info(f"🔬 Profile saved: {name} ({seconds * 1000:.0f}ms)")
+        return name
+
+    def list(self) -> List[Dict[str, object]]:
+        if not os.path.isdir(self.directory):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.endswith(".prof"):
+                path = os.path.join(self.directory, name)
+                result.append({"name": name, "size": os.path.getsize(path)})
+        return result
+
+    def path(self, name: str) -> Optional[str]:
+        """Путь к профилю по имени; None, если такого нет или имя выходит за пределы каталога"""
+        if name != os.path.basename(name) or not name.endswith(".prof"):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def _trim(self) -> None:
+        # Имена начинаются с time_ns, поэтому сортировка по имени - сортировка по времени
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(".prof"))
+        for name in names[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+profile_store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_FILES)
+
+
+def _request_sub(scope) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm]).get("sub")
+            except JWTError:
+                return None
+    return None
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование отдельных запросов через cProfile.
+
+    Запрос профилируется, если администратор (PROFILE_ADMIN_SUBS) прислал заголовок
+    X-Profile: 1, либо запрос попал в выборку: путь подходит под PROFILE_ROUTES,
+    пользователь - под PROFILE_USER_SUBS, и сработала вероятность PROFILE_SAMPLE_RATE.
+
+    Middleware подключается только при PROFILING_ENABLED, поэтому выключенное
+    профилирование ничего не стоит.
+
+    Профиль охватывает весь event loop, а не один запрос: cProfile включается в потоке
+    цикла событий на всё время запроса, и в профиль попадают все корутины, которые
+    выполнялись между его await. Синхронные (def) эндпоинты работают в пуле потоков и
+    в профиль не попадают - видны только ожидание их результата и async-код вокруг.
+    Одновременно снимается один профиль на процесс: запросы, пришедшие, пока он идёт,
+    выполняются без профилирования.
+    """
+
+    def __init__(self, app, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+        self.routes = _split(settings.PROFILE_ROUTES)
+        self.user_subs = set(_split(settings.PROFILE_USER_SUBS))
+        self.admin_subs = set(admin_subs())
+
+    def should_profile(self, scope, sub: Optional[str]) -> bool:
+        if sub is None:
+            return False
+        if _header(scope, PROFILE_HEADER.encode()) in ("1", "true") and sub in self.admin_subs:
+            return True
+        if settings.PROFILE_SAMPLE_RATE <= 0:
+            return False
+        if self.routes and not any(fnmatch.fnmatch(scope["path"], pattern) for pattern in self.routes):
+            return False
+        if self.user_subs and sub not in self.user_subs:
+            return False
+        return random.random() < settings.PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sub = _request_sub(scope)
+        if not self.should_profile(scope, sub) or not _active_profile.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Профилировщик уже включён кем-то другим (отладчик, другой инструмент)
+                logger.warning("⚠️ Another profiler is active, request is not profiled")
+                await self.app(scope, receive, send)
+                return
+
+            started = time.perf_counter()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profiler.disable()
+            self.store.save(profiler, scope["method"], route_template(scope), sub, time.perf_counter() - started)
+        finally:
+            _active_profile.release()
@@ -0,0 +1,47 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+
+@dataclass
+class RequestStats:
+    """Счётчики текущего HTTP-запроса, которые заполняют хуки SQLAlchemy и timed_phase"""
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    # Время именованных фаз (auth, serialize, distractors, ...), фазы могут пересекаться
+    phases: Dict[str, float] = field(default_factory=dict)
+    # Сколько раз выполнялся каждый SQL-шаблон; собирается только в режиме QUERY_DEBUG
+    statement_shapes: Optional[Counter] = None
+
+
+# Выставляется middleware на время запроса; вне запроса (планировщик, скрипты) - None
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def timed_phase(name: str) -> Iterator[None]:
+    """Учесть время блока как фазу текущего запроса (вне запроса ничего не делает)"""
+    stats = request_stats.get()
+    if stats is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.phases[name] = stats.phases.get(name, 0.0) + time.perf_counter() - started
+
+
+def route_template(scope) -> str:
+    """Шаблон маршрута запроса (/api/v1/modules/{module_id}) для меток и логов"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mount (статика) не выставляет route, но выставляет root_path смонтированного приложения
+    if scope.get("endpoint") is not None:
+        return scope.get("root_path") or "mounted"
+    return "unmatched"
@@ -0,0 +1,78 @@
+import logging
+import re
+import time
+from collections import Counter
+
+from .config import settings
+from .request_context import RequestStats, request_stats, route_template
+
+logger = logging.getLogger(__name__)
+
+# IN (%(id_1_1)s, %(id_1_2)s, ...) / IN (?, ?, ...) - один шаблон независимо от длины списка
+_PARAM_LIST = re.compile(r"\(\s*(?:%\(\w+\)s|\?|\$\d+|:\w+)(?:\s*,\s*(?:%\(\w+\)s|\?|\$\d+|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL-шаблон без переменной части, чтобы одинаковые запросы с разными списками совпадали"""
+    return _WHITESPACE.sub(" ", _PARAM_LIST.sub("(...)", statement)).strip()
+
+
+def format_server_timing(stats: RequestStats, total_seconds: float) -> str:
+    """Значение заголовка Server-Timing: db, именованные фазы и total, в миллисекундах"""
+    entries = [f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.db_queries} queries"']
+    entries.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in stats.phases.items())
+    entries.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    Заголовок Server-Timing с временем SQL и фаз запроса.
+
+    В режиме QUERY_DEBUG дополнительно логирует SQL-шаблоны, которые за один запрос
+    выполнились больше QUERY_REPEAT_THRESHOLD раз (типичный признак N+1).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = request_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = request_stats.set(stats)
+        if settings.QUERY_DEBUG:
+            stats.statement_shapes = Counter()
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING_ENABLED:
+                header = format_server_timing(stats, time.perf_counter() - started)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                request_stats.reset(token)
+            if stats.statement_shapes:
+                self._report_repeated_statements(scope, stats.statement_shapes)
+
+    @staticmethod
+    def _report_repeated_statements(scope, shapes: Counter) -> None:
+        for shape, count in shapes.most_common():
+            if count <= settings.QUERY_REPEAT_THRESHOLD:
+                break
+            logger.warning(
+                f"🐢 Possible N+1 in {scope['method']} {route_template(scope)}: "
+                f"{count}x {shape[:300]}"
+            )
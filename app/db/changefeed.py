@@ -0,0 +1,179 @@
+"""
+Версии строк для дельта-синхронизации клиентов (GET /sync).
+
+Каждая вставка и изменение строк modules, module_accesses, cards и interval_repetitions
+получает номер из общего монотонного счётчика в колонке version; удаление пишет в
+sync_tombstones надгробие с новым номером. Номера присваивают триггеры БД, поэтому их
+получают и массовые пути в обход ORM: COPY, INSERT ... SELECT, каскадные удаления.
+
+PostgreSQL: последовательность sync_version_seq и plpgsql-триггеры.
+SQLite: однострочная таблица-счётчик sync_clock и триггеры.
+"""
+import logging
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import (
+    DDL, BigInteger, Column, DateTime, Index, Integer, Sequence, String, Table, event, func, text
+)
+from sqlalchemy.engine import Connection, Engine
+
+from .database import Base
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE = "sync_version_seq"
+CLOCK_TABLE = "sync_clock"
+BUMP_FUNCTION = "sync_bump_version"
+
+version_sequence = Sequence(SEQUENCE, metadata=Base.metadata)
+
+# Надгробия удалённых модулей, карточек и повторений; version - из того же счётчика
+sync_tombstones = Table(
+    "sync_tombstones",
+    Base.metadata,
+    Column("version", BigInteger, primary_key=True, autoincrement=False),
+    Column("entity", String, nullable=False),
+    Column("entity_id", Integer, nullable=False),
+    Column("module_id", Integer, nullable=False),
+    # Только у повторений: надгробие видит лишь их владелец
+    Column("user_id", Integer, nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+    # Версия модуля для ETag (max по модулю - одно чтение индекса) и подчистка надгробий удалённого модуля
+    Index("ix_sync_tombstones_module_id_version", "module_id", "version"),
+)
+
+
+class Tombstone(NamedTuple):
+    """Что записать при удалении строки; condition отсекает каскадные удаления"""
+    entity: str
+    entity_id: str
+    module_id: str
+    user_id: Optional[str] = None
+    condition: Optional[str] = None
+
+
+# Таблица -> надгробие (None - удаления не публикуются)
+VERSIONED_TABLES: Dict[str, Optional[Tombstone]] = {}
+
+
+def _pg_statements(table: str) -> Tuple[str, ...]:
+    statements = (
+        f"CREATE OR REPLACE FUNCTION {BUMP_FUNCTION}() RETURNS trigger AS $$ "
+        f"BEGIN NEW.version := nextval('{SEQUENCE}'); RETURN NEW; END $$ LANGUAGE plpgsql",
+        f"CREATE OR REPLACE TRIGGER {table}_sync_version BEFORE INSERT OR UPDATE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {BUMP_FUNCTION}()",
+    )
+    tombstone = VERSIONED_TABLES[table]
+    if tombstone is None:
+        return statements
+    user_id = f"OLD.{tombstone.user_id}" if tombstone.user_id else "NULL"
+    return statements + (
+        f"CREATE OR REPLACE FUNCTION {table}_sync_tombstone() RETURNS trigger AS $$ "
+        f"BEGIN "
+        f"IF {tombstone.condition or 'TRUE'} THEN "
+        f"INSERT INTO {sync_tombstones.name} (version, entity, entity_id, module_id, user_id) "
+        f"VALUES (nextval('{SEQUENCE}'), '{tombstone.entity}', OLD.{tombstone.entity_id}, "
+        f"OLD.{tombstone.module_id}, {user_id}); "
+        f"END IF; RETURN NULL; END $$ LANGUAGE plpgsql",
+        f"CREATE OR REPLACE TRIGGER {table}_sync_tombstone AFTER DELETE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {table}_sync_tombstone()",
+    )
+
+
+def _sqlite_statements(table: str) -> Tuple[str, ...]:
+    tick = f"UPDATE {CLOCK_TABLE} SET value = value + 1;"
+    stamp = f"UPDATE {table} SET version = (SELECT value FROM {CLOCK_TABLE}) WHERE id = new.id;"
+    statements = (
+        f"CREATE TRIGGER IF NOT EXISTS {table}_sync_version_ai AFTER INSERT ON {table} "
+        f"BEGIN {tick} {stamp} END",
+        # Собственный UPDATE version из триггеров меняет версию - условие его отсекает
+        f"CREATE TRIGGER IF NOT EXISTS {table}_sync_version_au AFTER UPDATE ON {table} "
+        f"WHEN new.version IS old.version BEGIN {tick} {stamp} END",
+    )
+    tombstone = VERSIONED_TABLES[table]
+    if tombstone is None:
+        return statements
+    user_id = f"old.{tombstone.user_id}" if tombstone.user_id else "NULL"
+    when = f" WHEN {tombstone.condition}" if tombstone.condition else ""
+    return statements + (
+        f"CREATE TRIGGER IF NOT EXISTS {table}_sync_tombstone AFTER DELETE ON {table}{when} "
+        f"BEGIN {tick} "
+        f"INSERT INTO {sync_tombstones.name} (version, entity, entity_id, module_id, user_id) "
+        f"VALUES ((SELECT value FROM {CLOCK_TABLE}), '{tombstone.entity}', old.{tombstone.entity_id}, "
+        f"old.{tombstone.module_id}, {user_id}); END",
+    )
+
+
+_SQLITE_CLOCK = (
+    f"CREATE TABLE IF NOT EXISTS {CLOCK_TABLE} (value INTEGER NOT NULL)",
+    f"INSERT INTO {CLOCK_TABLE} (value) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM {CLOCK_TABLE})",
+)
+
+
+def register_changefeed(table: Table, tombstone: Optional[Tombstone] = None) -> None:
+    """Создавать триггеры версий вместе с таблицей в create_all"""
+    VERSIONED_TABLES[table.name] = tombstone
+    for statement in _pg_statements(table.name):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in _sqlite_statements(table.name):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+for _statement in _SQLITE_CLOCK:
+    event.listen(sync_tombstones, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+
+def install_triggers(connection: Connection, table: str) -> None:
+    """Триггеры версий для уже существующей таблицы (миграции, подмена таблицы при партиционировании)"""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        statements = _SQLITE_CLOCK + _sqlite_statements(table)
+    elif dialect == "postgresql":
+        statements = _pg_statements(table)
+    else:
+        return
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def drop_triggers(connection: Connection, table: str, on_table: Optional[str] = None) -> None:
+    """Убрать триггеры версий table; on_table - если таблицу уже переименовали"""
+    on_table = on_table or table
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table}_sync_version ON {on_table}")
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table}_sync_tombstone ON {on_table}")
+    elif connection.dialect.name == "sqlite":
+        for suffix in ("version_ai", "version_au", "tombstone"):
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table}_sync_{suffix}")
+
+
+def has_triggers(connection: Connection, table: str, on_table: Optional[str] = None) -> bool:
+    """Стоят ли триггеры версий table на таблице on_table (PostgreSQL)"""
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_trigger WHERE tgrelid = to_regclass(:table) AND tgname = :name)"
+    ), {"table": on_table or table, "name": f"{table}_sync_version"}).scalar()
+
+
+def ensure_sqlite_changefeed(engine: Engine) -> None:
+    """
+    Колонки version и триггеры для уже существующей SQLite-базы: create_all не меняет
+    созданные раньше таблицы. Существующие строки получают версии подряд по id.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        for statement in _SQLITE_CLOCK:
+            connection.exec_driver_sql(statement)
+        for table in VERSIONED_TABLES:
+            columns = {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+            if "version" in columns:
+                continue
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN version BIGINT")
+            connection.exec_driver_sql(
+                f"UPDATE {table} SET version = (SELECT value FROM {CLOCK_TABLE}) + id"
+            )
+            connection.exec_driver_sql(
+                f"UPDATE {CLOCK_TABLE} SET value = value + coalesce((SELECT max(id) FROM {table}), 0)"
+            )
+            install_triggers(connection, table)
+            logger.info(f"✅ Sync versions added to {table}")
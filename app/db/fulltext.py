@@ -0,0 +1,91 @@
+"""
+Полнотекстовые индексы для поиска.
+
+PostgreSQL: GIN-индекс по выражению to_tsvector('simple', ...) и trigram-индекс (pg_trgm)
+создаются миграциями и объявлены в моделях через ddl_if(dialect="postgresql").
+SQLite: FTS5-таблица <table>_fts с внешним содержимым, которую поддерживают триггеры.
+Для остальных БД поиск откатывается на ILIKE.
+"""
+import logging
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import DDL, Table, event, func, literal_column, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+PG_CONFIG = "simple"
+# Таблица -> колонки полнотекстового индекса
+FULLTEXT_COLUMNS: Dict[str, Tuple[str, ...]] = {}
+
+
+def search_vector(*columns):
+    """to_tsvector по склеенным колонкам; то же выражение стоит в GIN-индексе"""
+    document = func.coalesce(columns[0], literal_column("''"))
+    for column in columns[1:]:
+        document = document.op("||")(literal_column("' '")).op("||")(func.coalesce(column, literal_column("''")))
+    return func.to_tsvector(literal_column(f"'{PG_CONFIG}'"), document)
+
+
+def fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+
+def _sqlite_fts_statements(table: str, columns: Iterable[str]) -> Tuple[str, ...]:
+    columns = tuple(columns)
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    fts = fts_table(table)
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); END",
+        # Только колонки индекса: служебные UPDATE строки (version в app/db/changefeed.py) индекс не трогают
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END",
+    )
+
+
+def register_fulltext(table: Table, *columns: str) -> None:
+    """Создавать индексы поиска вместе с таблицей в create_all"""
+    FULLTEXT_COLUMNS[table.name] = columns
+    event.listen(table, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+    for statement in _sqlite_fts_statements(table.name, columns):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+def ensure_sqlite_fulltext(engine: Engine) -> None:
+    """
+    FTS5-таблицы для уже существующей SQLite-базы: create_all не вызывает after_create
+    для созданных раньше таблиц, поэтому создаём их здесь и заполняем через rebuild.
+    У существующих таблиц пересоздаётся триггер обновления.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        for table, columns in FULLTEXT_COLUMNS.items():
+            if fulltext_available(connection, table):
+                # Триггер обновления из старых версий срабатывал на любой UPDATE строки
+                connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts_table(table)}_au")
+                connection.exec_driver_sql(_sqlite_fts_statements(table, columns)[3])
+                continue
+            for statement in _sqlite_fts_statements(table, columns):
+                connection.exec_driver_sql(statement)
+            connection.exec_driver_sql(f"INSERT INTO {fts_table(table)}({fts_table(table)}) VALUES ('rebuild')")
+            logger.info(f"✅ Full-text index {fts_table(table)} built")
+
+
+def fulltext_available(connection: Connection, table: str) -> bool:
+    """Есть ли индекс поиска для таблицы в этой БД"""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        return True
+    if dialect == "sqlite":
+        return connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts_table(table)}
+        ).first() is not None
+    return False
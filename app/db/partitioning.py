@@ -0,0 +1,201 @@
+"""
+Hash-партиционирование interval_repetitions по user_id (только PostgreSQL).
+
+Общие шаги для Alembic-миграции и онлайн-инструмента scripts/partition_repetitions.py:
+создать партиционированную копию таблицы, синхронизировать её триггером, перелить
+данные пачками и подменить таблицу одной короткой транзакцией.
+
+Все запросы RepetitionService фильтруют по user_id, поэтому PostgreSQL читает
+только одну партицию (partition pruning).
+"""
+import logging
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from . import changefeed
+
+logger = logging.getLogger(__name__)
+
+TABLE = "interval_repetitions"
+NEW_TABLE = "interval_repetitions_shadow"
+OLD_TABLE = "interval_repetitions_retired"
+SYNC_FUNCTION = "interval_repetitions_sync_shadow"
+SYNC_TRIGGER = "interval_repetitions_sync_shadow"
+
+# Индексы из миграций a3f1c9d27b64, 9c4e2a7b1d35 и 5d1f8a3c7e42; unique обязан включать ключ
+# партиционирования - он включает. Индекс по колонке, которой в таблице ещё нет, пропускается
+INDEXES = (
+    ("ix_interval_repetitions_user_module_due", "user_id, module_id, due", False),
+    ("uq_interval_repetitions_user_module_card", "user_id, module_id, card_id", True),
+    ("ix_interval_repetitions_card_id", "card_id", False),
+    ("ix_interval_repetitions_module_id", "module_id", False),
+    ("ix_interval_repetitions_user_id_version", "user_id, version", False),
+)
+FOREIGN_KEYS = (
+    ("user_id", "users"),
+    ("module_id", "modules"),
+    ("card_id", "cards"),
+)
+
+
+def is_partitioned(connection: Connection, table: str = TABLE) -> bool:
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid))"
+    ), {"table": table}).scalar()
+
+
+def table_exists(connection: Connection, table: str) -> bool:
+    return connection.execute(text("SELECT to_regclass(:table) IS NOT NULL"), {"table": table}).scalar()
+
+
+def _columns(connection: Connection, table: str) -> set:
+    return set(connection.execute(text(
+        "SELECT attname FROM pg_attribute WHERE attrelid = to_regclass(:table) AND attnum > 0 AND NOT attisdropped"
+    ), {"table": table}).scalars())
+
+
+def create_shadow_table(connection: Connection, partitions: Optional[int]) -> None:
+    """
+    Пустая копия interval_repetitions с индексами и внешними ключами.
+
+    partitions - число hash-партиций по user_id; None - обычная таблица (для отката).
+    """
+    # LIKE переносит типы, NOT NULL и DEFAULT (в том числе nextval последовательности id)
+    partition_clause = " PARTITION BY HASH (user_id)" if partitions else ""
+    connection.execute(text(
+        f"CREATE TABLE {NEW_TABLE} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_clause}"
+    ))
+    # Первичный ключ партиционированной таблицы обязан содержать user_id
+    primary_key = "id, user_id" if partitions else "id"
+    connection.execute(text(f"ALTER TABLE {NEW_TABLE} ADD CONSTRAINT {NEW_TABLE}_pkey PRIMARY KEY ({primary_key})"))
+    for column, referenced in FOREIGN_KEYS:
+        connection.execute(text(
+            f"ALTER TABLE {NEW_TABLE} ADD FOREIGN KEY ({column}) REFERENCES {referenced}(id) ON DELETE CASCADE"
+        ))
+    for remainder in range(partitions or 0):
+        connection.execute(text(
+            f"CREATE TABLE {TABLE}_p{remainder} PARTITION OF {NEW_TABLE} "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        ))
+    existing = _columns(connection, TABLE)
+    for name, columns, unique in INDEXES:
+        if not {column.strip() for column in columns.split(",")} <= existing:
+            continue
+        connection.execute(text(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX {name}_shadow ON {NEW_TABLE} ({columns})"
+        ))
+
+
+def _primary_key_name(connection: Connection, table: str) -> str:
+    return connection.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:table) AND contype = 'p'"
+    ), {"table": table}).scalar()
+
+
+def install_sync_trigger(connection: Connection) -> None:
+    """Изменения старой таблицы во время переливки сразу повторяются в новой"""
+    connection.execute(text(f"""
+        CREATE OR REPLACE FUNCTION {SYNC_FUNCTION}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {NEW_TABLE} WHERE id = OLD.id AND user_id = OLD.user_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {NEW_TABLE} SELECT (NEW).*;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """))
+    connection.execute(text(
+        f"CREATE TRIGGER {SYNC_TRIGGER} AFTER INSERT OR UPDATE OR DELETE ON {TABLE} "
+        f"FOR EACH ROW EXECUTE FUNCTION {SYNC_FUNCTION}()"
+    ))
+
+
+def drop_sync_trigger(connection: Connection) -> None:
+    connection.execute(text(f"DROP TRIGGER IF EXISTS {SYNC_TRIGGER} ON {TABLE}"))
+    connection.execute(text(f"DROP FUNCTION IF EXISTS {SYNC_FUNCTION}()"))
+
+
+def copy_batch(connection: Connection, after_id: int, batch_size: int) -> Optional[int]:
+    """
+    Перелить следующую пачку строк с id > after_id; возвращает последний id пачки или None в конце.
+
+    FOR SHARE не даёт удалить строку между чтением и вставкой: иначе удалённая строка
+    могла бы «воскреснуть» в новой таблице. Строки, уже записанные триггером, не трогаем.
+    """
+    last_id = connection.execute(text(
+        f"SELECT MAX(id) FROM (SELECT id FROM {TABLE} WHERE id > :after ORDER BY id LIMIT :limit) batch"
+    ), {"after": after_id, "limit": batch_size}).scalar()
+    if last_id is None:
+        return None
+    connection.execute(text(
+        f"INSERT INTO {NEW_TABLE} SELECT * FROM {TABLE} WHERE id > :after AND id <= :last FOR SHARE "
+        f"ON CONFLICT DO NOTHING"
+    ), {"after": after_id, "last": last_id})
+    return last_id
+
+
+def copy_all(
+    connection: Connection,
+    batch_size: int,
+    pause_seconds: float = 0.0,
+    commit: Optional[Callable[[], None]] = None,
+    after_id: int = 0
+) -> int:
+    """Переливка пачками; commit вызывается после каждой пачки, чтобы не держать длинную транзакцию"""
+    copied_batches = 0
+    while True:
+        last_id = copy_batch(connection, after_id, batch_size)
+        if last_id is None:
+            return after_id
+        if commit is not None:
+            commit()
+        copied_batches += 1
+        after_id = last_id
+        if copied_batches % 10 == 0:
+            logger.info(f"📦 Copied interval_repetitions up to id {after_id}")
+        if pause_seconds > 0:
+            time.sleep(pause_seconds)
+
+
+def swap_tables(connection: Connection, drop_old: bool) -> None:
+    """
+    Подмена таблиц в текущей транзакции под ACCESS EXCLUSIVE блокировкой.
+
+    Перед подменой число строк сверяется: расхождение означает, что переливка не закончена.
+    """
+    connection.execute(text(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE"))
+    old_count = connection.execute(text(f"SELECT COUNT(*) FROM {TABLE}")).scalar()
+    new_count = connection.execute(text(f"SELECT COUNT(*) FROM {NEW_TABLE}")).scalar()
+    if old_count != new_count:
+        raise RuntimeError(f"Row counts differ: {TABLE}={old_count}, {NEW_TABLE}={new_count}")
+
+    drop_sync_trigger(connection)
+    old_primary_key = _primary_key_name(connection, TABLE)
+    connection.execute(text(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}"))
+    connection.execute(text(f"ALTER TABLE {OLD_TABLE} RENAME CONSTRAINT {old_primary_key} TO {OLD_TABLE}_pkey"))
+    for name, _, _ in INDEXES:
+        connection.execute(text(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_retired"))
+        connection.execute(text(f"ALTER INDEX IF EXISTS {name}_shadow RENAME TO {name}"))
+    connection.execute(text(f"ALTER TABLE {NEW_TABLE} RENAME TO {TABLE}"))
+    connection.execute(text(f"ALTER TABLE {TABLE} RENAME CONSTRAINT {NEW_TABLE}_pkey TO {TABLE}_pkey"))
+    # Последовательность id должна пережить удаление старой таблицы
+    connection.execute(text(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id"))
+    # Версии для ленты изменений (app/db/changefeed.py) переезжают вместе с таблицей
+    if changefeed.has_triggers(connection, TABLE, on_table=OLD_TABLE):
+        changefeed.drop_triggers(connection, TABLE, on_table=OLD_TABLE)
+        changefeed.install_triggers(connection, TABLE)
+    if drop_old:
+        connection.execute(text(f"DROP TABLE {OLD_TABLE}"))
+
+
+def abort(connection: Connection) -> None:
+    """Отменить незаконченную переливку: убрать триггер и новую таблицу"""
+    drop_sync_trigger(connection)
+    connection.execute(text(f"DROP TABLE IF EXISTS {NEW_TABLE} CASCADE"))
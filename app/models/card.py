@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db.database import Base
+from ..db.changefeed import Tombstone, register_changefeed
+from ..db.fulltext import register_fulltext, search_vector
 
 
 class Card(Base):
@@ -13,7 +15,29 @@ class Card(Base):
     answer = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Номер последнего изменения для GET /sync; присваивает триггер (app/db/changefeed.py)
+    version = Column(BigInteger, nullable=True)
+
+    __table_args__ = (
+        # Карточки модуля по порядку id: keyset-пагинация и подсчёт без чтения таблицы
+        Index("ix_cards_module_id_id", "module_id", "id"),
+        # Изменения карточек модуля после курсора синхронизации
+        Index("ix_cards_module_id_version", "module_id", "version"),
+        # Поиск по вопросам и ответам (только PostgreSQL; в SQLite - FTS5)
+        Index(
+            "ix_cards_search_vector", search_vector(question, answer), postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
 
     # Relationships
     module = relationship("Module", back_populates="cards")
-    repetitions = relationship("IntervalRepetition", back_populates="card", cascade="all, delete-orphan")
+    repetitions = relationship(
+        "IntervalRepetition", back_populates="card", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+
+register_fulltext(Card.__table__, "question", "answer")
+# При удалении модуля каскад не пишет надгробия карточек: хватает надгробия модуля
+register_changefeed(Card.__table__, Tombstone(
+    "card", "id", "module_id", condition="EXISTS (SELECT 1 FROM modules WHERE modules.id = OLD.module_id)"
+))
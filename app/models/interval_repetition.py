@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Enum, Sequence
+from sqlalchemy import BigInteger, Column, Integer, Float, DateTime, ForeignKey, Enum, Sequence, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
+from ..db.changefeed import Tombstone, register_changefeed
 from ..db.database import Base
 
 
@@ -26,8 +27,34 @@ class IntervalRepetition(Base):
     last_review = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Номер последнего изменения для GET /sync; присваивает триггер (app/db/changefeed.py)
+    version = Column(BigInteger, nullable=True)
+
+    __table_args__ = (
+        # Очередь повторения и статистика модуля: фильтр по пользователю и модулю, сортировка по due
+        Index("ix_interval_repetitions_user_module_due", "user_id", "module_id", "due"),
+        # Одна запись на карточку пользователя; заодно поиск записи при ответе
+        Index("uq_interval_repetitions_user_module_card", "user_id", "module_id", "card_id", unique=True),
+        # ON DELETE CASCADE при удалении карточки или модуля ищет строки по этим колонкам
+        Index("ix_interval_repetitions_card_id", "card_id"),
+        Index("ix_interval_repetitions_module_id", "module_id"),
+        # Изменения повторений пользователя после курсора синхронизации
+        Index("ix_interval_repetitions_user_id_version", "user_id", "version"),
+    )
+
+    # user_id в идентичности строки: UPDATE/DELETE по объекту фильтруют и по нему,
+    # и на партиционированной таблице (app/db/partitioning.py) затрагивают одну партицию
+    __mapper_args__ = {"primary_key": [id, user_id]}
 
     # Relationships
     card = relationship("Card", back_populates="repetitions")
     user = relationship("User", back_populates="repetitions")
     module = relationship("Module", back_populates="repetitions")
+
+
+# Надгробие повторения - по card_id; при удалении карточки или модуля хватает их надгробий
+register_changefeed(IntervalRepetition.__table__, Tombstone(
+    "repetition", "card_id", "module_id", "user_id",
+    condition="EXISTS (SELECT 1 FROM cards WHERE cards.id = OLD.card_id) "
+              "AND EXISTS (SELECT 1 FROM modules WHERE modules.id = OLD.module_id)"
+))
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db.database import Base
+from ..db.changefeed import Tombstone, register_changefeed
+from ..db.fulltext import register_fulltext, search_vector
 
 
 class Module(Base):
@@ -13,9 +15,28 @@ class Module(Base):
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Номер последнего изменения для GET /sync; присваивает триггер (app/db/changefeed.py)
+    version = Column(BigInteger, nullable=True)
+
+    __table_args__ = (
+        # Поиск по каталогу: слова названия и описания, подстрока в названии (только PostgreSQL)
+        Index(
+            "ix_modules_search_vector", search_vector(name, description), postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_modules_name_trgm", name, postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
 
     # Relationships
     owner = relationship("User", back_populates="modules")
-    cards = relationship("Card", back_populates="module", cascade="all, delete-orphan")
-    access = relationship("ModuleAccess", back_populates="module", cascade="all, delete-orphan")
-    repetitions = relationship("IntervalRepetition", back_populates="module", cascade="all, delete-orphan")
+    # Дочерние строки удаляет ON DELETE CASCADE в БД: при удалении модуля ORM их не загружает
+    cards = relationship("Card", back_populates="module", cascade="all, delete-orphan", passive_deletes=True)
+    access = relationship("ModuleAccess", back_populates="module", cascade="all, delete-orphan", passive_deletes=True)
+    repetitions = relationship(
+        "IntervalRepetition", back_populates="module", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+
+register_fulltext(Module.__table__, "name", "description")
+register_changefeed(Module.__table__, Tombstone("module", "id", "id"))
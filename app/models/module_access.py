@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
+from ..db.changefeed import register_changefeed
 from ..db.database import Base
 import enum
 
@@ -18,7 +19,17 @@ class ModuleAccess(Base):
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     view_access = Column(String, nullable=False, default=AccessLevel.ONLY_ME)
     edit_access = Column(String, nullable=False, default=AccessLevel.ONLY_ME)
+    # Номер последнего изменения для GET /sync; присваивает триггер (app/db/changefeed.py)
+    version = Column(BigInteger, nullable=True)
+
+    __table_args__ = (
+        Index("ix_module_accesses_module_id_view_access", "module_id", "view_access"),
+    )
 
     # Relationships
     module = relationship("Module", back_populates="access")
     owner = relationship("User", back_populates="module_accesses")
+
+
+# Доступы удаляются только вместе с модулем - надгробия не нужны
+register_changefeed(ModuleAccess.__table__)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index, text
 from sqlalchemy.orm import relationship
 from ..db.database import Base
 
@@ -13,6 +13,15 @@ class User(Base):
     oidc_sub = Column(String, unique=True, index=True, nullable=False)
     push_id = Column(String, nullable=True)
 
+    __table_args__ = (
+        # Рассылка напоминаний идёт только по пользователям с push-токеном
+        Index(
+            "ix_users_push_id_not_null", "id",
+            postgresql_where=text("push_id IS NOT NULL"),
+            sqlite_where=text("push_id IS NOT NULL")
+        ),
+    )
+
     # Relationships
     modules = relationship("Module", back_populates="owner", cascade="all, delete-orphan")
     module_accesses = relationship("ModuleAccess", back_populates="owner", cascade="all, delete-orphan")
@@ -39,6 +39,41 @@ class Card(BaseModel):
 class GetCardResponse(BaseModel):
     items: list[Card]
     total_count: int
+    # id последней карточки страницы для after_id; None - это последняя страница
+    next_after_id: Optional[int] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class CardSearchHit(BaseModel):
+    id: int
+    module_id: int
+    question: str
+    answer: str
+    # Фрагменты - экранированный HTML, совпадения выделены <mark>...</mark>
+    question_snippet: str
+    answer_snippet: str
+    rank: float
+
+
+class CardSearchResponse(BaseModel):
+    items: List[CardSearchHit]
+    # Передайте в cursor, чтобы получить следующую страницу; None - страниц больше нет
+    next_cursor: Optional[str] = None
+
+
+class CardImportError(BaseModel):
+    line: int
+    error: str
+
+
+class CardImportResponse(BaseModel):
+    imported: int
+    failed: int
+    repetitions_created: int
+    # Первые ошибки по строкам файла; failed считает все
+    errors: List[CardImportError]
+
+    class Config:
+        from_attributes = True
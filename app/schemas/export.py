@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class RestoreResponse(BaseModel):
+    modules: int
+    cards: int
+    repetitions: int
+
+    class Config:
+        from_attributes = True
@@ -29,6 +29,14 @@ class ModuleUpdate(BaseModel):
     EditAccess: Optional[AccessLevel] = None
 
 
+class ModuleClone(BaseModel):
+    # Пустые поля берутся из исходного модуля
+    name: Optional[str] = None
+    ViewAccess: Optional[AccessLevel] = None
+    EditAccess: Optional[AccessLevel] = None
+    EnableIntervalRepetitions: bool = False
+
+
 class ModuleInDB(ModuleBase):
     id: int
     owner_id: int
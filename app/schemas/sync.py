@@ -0,0 +1,54 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+
+class SyncModule(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    owner_id: int
+
+
+class SyncModuleAccess(BaseModel):
+    module_id: int
+    view_access: str
+    edit_access: str
+
+
+class SyncCard(BaseModel):
+    id: int
+    module_id: int
+    question: str
+    answer: str
+
+
+class SyncRepetition(BaseModel):
+    card_id: int
+    module_id: int
+    state: str
+    step: int
+    stability: float
+    difficulty: float
+    due: datetime
+    last_review: Optional[datetime] = None
+
+
+class SyncDeleted(BaseModel):
+    modules: List[int] = Field(default_factory=list)
+    cards: List[int] = Field(default_factory=list)
+    # Повторения удаляются по card_id: у пользователя одно повторение на карточку
+    repetitions: List[int] = Field(default_factory=list)
+
+
+class SyncResponse(BaseModel):
+    # Передать в следующий запрос; сохранять после применения изменений
+    cursor: str
+    has_more: bool
+    # Курсора не было или он устарел: клиент очищает локальные данные и применяет ответ как полную выгрузку
+    reset: bool
+    modules: List[SyncModule]
+    module_accesses: List[SyncModuleAccess]
+    cards: List[SyncCard]
+    repetitions: List[SyncRepetition]
+    deleted: SyncDeleted
@@ -0,0 +1,417 @@
+"""
+Импорт и экспорт колод Anki (.apkg).
+
+.apkg - zip-архив с SQLite-коллекцией (collection.anki21 или collection.anki2) и
+файлом media. Коллекция читается стандартным sqlite3 из временного файла; заметки
+идут курсором пачками, поэтому память не зависит от размера колоды.
+Пакеты только с collection.anki21b (zstd, Anki 2.1.50+) без сторонних библиотек не читаются.
+"""
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+from datetime import datetime, timedelta, timezone
+from typing import IO, Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.card import Card
+from ..models.interval_repetition import IntervalRepetition, RepetitionState
+from ..models.module import Module
+from .card_import_service import ImportResult, RowError
+from .module_cache import invalidate_module
+from .repetition_service import RepetitionService
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = ("collection.anki21", "collection.anki2")
+FIELD_SEPARATOR = "\x1f"
+
+# Типы карточек Anki
+ANKI_NEW, ANKI_LEARNING, ANKI_REVIEW, ANKI_RELEARNING = 0, 1, 2, 3
+ANKI_TO_REPETITION_STATE = {
+    ANKI_LEARNING: RepetitionState.Learning,
+    ANKI_REVIEW: RepetitionState.Review,
+    ANKI_RELEARNING: RepetitionState.Relearning,
+}
+REPETITION_TO_ANKI_TYPE = {state: card_type for card_type, state in ANKI_TO_REPETITION_STATE.items()}
+
+# Лёгкость SM-2 (в промилле) <-> сложность FSRS 1..10: минимальная лёгкость - самая сложная карточка
+MIN_FACTOR, MAX_FACTOR = 1300, 3000
+MIN_DIFFICULTY, MAX_DIFFICULTY = 1.0, 10.0
+
+# Постоянный id типа заметки: повторный экспорт в Anki не плодит одинаковые типы
+MODEL_ID = 1712000000000
+DECK_ID_BASE = 1712000000000
+# Номера дней никогда не бывают такими большими - значит, это unix-время
+UNIX_TIME_THRESHOLD = 100_000_000
+
+# Первая (по ord) карточка каждой заметки; голые колонки при MIN() в SQLite берутся из строки минимума
+NOTES_QUERY = """
+    SELECT n.flds, c.type, c.queue, c.due, c.ivl, c.factor, c.reps, c.data,
+           (SELECT MAX(r.id) FROM revlog r WHERE r.cid = c.id), MIN(c.ord)
+    FROM notes n LEFT JOIN cards c ON c.nid = n.id
+    GROUP BY n.id
+    ORDER BY n.id
+"""
+
+SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_usn ON notes (usn);
+CREATE INDEX ix_cards_usn ON cards (usn);
+CREATE INDEX ix_revlog_usn ON revlog (usn);
+CREATE INDEX ix_cards_nid ON cards (nid);
+CREATE INDEX ix_cards_sched ON cards (did, queue, due);
+CREATE INDEX ix_revlog_cid ON revlog (cid);
+CREATE INDEX ix_notes_csum ON notes (csum);
+"""
+
+_BREAK = re.compile(r"<br\s*/?>|</div>|</p>", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+
+
+def html_to_text(value: str) -> str:
+    """Поле Anki (HTML) -> обычный текст карточки"""
+    return html.unescape(_TAG.sub("", _BREAK.sub("\n", value))).strip()
+
+
+def text_to_html(value: str) -> str:
+    return html.escape(value).replace("\n", "<br>")
+
+
+def factor_to_difficulty(factor: int) -> float:
+    share = (min(max(factor, MIN_FACTOR), MAX_FACTOR) - MIN_FACTOR) / (MAX_FACTOR - MIN_FACTOR)
+    return round(MAX_DIFFICULTY - share * (MAX_DIFFICULTY - MIN_DIFFICULTY), 4)
+
+
+def difficulty_to_factor(difficulty: float) -> int:
+    difficulty = min(max(difficulty, MIN_DIFFICULTY), MAX_DIFFICULTY)
+    share = (MAX_DIFFICULTY - difficulty) / (MAX_DIFFICULTY - MIN_DIFFICULTY)
+    return round(MIN_FACTOR + share * (MAX_FACTOR - MIN_FACTOR))
+
+
+def anki_schedule(row: tuple, collection_created: datetime, now: datetime) -> Dict[str, Any]:
+    """
+    Расписание первой карточки заметки -> поля IntervalRepetition.
+
+    Состояние памяти FSRS (data: {"s", "d"}), если Anki его посчитал, переносится как есть;
+    иначе стабильность - текущий интервал в днях, сложность - из лёгкости SM-2.
+    """
+    _, card_type, _, due, interval, factor, reviews, data, last_review_ms, _ = row
+    defaults = IntervalRepetition.__table__.c
+    schedule = {
+        "state": RepetitionState.Learning,
+        "step": 0,
+        "stability": defaults.stability.default.arg,
+        "difficulty": defaults.difficulty.default.arg,
+        "due": now,
+        "last_review": None,
+    }
+    if card_type not in ANKI_TO_REPETITION_STATE:
+        return schedule
+
+    schedule["state"] = ANKI_TO_REPETITION_STATE[card_type]
+    schedule["step"] = reviews or 0
+    # due: у изучаемых карточек - unix-время, у остальных - номер дня от создания коллекции
+    if card_type != ANKI_REVIEW and due > UNIX_TIME_THRESHOLD:
+        schedule["due"] = datetime.fromtimestamp(due, timezone.utc)
+    else:
+        schedule["due"] = collection_created + timedelta(days=due)
+    if last_review_ms:
+        schedule["last_review"] = datetime.fromtimestamp(last_review_ms / 1000, timezone.utc)
+
+    try:
+        memory = json.loads(data) if data else {}
+    except ValueError:
+        memory = {}
+    if isinstance(memory, dict) and memory.get("s") and memory.get("d"):
+        schedule["stability"], schedule["difficulty"] = float(memory["s"]), float(memory["d"])
+    else:
+        if interval and interval > 0:
+            schedule["stability"] = float(interval)
+        if factor:
+            schedule["difficulty"] = factor_to_difficulty(factor)
+    return schedule
+
+
+def _extract_collection(stream: IO[bytes], directory: str) -> str:
+    try:
+        package = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        raise ValueError("File is not an .apkg package")
+    with package:
+        names = set(package.namelist())
+        # Новый формат кладёт рядом с anki21b заглушку collection.anki2 с просьбой обновить Anki
+        if "collection.anki21b" in names and "collection.anki21" not in names:
+            raise ValueError(
+                "Package uses the Anki 2.1.50+ format; export it with 'Support older Anki versions' enabled"
+            )
+        name = next((candidate for candidate in COLLECTIONS if candidate in names), None)
+        if name is None:
+            raise ValueError("Package has no Anki collection")
+        path = os.path.join(directory, "collection.sqlite")
+        with package.open(name) as source, open(path, "wb") as target:
+            shutil.copyfileobj(source, target)
+    return path
+
+
+class AnkiService:
+    def __init__(self, db: Session):
+        """
+        Импорт и экспорт модулей в формате Anki.
+
+        Args:
+            db: Сессия SQLAlchemy
+        """
+        self.db = db
+
+    def import_package(
+        self,
+        user_id: int,
+        module_id: int,
+        stream: IO[bytes],
+        include_scheduling: bool = True
+    ) -> ImportResult:
+        """
+        Импортировать заметки колоды как карточки модуля одной транзакцией.
+
+        Вопрос - первое поле заметки, ответ - второе. При include_scheduling расписание Anki
+        становится интервальными повторениями пользователя (это включает повторения модуля).
+
+        Args:
+            user_id: ID пользователя, который импортирует
+            module_id: ID модуля
+            stream: Загруженный .apkg
+            include_scheduling: Переносить расписание Anki
+
+        Returns:
+            Число импортированных и пропущенных заметок; line в ошибках - номер заметки
+        """
+        result = ImportResult()
+        now = datetime.now(timezone.utc)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = _extract_collection(stream, directory)
+            collection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                created = datetime.fromtimestamp(collection.execute("SELECT crt FROM col").fetchone()[0], timezone.utc)
+                cursor = collection.execute(NOTES_QUERY)
+                position = 0
+                while True:
+                    rows = cursor.fetchmany(settings.IMPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    batch = []
+                    for row in rows:
+                        position += 1
+                        fields = row[0].split(FIELD_SEPARATOR)
+                        question = html_to_text(fields[0])
+                        answer = html_to_text(fields[1]) if len(fields) > 1 else ""
+                        if not question or not answer:
+                            result.failed += 1
+                            if len(result.errors) < settings.IMPORT_MAX_ERRORS:
+                                result.errors.append(RowError(line=position, error="note has no question or answer"))
+                            continue
+                        batch.append((question, answer, anki_schedule(row, created, now)))
+                    if batch:
+                        self._write_batch(user_id, module_id, batch, include_scheduling)
+                        result.imported += len(batch)
+                        if include_scheduling:
+                            result.repetitions_created += len(batch)
+
+                # Новые карточки - всем, кто учит модуль; импортирующему с расписанием - и старые
+                if result.imported:
+                    result.repetitions_created += RepetitionService(self.db).sync_repetitions(module_id)
+                self.db.commit()
+                invalidate_module(module_id)
+            except sqlite3.DatabaseError as e:
+                self.db.rollback()
+                raise ValueError(f"Broken Anki collection: {e}")
+            except Exception:
+                self.db.rollback()
+                raise
+            finally:
+                collection.close()
+
+        logger.info(f"📥 Imported {result.imported} Anki notes into module {module_id} ({result.failed} skipped)")
+        return result
+
+    def _write_batch(self, user_id: int, module_id: int, batch: List[tuple], include_scheduling: bool) -> None:
+        card_ids = self.db.execute(
+            insert(Card).returning(Card.id, sort_by_parameter_order=True),
+            [{"module_id": module_id, "question": question, "answer": answer} for question, answer, _ in batch]
+        ).scalars().all()
+        if not include_scheduling:
+            return
+        self.db.execute(insert(IntervalRepetition), [
+            {"user_id": user_id, "module_id": module_id, "card_id": card_id, **schedule}
+            for card_id, (_, _, schedule) in zip(card_ids, batch)
+        ])
+
+    def export_package(self, user_id: int, module: Module, directory: str) -> str:
+        """
+        Записать модуль в .apkg: карточки - заметки типа «Basic», повторения пользователя - расписание.
+
+        Карточки читаются из БД пачками, коллекция пишется во временный файл в directory.
+
+        Returns:
+            Путь к .apkg
+        """
+        now = datetime.now(timezone.utc)
+        created = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        id_base = int(now.timestamp() * 1000)
+        deck_id = DECK_ID_BASE + module.id
+
+        collection_path = os.path.join(directory, "collection.anki2")
+        collection = sqlite3.connect(collection_path)
+        try:
+            collection.executescript(SCHEMA)
+            collection.execute(
+                "INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, '{}')",
+                (int(created.timestamp()), int(now.timestamp()), id_base,
+                 *_collection_json(deck_id, module.name, module.description or "", int(now.timestamp())))
+            )
+            rows = self.db.query(Card, IntervalRepetition).outerjoin(
+                IntervalRepetition,
+                (IntervalRepetition.card_id == Card.id) & (IntervalRepetition.user_id == user_id)
+            ).filter(Card.module_id == module.id).order_by(Card.id).yield_per(settings.IMPORT_BATCH_SIZE)
+
+            notes, cards, revlog = [], [], []
+            for position, (card, repetition) in enumerate(rows):
+                anki_id = id_base + position
+                front, back = text_to_html(card.question), text_to_html(card.answer)
+                notes.append((
+                    anki_id, f"tprep-{card.id}", MODEL_ID, int(now.timestamp()), -1, "",
+                    front + FIELD_SEPARATOR + back, front, _checksum(card.question), 0, ""
+                ))
+                cards.append(_anki_card(anki_id, deck_id, position, repetition, created))
+                if repetition is not None and repetition.last_review is not None:
+                    # Последний ответ: без него FSRS в Anki не знает, сколько дней прошло
+                    revlog.append((
+                        int(_aware(repetition.last_review).timestamp() * 1000),
+                        anki_id, -1, 3, cards[-1][9], 0, cards[-1][10], 0, 1
+                    ))
+                if len(notes) >= settings.IMPORT_BATCH_SIZE:
+                    _flush(collection, notes, cards, revlog)
+            _flush(collection, notes, cards, revlog)
+            collection.commit()
+        finally:
+            collection.close()
+
+        package_path = os.path.join(directory, "module.apkg")
+        with zipfile.ZipFile(package_path, "w", zipfile.ZIP_DEFLATED) as package:
+            package.write(collection_path, "collection.anki2")
+            package.writestr("media", "{}")
+        os.remove(collection_path)
+        return package_path
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite возвращает даты без часового пояса; храним их в UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _checksum(question: str) -> int:
+    return int(hashlib.sha1(question.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _anki_card(
+    anki_id: int, deck_id: int, position: int, repetition: Optional[IntervalRepetition], created: datetime
+) -> tuple:
+    # id, nid, did, ord, mod, usn, type, queue, due, ivl, factor, reps, lapses, left, odue, odid, flags, data
+    # Карточка без ответов - новая для Anki, даже если повторения включены
+    if repetition is None or (repetition.state == RepetitionState.Learning and not repetition.step):
+        return (
+            anki_id, anki_id, deck_id, 0, anki_id // 1000, -1, ANKI_NEW, ANKI_NEW,
+            position, 0, 0, 0, 0, 0, 0, 0, 0, ""
+        )
+
+    card_type = REPETITION_TO_ANKI_TYPE[repetition.state]
+    due_at = _aware(repetition.due)
+    if card_type == ANKI_REVIEW:
+        due = max((due_at - created).days, 0)
+    else:
+        due = int(due_at.timestamp())
+    interval = max(round(repetition.stability), 1) if card_type == ANKI_REVIEW else 0
+    memory = json.dumps({"s": repetition.stability, "d": repetition.difficulty})
+    # Переучиваемые карточки стоят в той же очереди, что и изучаемые
+    queue = ANKI_LEARNING if card_type == ANKI_RELEARNING else card_type
+    return (
+        anki_id, anki_id, deck_id, 0, anki_id // 1000, -1, card_type, queue,
+        due, interval, difficulty_to_factor(repetition.difficulty), repetition.step, 0, 0, 0, 0, 0, memory
+    )
+
+
+def _flush(collection: sqlite3.Connection, notes: list, cards: list, revlog: list) -> None:
+    collection.executemany("INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", notes)
+    collection.executemany("INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", cards)
+    collection.executemany("INSERT OR IGNORE INTO revlog VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", revlog)
+    notes.clear()
+    cards.clear()
+    revlog.clear()
+
+
+def _collection_json(deck_id: int, name: str, description: str, modified: int) -> tuple:
+    """conf, models, decks, dconf для строки col (формат коллекции Anki 2.1, schema 11)"""
+    conf = {
+        "activeDecks": [deck_id], "curDeck": deck_id, "newSpread": 0, "collapseTime": 1200,
+        "timeLim": 0, "estTimes": True, "dueCounts": True, "curModel": str(MODEL_ID),
+        "nextPos": 1, "sortType": "noteFld", "sortBackwards": False, "addToCur": True,
+    }
+    field = {"media": [], "sticky": False, "rtl": False, "font": "Arial", "size": 20}
+    model = {
+        "id": MODEL_ID, "name": "T-Prep Basic", "type": 0, "mod": modified, "usn": -1, "sortf": 0,
+        "did": deck_id, "tags": [], "vers": [], "req": [[0, "all", [0]]],
+        "flds": [{**field, "name": "Front", "ord": 0}, {**field, "name": "Back", "ord": 1}],
+        "tmpls": [{
+            "name": "Card 1", "ord": 0, "qfmt": "{{Front}}",
+            "afmt": "{{FrontSide}}\n\n<hr id=answer>\n\n{{Back}}", "did": None, "bqfmt": "", "bafmt": "",
+        }],
+        "css": ".card { font-family: arial; font-size: 20px; text-align: center; }",
+        "latexPre": "\\documentclass[12pt]{article}\n\\begin{document}\n", "latexPost": "\\end{document}",
+    }
+    deck = {
+        "newToday": [0, 0], "revToday": [0, 0], "lrnToday": [0, 0], "timeToday": [0, 0],
+        "collapsed": False, "dyn": 0, "conf": 1, "extendNew": 10, "extendRev": 50, "usn": -1,
+    }
+    decks = {
+        "1": {**deck, "id": 1, "name": "Default", "desc": "", "mod": modified},
+        str(deck_id): {**deck, "id": deck_id, "name": name, "desc": description, "mod": modified},
+    }
+    dconf = {"1": {
+        "id": 1, "name": "Default", "mod": 0, "usn": 0, "maxTaken": 60, "autoplay": True, "timer": 0, "replayq": True,
+        "new": {"bury": True, "delays": [1, 10], "initialFactor": 2500, "ints": [1, 4, 7], "order": 1, "perDay": 20, "separate": True},
+        "rev": {"bury": True, "ease4": 1.3, "fuzz": 0.05, "ivlFct": 1, "maxIvl": 36500, "minSpace": 1, "perDay": 100},
+        "lapse": {"delays": [10], "leechAction": 0, "leechFails": 8, "minInt": 1, "mult": 0},
+    }}
+    return json.dumps(conf), json.dumps({str(MODEL_ID): model}), json.dumps(decks), json.dumps(dconf)
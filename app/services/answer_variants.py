@@ -0,0 +1,64 @@
+"""
+Варианты ответа карточки: правильный ответ и до трёх разных неверных.
+
+Выбор детерминирован: один генератор на страницу засевается seed сессии, пользователем
+и страницей, поэтому одна и та же страница карточек отдаётся одинаково (её можно
+кэшировать и отвечать 304), а новая сессия с другим seed получает другие варианты.
+Засев Random стоит микросекунды, поэтому генератор создаётся на страницу, а не на карточку.
+"""
+import random
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+# Правильный ответ и три неверных
+VARIANT_COUNT = 4
+
+
+def session_seed(seed: Optional[str] = None) -> str:
+    """seed клиента, а без него - текущая дата UTC: варианты меняются раз в сутки"""
+    return seed or datetime.now(timezone.utc).date().isoformat()
+
+
+def variant_random(seed: str, user_id: int, *keys) -> random.Random:
+    """Генератор для (seed, пользователь, ключи); строка засевается через SHA-512 и одинакова в любом процессе"""
+    return random.Random(":".join(str(part) for part in (seed, user_id, *keys)))
+
+
+def _shuffled_indices(size: int, rng: random.Random) -> Iterator[int]:
+    """Ленивая перестановка Фишера-Йетса: первые k индексов за O(k), без копии всего списка"""
+    swapped = {}
+    for position in range(size):
+        pick = rng.randrange(position, size)
+        yield swapped.get(pick, pick)
+        swapped[pick] = swapped.get(position, position)
+
+
+def get_three_answer(
+    answers: Sequence[str],
+    right_answer: str,
+    rng: Optional[random.Random] = None
+) -> Tuple[List[str], int]:
+    """
+    Правильный ответ и до трёх разных неверных в случайном порядке.
+
+    Args:
+        answers: Ответы, из которых берутся неверные варианты (могут содержать правильный и повторы)
+        right_answer: Правильный ответ
+        rng: Генератор из variant_random; без него - глобальный random
+
+    Returns:
+        Варианты и индекс правильного ответа среди них
+    """
+    rng = rng or random
+    # Выбираем только нужные варианты, а не перемешиваем все ответы модуля
+    variants: List[str] = []
+    for index in _shuffled_indices(len(answers), rng):
+        answer = answers[index]
+        if answer != right_answer and answer not in variants:
+            variants.append(answer)
+            if len(variants) == VARIANT_COUNT - 1:
+                break
+
+    right = rng.randrange(len(variants) + 1)
+    variants.insert(right, right_answer)
+    return variants, right
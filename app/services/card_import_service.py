@@ -0,0 +1,206 @@
+import csv
+import io
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import IO, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.card import Card
+from .module_cache import invalidate_module
+from .repetition_service import RepetitionService
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "tsv", "ndjson")
+_EXTENSIONS = {"csv": "csv", "tsv": "tsv", "tab": "tsv", "txt": "tsv", "ndjson": "ndjson", "jsonl": "ndjson"}
+
+
+def detect_format(filename: Optional[str], requested: Optional[str] = None) -> str:
+    """Формат из параметра запроса или расширения файла; ValueError, если определить нельзя"""
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"Unsupported format '{requested}', expected one of: {', '.join(FORMATS)}")
+        return requested
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension not in _EXTENSIONS:
+        raise ValueError("Cannot detect file format, pass format=csv|tsv|ndjson")
+    return _EXTENSIONS[extension]
+
+
+@dataclass
+class RowError:
+    line: int
+    error: str
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    failed: int = 0
+    repetitions_created: int = 0
+    # Не больше IMPORT_MAX_ERRORS первых ошибок; failed считает все
+    errors: List[RowError] = field(default_factory=list)
+
+
+def _validate(question, answer) -> Tuple[Optional[Tuple[str, str]], Optional[str]]:
+    if not isinstance(question, str) or not isinstance(answer, str):
+        return None, "question and answer must be strings"
+    question, answer = question.strip(), answer.strip()
+    if not question or not answer:
+        return None, "question and answer are required"
+    if max(len(question), len(answer)) > settings.IMPORT_MAX_FIELD_LENGTH:
+        return None, f"field longer than {settings.IMPORT_MAX_FIELD_LENGTH} characters"
+    return (question, answer), None
+
+
+def _delimited_rows(text: IO[str], delimiter: str) -> Iterator[Tuple[int, Optional[Tuple[str, str]], Optional[str]]]:
+    # Лимит модуля csv общий для процесса: только поднимаем его, чтобы длинные поля доходили
+    # до _validate и получали понятную ошибку
+    if csv.field_size_limit() <= settings.IMPORT_MAX_FIELD_LENGTH:
+        csv.field_size_limit(settings.IMPORT_MAX_FIELD_LENGTH + 1)
+    reader = csv.reader(text, delimiter=delimiter)
+    question_index, answer_index = 0, 1
+    first = True
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # Поле длиннее лимита csv и т.п.: строка пропускается, чтение продолжается со следующей
+            yield reader.line_num, None, f"malformed row: {e}"
+            continue
+        line = reader.line_num
+        if not row or not any(value.strip() for value in row):
+            continue
+        if first:
+            first = False
+            header = [value.strip().lower() for value in row]
+            # Заголовок необязателен: без него вопрос - первая колонка, ответ - вторая
+            if "question" in header and "answer" in header:
+                question_index, answer_index = header.index("question"), header.index("answer")
+                continue
+        if len(row) <= max(question_index, answer_index):
+            yield line, None, "expected question and answer columns"
+            continue
+        card, error = _validate(row[question_index], row[answer_index])
+        yield line, card, error
+
+
+def _ndjson_rows(text: IO[str]) -> Iterator[Tuple[int, Optional[Tuple[str, str]], Optional[str]]]:
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            item = json.loads(raw)
+        except json.JSONDecodeError as e:
+            yield line, None, f"invalid JSON: {e.msg}"
+            continue
+        if not isinstance(item, dict):
+            yield line, None, "expected a JSON object"
+            continue
+        card, error = _validate(item.get("question"), item.get("answer"))
+        yield line, card, error
+
+
+def parse_rows(stream: IO[bytes], file_format: str) -> Iterator[Tuple[int, Optional[Tuple[str, str]], Optional[str]]]:
+    """
+    Построчный разбор файла: (номер строки, (вопрос, ответ) или None, ошибка или None).
+
+    Файл читается потоком, в памяти держится только текущая строка.
+    """
+    # utf-8-sig съедает BOM, который добавляет Excel
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="strict", newline="")
+    try:
+        if file_format == "ndjson":
+            yield from _ndjson_rows(text)
+        else:
+            yield from _delimited_rows(text, "," if file_format == "csv" else "\t")
+    finally:
+        # Файл принадлежит вызывающему: отцепляемся, не закрывая его
+        text.detach()
+
+
+class CardImportService:
+    def __init__(self, db: Session):
+        """
+        Массовый импорт карточек в модуль.
+
+        Args:
+            db: Сессия SQLAlchemy
+        """
+        self.db = db
+
+    def import_cards(self, module_id: int, stream: IO[bytes], file_format: str) -> ImportResult:
+        """
+        Импортировать карточки из CSV, TSV или NDJSON одной транзакцией.
+
+        Строки пишутся пачками по IMPORT_BATCH_SIZE (в PostgreSQL - через COPY), ошибочные
+        строки пропускаются и попадают в отчёт. Всем, у кого включены интервальные повторения
+        модуля, записи повторений для новых карточек создаются в той же транзакции.
+
+        Args:
+            module_id: ID модуля
+            stream: Загруженный файл (байты)
+            file_format: csv, tsv или ndjson
+
+        Returns:
+            Число импортированных и ошибочных строк, первые ошибки
+        """
+        result = ImportResult()
+        copy = self.db.connection().dialect.name == "postgresql"
+
+        batch: List[Tuple[str, str]] = []
+        try:
+            for line, card, error in parse_rows(stream, file_format):
+                if error is not None:
+                    result.failed += 1
+                    if len(result.errors) < settings.IMPORT_MAX_ERRORS:
+                        result.errors.append(RowError(line=line, error=error))
+                    continue
+                batch.append(card)
+                if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                    self._write_batch(module_id, batch, copy)
+                    result.imported += len(batch)
+                    batch = []
+            if batch:
+                self._write_batch(module_id, batch, copy)
+                result.imported += len(batch)
+
+            if result.imported:
+                result.repetitions_created = RepetitionService(self.db).sync_repetitions(module_id)
+            self.db.commit()
+            invalidate_module(module_id)
+        except UnicodeDecodeError:
+            self.db.rollback()
+            raise ValueError("File is not valid UTF-8")
+        except Exception:
+            self.db.rollback()
+            raise
+
+        logger.info(f"📥 Imported {result.imported} cards into module {module_id} ({result.failed} rows failed)")
+        return result
+
+    def _write_batch(self, module_id: int, batch: List[Tuple[str, str]], copy: bool) -> None:
+        if copy:
+            self._copy_batch(module_id, batch)
+            return
+        self.db.execute(
+            insert(Card),
+            [{"module_id": module_id, "question": question, "answer": answer} for question, answer in batch]
+        )
+
+    def _copy_batch(self, module_id: int, batch: List[Tuple[str, str]]) -> None:
+        """COPY FROM STDIN через соединение сессии - в той же транзакции"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows((module_id, question, answer) for question, answer in batch)
+        buffer.seek(0)
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert("COPY cards (module_id, question, answer) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
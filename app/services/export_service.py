@@ -0,0 +1,258 @@
+import gzip
+import json
+import logging
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..core.config import settings
+from ..models.card import Card
+from ..models.interval_repetition import IntervalRepetition, RepetitionState
+from ..models.module import Module
+from ..models.module_access import AccessLevel, ModuleAccess
+from .module_cache import invalidate_module
+
+logger = logging.getLogger(__name__)
+
+EXPORT_VERSION = 1
+# Сколько байт NDJSON набирать перед отправкой очередного куска ответа
+CHUNK_BYTES = 64 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    # SQLite возвращает даты без часового пояса; храним их в UTC
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+
+
+def _datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def export_records(db: Session, user_id: int) -> Iterator[Dict[str, Any]]:
+    """
+    Записи экспорта пользователя: модули, их доступы, карточки и его повторения по ним.
+
+    Каждая таблица читается одним запросом через серверный курсор (yield_per),
+    поэтому в памяти держится одна пачка строк, а не все данные.
+    """
+    batch = settings.EXPORT_BATCH_SIZE
+    yield {"type": "export", "version": EXPORT_VERSION, "exported_at": _timestamp(datetime.now(timezone.utc))}
+
+    modules = db.query(Module.id, Module.name, Module.description, Module.created_at).filter(
+        Module.owner_id == user_id
+    ).order_by(Module.id).yield_per(batch)
+    for module in modules:
+        yield {
+            "type": "module", "id": module.id, "name": module.name,
+            "description": module.description, "created_at": _timestamp(module.created_at)
+        }
+
+    accesses = db.query(ModuleAccess.module_id, ModuleAccess.view_access, ModuleAccess.edit_access).join(
+        Module, ModuleAccess.module_id == Module.id
+    ).filter(Module.owner_id == user_id).order_by(ModuleAccess.module_id).yield_per(batch)
+    for access in accesses:
+        yield {
+            "type": "module_access", "module_id": access.module_id,
+            "view_access": access.view_access, "edit_access": access.edit_access
+        }
+
+    cards = db.query(Card.id, Card.module_id, Card.question, Card.answer, Card.created_at).join(
+        Module, Card.module_id == Module.id
+    ).filter(Module.owner_id == user_id).order_by(Card.module_id, Card.id).yield_per(batch)
+    for card in cards:
+        yield {
+            "type": "card", "id": card.id, "module_id": card.module_id, "question": card.question,
+            "answer": card.answer, "created_at": _timestamp(card.created_at)
+        }
+
+    repetitions = db.query(
+        IntervalRepetition.module_id, IntervalRepetition.card_id, IntervalRepetition.state,
+        IntervalRepetition.step, IntervalRepetition.stability, IntervalRepetition.difficulty,
+        IntervalRepetition.due, IntervalRepetition.last_review
+    ).join(
+        Module, IntervalRepetition.module_id == Module.id
+    ).filter(
+        IntervalRepetition.user_id == user_id,
+        Module.owner_id == user_id
+    ).order_by(IntervalRepetition.module_id, IntervalRepetition.card_id).yield_per(batch)
+    for repetition in repetitions:
+        yield {
+            "type": "interval_repetition", "module_id": repetition.module_id, "card_id": repetition.card_id,
+            "state": repetition.state.value, "step": repetition.step, "stability": repetition.stability,
+            "difficulty": repetition.difficulty, "due": _timestamp(repetition.due),
+            "last_review": _timestamp(repetition.last_review)
+        }
+
+
+def export_stream(session_factory: sessionmaker, user_id: int, compress: bool = False) -> Iterator[bytes]:
+    """
+    NDJSON (или gzip NDJSON) кусками по CHUNK_BYTES для StreamingResponse.
+
+    Сессия открывается здесь, а не берётся из запроса: генератор живёт дольше обработчика.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    db = session_factory()
+    try:
+        lines: List[bytes] = []
+        size = 0
+        for record in export_records(db, user_id):
+            line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+            lines.append(line)
+            size += len(line)
+            if size >= CHUNK_BYTES:
+                chunk = b"".join(lines)
+                lines, size = [], 0
+                yield compressor.compress(chunk) if compressor else chunk
+        chunk = b"".join(lines)
+        if compressor:
+            yield compressor.compress(chunk) + compressor.flush()
+        elif chunk:
+            yield chunk
+    finally:
+        db.close()
+
+
+@dataclass
+class RestoreResult:
+    modules: int = 0
+    cards: int = 0
+    repetitions: int = 0
+
+
+class ExportService:
+    def __init__(self, db: Session):
+        """
+        Восстановление данных пользователя из NDJSON-экспорта.
+
+        Args:
+            db: Сессия SQLAlchemy
+        """
+        self.db = db
+
+    def restore(self, user_id: int, stream: IO[bytes]) -> RestoreResult:
+        """
+        Загрузить экспорт как новые модули пользователя одной транзакцией.
+
+        Модули и карточки получают новые id; повторения переносятся на новые карточки.
+        gzip распознаётся по сигнатуре. Ошибка в любой строке отменяет всё восстановление.
+
+        Args:
+            user_id: ID пользователя, которому принадлежат восстановленные модули
+            stream: Файл экспорта (байты)
+
+        Returns:
+            Число восстановленных модулей, карточек и повторений
+        """
+        if stream.read(2) == GZIP_MAGIC:
+            stream.seek(0)
+            stream = gzip.GzipFile(fileobj=stream, mode="rb")
+        else:
+            stream.seek(0)
+
+        result = RestoreResult()
+        module_ids: Dict[int, int] = {}
+        card_ids: Dict[int, int] = {}
+        cards: List[Dict[str, Any]] = []
+        repetitions: List[Dict[str, Any]] = []
+        try:
+            for line_number, raw in enumerate(stream, start=1):
+                if not raw.strip():
+                    continue
+                try:
+                    record = json.loads(raw)
+                    kind = record["type"]
+                    if kind == "export":
+                        if record.get("version") != EXPORT_VERSION:
+                            raise ValueError(f"unsupported export version {record.get('version')}")
+                    elif kind == "module":
+                        module = Module(name=record["name"], description=record.get("description"), owner_id=user_id)
+                        self.db.add(module)
+                        self.db.flush()
+                        module_ids[record["id"]] = module.id
+                        result.modules += 1
+                    elif kind == "module_access":
+                        self.db.add(ModuleAccess(
+                            module_id=module_ids[record["module_id"]],
+                            owner_id=user_id,
+                            view_access=AccessLevel(record["view_access"]).value,
+                            edit_access=AccessLevel(record["edit_access"]).value
+                        ))
+                    elif kind == "card":
+                        cards.append({
+                            "old_id": record["id"],
+                            "module_id": module_ids[record["module_id"]],
+                            "question": record["question"],
+                            "answer": record["answer"]
+                        })
+                        if len(cards) >= settings.IMPORT_BATCH_SIZE:
+                            result.cards += self._flush_cards(cards, card_ids)
+                    elif kind == "interval_repetition":
+                        if cards:
+                            result.cards += self._flush_cards(cards, card_ids)
+                        repetitions.append({
+                            "user_id": user_id,
+                            "module_id": module_ids[record["module_id"]],
+                            "card_id": card_ids[record["card_id"]],
+                            "state": RepetitionState(record["state"]),
+                            "step": record["step"],
+                            "stability": record["stability"],
+                            "difficulty": record["difficulty"],
+                            "due": _datetime(record["due"]),
+                            "last_review": _datetime(record.get("last_review"))
+                        })
+                        if len(repetitions) >= settings.IMPORT_BATCH_SIZE:
+                            result.repetitions += self._flush_repetitions(repetitions)
+                    else:
+                        raise ValueError(f"unknown record type '{kind}'")
+                except KeyError as e:
+                    raise ValueError(f"Line {line_number}: missing or unknown reference {e}")
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"Line {line_number}: {e}")
+
+            result.cards += self._flush_cards(cards, card_ids)
+            result.repetitions += self._flush_repetitions(repetitions)
+            self.db.commit()
+            # Открытые восстановленные модули сразу видны в каталоге
+            for module_id in module_ids.values():
+                invalidate_module(module_id, catalog=True)
+        except (OSError, EOFError):
+            # Битый gzip
+            self.db.rollback()
+            raise ValueError("Export file is corrupted")
+        except Exception:
+            self.db.rollback()
+            raise
+
+        logger.info(
+            f"📦 Restored {result.modules} modules, {result.cards} cards, "
+            f"{result.repetitions} repetitions for user {user_id}"
+        )
+        return result
+
+    def _flush_cards(self, cards: List[Dict[str, Any]], card_ids: Dict[int, int]) -> int:
+        if not cards:
+            return 0
+        new_ids = self.db.execute(
+            insert(Card).returning(Card.id, sort_by_parameter_order=True),
+            [{key: value for key, value in card.items() if key != "old_id"} for card in cards]
+        ).scalars().all()
+        for card, new_id in zip(cards, new_ids):
+            card_ids[card["old_id"]] = new_id
+        count = len(cards)
+        cards.clear()
+        return count
+
+    def _flush_repetitions(self, repetitions: List[Dict[str, Any]]) -> int:
+        if not repetitions:
+            return 0
+        self.db.execute(insert(IntervalRepetition), repetitions)
+        count = len(repetitions)
+        repetitions.clear()
+        return count
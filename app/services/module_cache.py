@@ -0,0 +1,171 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..core.cache import TwoTierCache, cache as default_cache
+from ..core.config import settings
+from ..models.card import Card
+from ..models.module import Module
+from ..models.module_access import AccessLevel, ModuleAccess
+
+CATALOG = "catalog"
+
+
+class CachedCard(NamedTuple):
+    """Карточка страницы из кэша - с теми же полями, что нужны для ответа"""
+    id: int
+    question: str
+    answer: str
+
+
+def module_namespace(module_id: int) -> str:
+    return f"module:{module_id}"
+
+
+def version_part(version: Sequence) -> str:
+    """Часть ключа из версии содержимого модуля (ModuleService.content_version)"""
+    return "v" + ".".join(str(part) for part in version)
+
+
+def invalidate_module(module_id: int, catalog: bool = False, cache: Optional[TwoTierCache] = None) -> None:
+    """
+    Сбросить кэш модуля: метаданные, страницы карточек, окна ответов.
+
+    Вызывать после commit любого изменения карточек, модуля или его доступов;
+    catalog=True - если изменение видно в каталоге (название, описание, доступ, удаление).
+    """
+    namespaces = [module_namespace(module_id)]
+    if catalog:
+        namespaces.append(CATALOG)
+    (cache or default_cache).invalidate(*namespaces)
+
+
+class ModuleCache:
+    def __init__(self, db: Session, cache: Optional[TwoTierCache] = None):
+        """
+        Кэшированное чтение модулей: одинаковые для всех пользователей части ответов.
+
+        Данные пользователя (повторения) сюда не попадают - они приходят из
+        ModuleService.versions тем же запросом, что строит ETag.
+
+        Ключи данных модуля содержат его версию содержимого - ту же, что входит в ETag.
+        Изменение, после которого забыли вызвать invalidate_module, даёт новую версию
+        и промах, а не старые данные под новым ETag; поколение остаётся для быстрого
+        вытеснения старых записей.
+
+        Args:
+            db: Сессия SQLAlchemy
+            cache: Кэш; по умолчанию - общий кэш приложения
+        """
+        self.db = db
+        self.cache = cache or default_cache
+
+    def summaries(self, versions: Dict[int, Sequence]) -> Dict[int, Dict[str, Any]]:
+        """
+        Метаданные модулей: поля модуля, его доступы и число карточек.
+
+        Один модуль загружается с защитой от одновременных промахов (популярный модуль),
+        несколько - одним набором запросов на все промахи.
+
+        Args:
+            versions: ID модуля -> версия содержимого (ModuleVersion.content)
+
+        Returns:
+            ID модуля -> метаданные; модулей, которых нет, в словаре нет
+        """
+        keys = {
+            module_id: self.cache.key(module_namespace(module_id), version_part(version), "summary")
+            for module_id, version in versions.items()
+        }
+        if len(keys) == 1:
+            (module_id, key), = keys.items()
+            summary = self.cache.get_or_load(key, lambda: self._load_summaries([module_id]).get(module_id), "module")
+            return {module_id: summary} if summary is not None else {}
+
+        found = self.cache.get_many(keys.values(), "module")
+        result = {module_id: found[key] for module_id, key in keys.items() if key in found}
+        missing = [module_id for module_id in keys if module_id not in result]
+        if missing:
+            loaded = self._load_summaries(missing)
+            self.cache.set_many({keys[module_id]: summary for module_id, summary in loaded.items()})
+            result.update(loaded)
+        return {module_id: result[module_id] for module_id in keys if result.get(module_id) is not None}
+
+    def card_page(
+        self, module_id: int, version: Sequence, skip: int, take: int, after_id: Optional[int]
+    ) -> Dict[str, Any]:
+        """Страница карточек модуля по id и общее число карточек: {"total_count", "cards": [[id, q, a], ...]}"""
+        position = f"after{after_id}" if after_id is not None else f"skip{skip}"
+        key = self.cache.key(module_namespace(module_id), version_part(version), "cards", position, take)
+        return self.cache.get_or_load(key, lambda: self._load_card_page(module_id, skip, take, after_id), "cards")
+
+    def answer_window(self, module_id: int, version: Sequence, offset: int, size: int) -> List[str]:
+        """Ответы карточек модуля по порядку id, начиная с offset - пул неверных вариантов"""
+        key = self.cache.key(module_namespace(module_id), version_part(version), "answers", offset, size)
+        return self.cache.get_or_load(key, lambda: self.db.execute(
+            select(Card.answer).where(Card.module_id == module_id).order_by(Card.id).offset(offset).limit(size)
+        ).scalars().all(), "answers")
+
+    def catalog(self) -> Optional[List[List[int]]]:
+        """
+        Открытые модули каталога без поиска в порядке выдачи: [[id, owner_id], ...].
+
+        Каталог кэшируется целиком, чтобы одна запись обслуживала всех пользователей:
+        свои модули пользователя и страница отбираются уже из списка. Для каталога
+        больше CACHE_CATALOG_MAX_ITEMS возвращается None - страницу нужно читать из БД.
+        Результаты поиска не кэшируются: строки поиска почти не повторяются.
+        """
+        return self.cache.get_or_load(self.cache.key(CATALOG, "modules"), self._load_catalog, "catalog")
+
+    def _load_summaries(self, module_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        modules = self.db.execute(select(
+            Module.id, Module.name, Module.description, Module.owner_id, Module.created_at, Module.updated_at
+        ).where(Module.id.in_(module_ids))).all()
+        if not modules:
+            return {}
+        accesses = self.db.execute(select(
+            ModuleAccess.module_id, ModuleAccess.owner_id, ModuleAccess.view_access, ModuleAccess.edit_access
+        ).where(ModuleAccess.module_id.in_(module_ids)).order_by(ModuleAccess.id)).all()
+        counts = dict(self.db.execute(
+            select(Card.module_id, func.count(Card.id)).where(Card.module_id.in_(module_ids)).group_by(Card.module_id)
+        ).all())
+
+        # Значения - только JSON: даты строками ISO, схема ответа разбирает их обратно
+        summaries = {
+            module.id: {
+                "id": module.id,
+                "name": module.name,
+                "description": module.description,
+                "owner_id": module.owner_id,
+                "created_at": module.created_at.isoformat() if module.created_at else None,
+                "updated_at": module.updated_at.isoformat() if module.updated_at else None,
+                "accesses": [],
+                "total_cards": counts.get(module.id, 0),
+            }
+            for module in modules
+        }
+        for access in accesses:
+            summaries[access.module_id]["accesses"].append({
+                "owner_id": access.owner_id, "view_access": access.view_access, "edit_access": access.edit_access
+            })
+        return summaries
+
+    def _load_card_page(self, module_id: int, skip: int, take: int, after_id: Optional[int]) -> Dict[str, Any]:
+        # Индекс (module_id, id): и подсчёт, и страница читаются только из индекса
+        total_count = self.db.execute(select(func.count(Card.id)).where(Card.module_id == module_id)).scalar()
+        statement = select(Card.id, Card.question, Card.answer).where(Card.module_id == module_id).order_by(Card.id)
+        if after_id is not None:
+            statement = statement.where(Card.id > after_id)
+        else:
+            statement = statement.offset(skip)
+        cards = self.db.execute(statement.limit(take)).all()
+        return {"total_count": total_count, "cards": [[card.id, card.question, card.answer] for card in cards]}
+
+    def _load_catalog(self) -> Optional[List[List[int]]]:
+        rows = self.db.query(Module.id, Module.owner_id).join(ModuleAccess).filter(
+            ModuleAccess.view_access == AccessLevel.ALL_USERS.value
+        ).order_by(Module.id).limit(settings.CACHE_CATALOG_MAX_ITEMS + 1).all()
+        if len(rows) > settings.CACHE_CATALOG_MAX_ITEMS:
+            return None
+        return [[row.id, row.owner_id] for row in rows]
@@ -0,0 +1,216 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, exists, func, insert, literal, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..core.config import settings
+from ..db.changefeed import sync_tombstones
+from ..models.card import Card
+from ..models.interval_repetition import IntervalRepetition
+from ..models.module import Module
+from ..models.module_access import AccessLevel, ModuleAccess
+from .module_cache import invalidate_module
+from .repetition_service import RepetitionService
+
+logger = logging.getLogger(__name__)
+
+
+class ModuleVersion(NamedTuple):
+    """Версия модуля для ETag и части ответа, зависящие от пользователя"""
+    module: Optional[int]
+    accesses: Optional[int]
+    cards: Optional[int]
+    tombstones: Optional[int]
+    repetitions_enabled: bool
+    cards_to_repeat: int
+
+    @property
+    def content(self) -> Tuple:
+        """Части версии, общие для всех пользователей - то же, что content_version"""
+        return tuple(self[:4])
+
+
+class ModuleService:
+    def __init__(self, db: Session):
+        """
+        Операции над модулями целиком.
+
+        Args:
+            db: Сессия SQLAlchemy
+        """
+        self.db = db
+
+    def clone_module(
+        self,
+        module_id: int,
+        user_id: int,
+        name: Optional[str] = None,
+        view_access: Optional[AccessLevel] = None,
+        edit_access: Optional[AccessLevel] = None,
+        enable_repetitions: bool = False
+    ) -> Optional[Module]:
+        """
+        Скопировать модуль, его настройки доступа и карточки в новый модуль пользователя.
+
+        Карточки копируются одним INSERT ... SELECT внутри БД - в Python они не загружаются.
+        Всё, включая повторения для копии, фиксируется одной транзакцией.
+
+        Args:
+            module_id: ID исходного модуля (свой или открытый всем)
+            user_id: ID владельца копии
+            name: Название копии; по умолчанию - как у исходного
+            view_access: Доступ на просмотр; по умолчанию - как у исходного
+            edit_access: Доступ на редактирование; по умолчанию - как у исходного
+            enable_repetitions: Сразу включить интервальные повторения для копии
+
+        Returns:
+            Новый модуль или None, если исходный не найден или недоступен
+        """
+        source = self.db.query(Module).filter(
+            Module.id == module_id,
+            (Module.owner_id == user_id) | Module.access.any(
+                ModuleAccess.view_access == AccessLevel.ALL_USERS.value
+            )
+        ).first()
+        if source is None:
+            return None
+
+        source_access = self.db.query(ModuleAccess).filter(
+            ModuleAccess.module_id == module_id
+        ).order_by(ModuleAccess.id).first()
+        if source_access is not None:
+            view_access = view_access or AccessLevel(source_access.view_access)
+            edit_access = edit_access or AccessLevel(source_access.edit_access)
+
+        clone = Module(name=name or source.name, description=source.description, owner_id=user_id)
+        self.db.add(clone)
+        self.db.flush()
+
+        self.db.add(ModuleAccess(
+            module_id=clone.id,
+            owner_id=user_id,
+            view_access=(view_access or AccessLevel.ONLY_ME).value,
+            edit_access=(edit_access or AccessLevel.ONLY_ME).value
+        ))
+
+        copied = self.db.execute(insert(Card).from_select(
+            ["module_id", "question", "answer"],
+            select(literal(clone.id), Card.question, Card.answer).where(Card.module_id == module_id).order_by(Card.id)
+        )).rowcount
+
+        repetitions = 0
+        if enable_repetitions:
+            repetitions = RepetitionService(self.db).sync_repetitions(clone.id, user_id=user_id)
+
+        self.db.commit()
+        invalidate_module(clone.id, catalog=True)
+        self.db.refresh(clone)
+
+        logger.info(f"📑 Module {module_id} cloned to {clone.id}: {copied} cards, {repetitions} repetitions")
+        return clone
+
+    def versions(self, module_ids: List[int], user_id: int) -> Dict[int, ModuleVersion]:
+        """
+        Версии модулей для ETag: одним запросом, без загрузки карточек и повторений.
+
+        Версия модуля - наибольшая версия его строки, доступов, карточек и надгробий
+        удалённых карточек (app/db/changefeed.py); каждая часть - одно чтение индекса
+        (..., version). К ней добавлены части ответа, зависящие от пользователя:
+        включены ли повторения и сколько карточек пора повторять сейчас.
+
+        Args:
+            module_ids: ID модулей
+            user_id: ID пользователя, для которого строится ответ
+
+        Returns:
+            ID модуля -> версия; модулей, которых нет, в словаре нет
+        """
+        if not module_ids:
+            return {}
+        now = datetime.now(timezone.utc)
+        rows = self.db.execute(select(
+            Module.id,
+            *self._content_version(),
+            exists().where(
+                IntervalRepetition.user_id == user_id, IntervalRepetition.module_id == Module.id
+            ),
+            select(func.count()).select_from(IntervalRepetition).where(
+                IntervalRepetition.user_id == user_id,
+                IntervalRepetition.module_id == Module.id,
+                IntervalRepetition.due < now
+            ).scalar_subquery()
+        ).where(Module.id.in_(module_ids))).all()
+        return {row[0]: ModuleVersion(*row[1:5], bool(row[5]), row[6]) for row in rows}
+
+    def content_version(self, module_id: int) -> Optional[Tuple]:
+        """Версия содержимого модуля без частей пользователя; None, если модуля нет"""
+        row = self.db.execute(select(*self._content_version()).where(Module.id == module_id)).first()
+        return tuple(row) if row else None
+
+    @staticmethod
+    def _content_version() -> Tuple:
+        """Версии строки модуля, его доступов, карточек и надгробий карточек - общие для всех пользователей"""
+        return (
+            Module.version,
+            select(func.max(ModuleAccess.version)).where(ModuleAccess.module_id == Module.id).scalar_subquery(),
+            select(func.max(Card.version)).where(Card.module_id == Module.id).scalar_subquery(),
+            select(func.max(sync_tombstones.c.version)).where(
+                sync_tombstones.c.module_id == Module.id
+            ).scalar_subquery(),
+        )
+
+    def card_count(self, module_id: int) -> int:
+        return self.db.query(func.count(Card.id)).filter(Card.module_id == module_id).scalar()
+
+    def delete_module(self, module_id: int) -> None:
+        """
+        Удалить модуль одним DELETE: карточки, доступы и повторения удаляет ON DELETE CASCADE в БД.
+        """
+        self.db.execute(delete(Module).where(Module.id == module_id))
+        self.db.commit()
+        invalidate_module(module_id, catalog=True)
+        logger.info(f"🗑️ Module {module_id} deleted")
+
+
+def delete_module_in_batches(session_factory: sessionmaker, module_id: int, batch_size: Optional[int] = None) -> None:
+    """
+    Фоновое удаление большого модуля короткими транзакциями.
+
+    Сначала пачками удаляются повторения, затем карточки, затем сам модуль: ни одна
+    транзакция не держит блокировки на сотни тысяч строк. Надгробия карточек и повторений,
+    записанные по пути, после надгробия модуля не нужны и тоже удаляются пачками.
+    Своя сессия, потому что задача выполняется после ответа.
+    """
+    batch_size = batch_size or settings.MODULE_DELETE_BATCH_SIZE
+    db = session_factory()
+    try:
+        for model in (IntervalRepetition, Card):
+            while True:
+                ids = select(model.id).where(model.module_id == module_id).limit(batch_size).scalar_subquery()
+                deleted = db.execute(
+                    delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+                ).rowcount
+                db.commit()
+                if model is Card:
+                    # Пока идёт удаление, модуль ещё читается: страницы не должны показывать удалённые карточки
+                    invalidate_module(module_id)
+                if deleted < batch_size:
+                    break
+        ModuleService(db).delete_module(module_id)
+        while True:
+            versions = select(sync_tombstones.c.version).where(
+                sync_tombstones.c.module_id == module_id,
+                sync_tombstones.c.entity != "module"
+            ).limit(batch_size).scalar_subquery()
+            deleted = db.execute(delete(sync_tombstones).where(sync_tombstones.c.version.in_(versions))).rowcount
+            db.commit()
+            if deleted < batch_size:
+                break
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Background deletion of module {module_id} failed: {e}")
+        raise
+    finally:
+        db.close()
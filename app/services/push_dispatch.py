@@ -0,0 +1,73 @@
+# app/services/push_dispatch.py
+import asyncio
+import hashlib
+import time
+from typing import Callable, Iterable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def dispatch_offset(user_id: int, window_seconds: float) -> float:
+    """
+    Детерминированная задержка отправки для пользователя внутри окна рассылки.
+
+    Один и тот же пользователь всегда получает пуш в одно и то же место окна,
+    а разные пользователи равномерно распределены по всему окну.
+    """
+    if window_seconds <= 0:
+        return 0.0
+    digest = hashlib.blake2b(str(user_id).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64 * window_seconds
+
+
+def plan_dispatch(
+    items: Iterable[T],
+    user_id_of: Callable[[T], int],
+    window_seconds: float
+) -> List[Tuple[float, T]]:
+    """Расписание рассылки: пары (смещение от начала в секундах, элемент), по возрастанию смещения"""
+    planned = [(dispatch_offset(user_id_of(item), window_seconds), item) for item in items]
+    planned.sort(key=lambda pair: pair[0])
+    return planned
+
+
+def dispatch_duration(rate: float, total: int) -> float:
+    """
+    Минимальная длительность отправки total напоминаний при лимите rate в секунду.
+
+    Лимит не поднимается, даже если рассылка не укладывается в окно: запуск просто
+    растягивается дольше окна, а наложившиеся тики планировщика пропускаются.
+    """
+    if rate <= 0:
+        return 0.0
+    return total / rate
+
+
+class TokenBucket:
+    """Глобальный лимит отправок: rate токенов в секунду, не больше capacity подряд"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def reserve(self) -> float:
+        """Забрать токен; возвращает, сколько секунд нужно подождать до его появления"""
+        if self.rate <= 0:
+            return 0.0
+
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
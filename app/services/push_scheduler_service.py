@@ -1,7 +1,5 @@
 # app/services/push_scheduler.py
 import logging
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 from app.core.config import settings
 
@@ -9,7 +7,8 @@ logger = logging.getLogger(__name__)
 
 class PushScheduler:
     def __init__(self):
-        self.scheduler = AsyncIOScheduler()
+        # APScheduler создаётся и импортируется только при запуске
+        self.scheduler = None
         self.is_running = False
         
     async def send_scheduled_notifications(self):
@@ -24,9 +23,25 @@ class PushScheduler:
             
         except Exception as e:
             logger.error(f"❌ Error in scheduled task: {e}", exc_info=True)
+
+    def prune_sync_tombstones(self):
+        """Раз в сутки удаляем надгробия ленты изменений старше срока хранения"""
+        from app.db.database import SessionLocal
+        from app.services.sync_service import prune_tombstones
+
+        try:
+            prune_tombstones(SessionLocal)
+        except Exception as e:
+            logger.error(f"❌ Error pruning sync tombstones: {e}", exc_info=True)
     
     def start(self):
         """Запуск планировщика"""
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        from apscheduler.triggers.interval import IntervalTrigger
+
+        if self.scheduler is None:
+            self.scheduler = AsyncIOScheduler()
+
         if self.scheduler.running:
             logger.warning("Scheduler already running")
             return
@@ -37,6 +52,18 @@ class PushScheduler:
             trigger=IntervalTrigger(minutes=settings.PUSH_INTERVAL_MINUTES),
             id="study_reminders",
             name="Учебные напоминания",
+            replace_existing=True,
+            # Рассылка может идти дольше интервала (лимит отправок не поднимается):
+            # тик, пришедший во время рассылки, пропускается, пропущенные тики сливаются в один
+            max_instances=1,
+            coalesce=True
+        )
+        # Синхронная задача: APScheduler выполняет её в пуле потоков, не блокируя цикл событий
+        self.scheduler.add_job(
+            self.prune_sync_tombstones,
+            trigger=IntervalTrigger(hours=24),
+            id="sync_tombstones",
+            name="Очистка надгробий синхронизации",
             replace_existing=True
         )
         
@@ -47,7 +74,7 @@ class PushScheduler:
     
     def stop(self):
         """Остановка планировщика"""
-        if self.scheduler.running:
+        if self.scheduler is not None and self.scheduler.running:
             self.scheduler.shutdown(wait=False)
             self.is_running = False
             logger.info("🛑 Push scheduler stopped")
@@ -1,43 +1,68 @@
 # app/services/push_service.py
 import asyncio
-import json
 import logging
+import threading
+import time
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from pathlib import Path
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core.metrics import push_sends, reminder_run_duration
 from app.db.database import SessionLocal
-from firebase_admin import credentials, initialize_app, messaging
-from firebase_admin.exceptions import FirebaseError
+from app.services.push_dispatch import TokenBucket, dispatch_duration, plan_dispatch
+from app.services.push_transport import PushTransport, PushTokenUnregistered, PushSendError, create_transport
 
 logger = logging.getLogger(__name__)
 
+# Фиксированный набор значений метки outcome в push_sends_total
+SEND_OUTCOMES = {
+    None: "sent",
+    "Push service not initialized": "not_initialized",
+    "Empty FCM token": "empty_token",
+    "token_not_registered": "unregistered",
+    "firebase_error": "error",
+    "send_failed": "error",
+}
+
 
 class PushNotificationService:
-    def __init__(self):
-        self.is_initialized = False
-        self._initialize_fcm()
-    
-    def _initialize_fcm(self):
-        """Инициализация Firebase Admin SDK"""
-        if hasattr(settings, 'FCM_SERVICE_ACCOUNT_FILE') and settings.FCM_SERVICE_ACCOUNT_FILE:
-            file_path = settings.FCM_SERVICE_ACCOUNT_FILE
-            # Пропускаем дефолтное значение
-            if file_path == 'path-to-file':
-                logger.warning("⚠️ FCM_SERVICE_ACCOUNT_FILE not configured, push notifications disabled")
-                return
-            try:
-                with open(file_path, 'r') as file:
-                    cred_dict = json.load(file)
-                    cred = credentials.Certificate(cred_dict)
-                    initialize_app(cred)
-                    self.is_initialized = True
-                    logger.info("✅ FCM initialized with credentials from env variable")
-                    return
-            except FileNotFoundError:
-                logger.error(f"❌ FCM credentials file not found: {file_path}")
-            except json.JSONDecodeError as e:
-                logger.error(f"❌ Invalid JSON in FCM credentials: {e}")
+    def __init__(
+        self,
+        transport: Optional[PushTransport] = None,
+        session_factory: sessionmaker = SessionLocal
+    ):
+        """
+        Транспорт инициализируется при первой отправке, а не при импорте модуля.
+
+        Args:
+            transport: Способ доставки пушей (по умолчанию - из настройки PUSH_TRANSPORT)
+            session_factory: Фабрика сессий БД для рассылки напоминаний
+        """
+        self._transport = transport
+        self._initialized: Optional[bool] = None
+        self._init_lock = threading.Lock()
+        self.session_factory = session_factory
+
+    @property
+    def transport(self) -> PushTransport:
+        if self._transport is None:
+            self._transport = create_transport(settings.PUSH_TRANSPORT)
+        return self._transport
+
+    @property
+    def is_initialized(self) -> bool:
+        if self._initialized is None:
+            # Первое обращение может прийти одновременно из планировщика и из запросов
+            with self._init_lock:
+                if self._initialized is None:
+                    try:
+                        self._initialized = self.transport.initialize()
+                    except Exception as e:
+                        # Например, ValueError от credentials.Certificate на битом ключе:
+                        # запоминаем неудачу, чтобы не падать на каждом обращении
+                        logger.error(f"❌ Failed to initialize push transport: {e}", exc_info=True)
+                        self._initialized = False
+        return self._initialized
     
     def send_push(
         self,
@@ -48,7 +73,7 @@ class PushNotificationService:
         image: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Отправка push-уведомления на одно устройство
+        Отправка push-уведомления на одно устройство (исход учитывается в push_sends_total)
         
         Args:
             fcm_token: Токен устройства
@@ -60,6 +85,18 @@ class PushNotificationService:
         Returns:
             Результат отправки
         """
+        result = self._send_push(fcm_token, title, body, data, image)
+        push_sends.inc(SEND_OUTCOMES.get(result.get("error"), "error"))
+        return result
+
+    def _send_push(
+        self,
+        fcm_token: str,
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]],
+        image: Optional[str]
+    ) -> Dict[str, Any]:
         if not self.is_initialized:
             return {"error": "Push service not initialized"}
         
@@ -67,36 +104,14 @@ class PushNotificationService:
             return {"error": "Empty FCM token"}
         
         try:
-            # Создаем сообщение для Android
-            android_config = messaging.AndroidConfig(
-                priority='high',
-                notification=messaging.AndroidNotification(
-                    sound='default',
-                    click_action='FLUTTER_NOTIFICATION_CLICK',
-                    channel_id='high_importance_channel'
-                )
-            )
-            
-            # Создаем сообщение для APNs (iOS)
-            
-            # Создаем уведомление
-            notification = messaging.Notification(
+            response = self.transport.send(
+                fcm_token=fcm_token,
                 title=title,
                 body=body,
-                image=image
-            )
-            
-            # Создаем сообщение
-            message = messaging.Message(
-                token=fcm_token,
-                notification=notification,
                 data=data or {},
-                android=android_config
+                image=image
             )
             
-            # Отправляем сообщение
-            response = messaging.send(message)
-            
             logger.info(f"✅ Push sent to {fcm_token[:15]}...: {response}")
             return {
                 "success": True,
@@ -104,11 +119,11 @@ class PushNotificationService:
                 "result": {"name": response}
             }
             
-        except messaging.UnregisteredError:
+        except PushTokenUnregistered:
             logger.warning(f"❌ Token not registered: {fcm_token[:15]}...")
             return {"error": "token_not_registered", "message": "Token is not registered"}
             
-        except FirebaseError as e:
+        except PushSendError as e:
             error_msg = str(e)
             logger.error(f"❌ Firebase error sending push to {fcm_token[:15]}...: {error_msg}")
             return {"error": "firebase_error", "message": error_msg}
@@ -118,18 +133,24 @@ class PushNotificationService:
             logger.error(f"❌ Error sending push to {fcm_token[:15]}...: {error_msg}", exc_info=True)
             return {"error": "send_failed", "message": error_msg}
 
-    async def send_study_reminders(self):
-        """Отправка напоминаний о повторении карточек — отдельный пуш для каждого модуля"""
+    async def send_study_reminders(self) -> Dict[str, int]:
+        """
+        Отправка напоминаний о повторении карточек — отдельный пуш для каждого модуля
+
+        Returns:
+            Сводка запуска: сколько напоминаний найдено и сколько отправлено
+        """
+        summary = {"total": 0, "sent": 0}
         if not self.is_initialized:
             logger.warning("Push service not initialized, skipping reminders")
-            return
+            return summary
         
         from app.models.user import User
         from app.models.module import Module
         from app.models.interval_repetition import IntervalRepetition
         from sqlalchemy import func
         
-        db = SessionLocal()
+        db: Session = self.session_factory()
         try:
             current_time = datetime.now()
             
@@ -148,9 +169,33 @@ class PushNotificationService:
                 User.push_id.isnot(None),
                 IntervalRepetition.due <= current_time
             ).group_by(User.id, User.push_id, IntervalRepetition.module_id, Module.name).all()
-            
-            sent_count = 0
-            for row in due_cards_by_module:
+        except Exception as e:
+            logger.error(f"❌ Error loading study reminders: {e}", exc_info=True)
+            return summary
+        finally:
+            # Сессия не должна висеть открытой всё время растянутой рассылки
+            db.close()
+
+        # Окно не длиннее интервала планировщика, иначе запуски начнут наслаиваться
+        window = max(0.0, min(settings.PUSH_DISPATCH_WINDOW_SECONDS, settings.PUSH_INTERVAL_MINUTES * 60))
+        duration = dispatch_duration(settings.PUSH_RATE_LIMIT_PER_SECOND, len(due_cards_by_module))
+        if duration > window:
+            # Лимит не поднимаем: FCM и API защищены настроенным значением, а запуск переживёт окно
+            logger.warning(
+                f"⚠️ {len(due_cards_by_module)} reminders don't fit into {window:.0f}s "
+                f"at {settings.PUSH_RATE_LIMIT_PER_SECOND:g}/s, run will take at least {duration:.0f}s"
+            )
+        bucket = TokenBucket(settings.PUSH_RATE_LIMIT_PER_SECOND, settings.PUSH_RATE_LIMIT_BURST)
+        started = time.monotonic()
+        summary["total"] = len(due_cards_by_module)
+
+        try:
+            for offset, row in plan_dispatch(due_cards_by_module, lambda r: r.user_id, window):
+                delay = started + offset - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await bucket.acquire()
+
                 # Формируем текст
                 if row.due_count == 1:
                     body = f"1 карточка ждёт повторения"
@@ -169,7 +214,9 @@ class PushNotificationService:
                     "click_action": "FLUTTER_NOTIFICATION_CLICK"
                 }
                 
-                result = self.send_push(
+                # send_push блокирующий, поэтому не занимаем event loop на время запроса к FCM
+                result = await asyncio.to_thread(
+                    self.send_push,
                     fcm_token=row.push_id,
                     title=f"📚 {row.module_name}",
                     body=body,
@@ -177,17 +224,28 @@ class PushNotificationService:
                 )
 
                 if not result.get("error"):
-                    sent_count += 1
+                    summary["sent"] += 1
                     logger.info(f"📨 Reminder sent to user {row.user_id} for module {row.module_id} ({row.due_count} cards)")
                 else:
                     logger.warning(f"❌ Failed to send to user {row.user_id}: {result.get('error')}")
 
-            logger.info(f"✅ Study reminders sent: {sent_count}/{len(due_cards_by_module)}")
+            elapsed = time.monotonic() - started
+            logger.info(
+                f"✅ Study reminders sent: {summary['sent']}/{summary['total']} "
+                f"in {elapsed:.1f}s (window {window:.0f}s)"
+            )
+            # Медленный FCM всё ещё может растянуть запуск; следующий тик планировщика тогда пропустится
+            if elapsed > settings.PUSH_INTERVAL_MINUTES * 60:
+                logger.warning(
+                    f"⚠️ Reminder run took {elapsed:.0f}s, longer than the "
+                    f"{settings.PUSH_INTERVAL_MINUTES:g}min scheduler interval"
+                )
             
         except Exception as e:
             logger.error(f"❌ Error sending study reminders: {e}", exc_info=True)
-        finally:
-            db.close()
+
+        reminder_run_duration.observe(time.monotonic() - started)
+        return summary
 
 
 push_service = PushNotificationService()
\ No newline at end of file
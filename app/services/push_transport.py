@@ -0,0 +1,179 @@
+# app/services/push_transport.py
+import json
+import logging
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PushTokenUnregistered(Exception):
+    """Токен устройства больше не зарегистрирован в FCM"""
+
+
+class PushSendError(Exception):
+    """Ошибка на стороне сервиса доставки"""
+
+
+class PushTransport(ABC):
+    """Способ доставки пуша до устройства"""
+
+    name = "base"
+
+    def initialize(self) -> bool:
+        """Подготовка транспорта; False - отправка невозможна"""
+        return True
+
+    @abstractmethod
+    def send(
+        self,
+        fcm_token: str,
+        title: str,
+        body: str,
+        data: Dict[str, Any],
+        image: Optional[str] = None
+    ) -> str:
+        """Отправка одного сообщения; возвращает message_id"""
+
+
+class FirebaseTransport(PushTransport):
+    """Доставка через Firebase Admin SDK"""
+
+    name = "firebase"
+
+    def __init__(self, service_account_file: Optional[str]):
+        self.service_account_file = service_account_file
+
+    def initialize(self) -> bool:
+        """Инициализация Firebase Admin SDK"""
+        file_path = self.service_account_file
+        # Пропускаем дефолтное значение
+        if not file_path or file_path == 'path-to-file':
+            logger.warning("⚠️ FCM_SERVICE_ACCOUNT_FILE not configured, push notifications disabled")
+            return False
+
+        from firebase_admin import credentials, initialize_app
+
+        try:
+            with open(file_path, 'r') as file:
+                cred_dict = json.load(file)
+                cred = credentials.Certificate(cred_dict)
+                initialize_app(cred)
+                logger.info("✅ FCM initialized with credentials from env variable")
+                return True
+        except FileNotFoundError:
+            logger.error(f"❌ FCM credentials file not found: {file_path}")
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ Invalid JSON in FCM credentials: {e}")
+        return False
+
+    def send(
+        self,
+        fcm_token: str,
+        title: str,
+        body: str,
+        data: Dict[str, Any],
+        image: Optional[str] = None
+    ) -> str:
+        from firebase_admin import messaging
+        from firebase_admin.exceptions import FirebaseError
+
+        # Создаем сообщение для Android
+        android_config = messaging.AndroidConfig(
+            priority='high',
+            notification=messaging.AndroidNotification(
+                sound='default',
+                click_action='FLUTTER_NOTIFICATION_CLICK',
+                channel_id='high_importance_channel'
+            )
+        )
+
+        # Создаем уведомление
+        notification = messaging.Notification(
+            title=title,
+            body=body,
+            image=image
+        )
+
+        # Создаем сообщение
+        message = messaging.Message(
+            token=fcm_token,
+            notification=notification,
+            data=data,
+            android=android_config
+        )
+
+        try:
+            return messaging.send(message)
+        except messaging.UnregisteredError as e:
+            raise PushTokenUnregistered(str(e)) from e
+        except FirebaseError as e:
+            raise PushSendError(str(e)) from e
+
+
+class FakeFCMTransport(PushTransport):
+    """
+    Локальная замена FCM для нагрузочных тестов: без сети и без credentials.
+
+    Имитирует задержку ответа, случайные ошибки сервиса и незарегистрированные токены,
+    и считает исходы отправок.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        error_rate: float = 0.0,
+        unregistered_rate: float = 0.0,
+        unregistered_tokens: Iterable[str] = (),
+        seed: Optional[int] = None
+    ):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.unregistered_rate = unregistered_rate
+        self.unregistered_tokens = set(unregistered_tokens)
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send(
+        self,
+        fcm_token: str,
+        title: str,
+        body: str,
+        data: Dict[str, Any],
+        image: Optional[str] = None
+    ) -> str:
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        with self._lock:
+            roll = self._random.random()
+            if fcm_token in self.unregistered_tokens or roll < self.unregistered_rate:
+                self.stats["unregistered"] += 1
+                raise PushTokenUnregistered(f"Requested entity was not found: {fcm_token[:15]}")
+            if roll < self.unregistered_rate + self.error_rate:
+                self.stats["error"] += 1
+                raise PushSendError("Simulated FCM internal error")
+            self.stats["sent"] += 1
+            return f"projects/fake/messages/{self.stats['sent']}"
+
+
+def create_transport(name: str) -> PushTransport:
+    """Транспорт по имени из настроек PUSH_TRANSPORT"""
+    from app.core.config import settings
+
+    if name == FakeFCMTransport.name:
+        return FakeFCMTransport(
+            latency_ms=settings.FAKE_FCM_LATENCY_MS,
+            error_rate=settings.FAKE_FCM_ERROR_RATE,
+            unregistered_rate=settings.FAKE_FCM_UNREGISTERED_RATE
+        )
+    if name == FirebaseTransport.name:
+        return FirebaseTransport(settings.FCM_SERVICE_ACCOUNT_FILE)
+    raise ValueError(f"Unknown push transport: {name}")
@@ -1,15 +1,28 @@
 from datetime import datetime, timezone
-from typing import List, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, asc
+from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Float, Integer, and_, asc, exists, insert, literal, select, true
+from sqlalchemy.dialects import postgresql, sqlite
 from fsrs import Scheduler, Card, Rating, State
 import random
 from ..models.interval_repetition import IntervalRepetition, RepetitionState
 from ..models.card import Card as DBCard
+from ..core.metrics import fsrs_reviews
+from ..core.request_context import timed_phase
+from .answer_variants import get_three_answer, session_seed, variant_random
 from dataclasses import dataclass
 from typing import List
 
 
+# Таблицы соответствия состояний строятся один раз, а не на каждый вызов
+FSRS_TO_REPETITION_STATE = {
+    State.Learning: RepetitionState.Learning,
+    State.Review: RepetitionState.Review,
+    State.Relearning: RepetitionState.Relearning,
+}
+REPETITION_TO_FSRS_STATE = {state: fsrs_state for fsrs_state, state in FSRS_TO_REPETITION_STATE.items()}
+
+
 @dataclass
 class UpdateCardIntervalRepetitionRequest:
     time_of_answer: datetime
@@ -40,45 +53,108 @@ class RepetitionService:
         self.db = db
         self.fsrs = Scheduler()
         
-    def enable_interval_repetitions(self, user_id: int, module_id: int) -> None:
-        existing = self.db.query(IntervalRepetition).filter(
-            and_(
+    def enable_interval_repetitions(self, user_id: int, module_id: int) -> int:
+        """
+        Включить интервальные повторения модуля для пользователя.
+
+        Все карточки получают одинаковое начальное состояние, поэтому записи создаются
+        одним INSERT ... SELECT из cards без загрузки карточек в Python. Повторный вызов
+        (в том числе параллельный двойной тап) лишь досоздаёт недостающие записи.
+
+        Args:
+            user_id: ID пользователя
+            module_id: ID модуля
+
+        Returns:
+            Число созданных записей
+        """
+        created = self.sync_repetitions(module_id, user_id=user_id)
+        self.db.commit()
+        return created
+
+    def is_enabled(self, user_id: int, module_id: int) -> bool:
+        """Включены ли у пользователя интервальные повторения модуля"""
+        return self.db.query(
+            exists().where(
                 IntervalRepetition.user_id == user_id,
                 IntervalRepetition.module_id == module_id
             )
-        ).first()
-        
-        if existing:
-            return
+        ).scalar()
 
-        module_cards = self.db.query(DBCard).filter(
-            DBCard.module_id == module_id,
-        ).all()
-        
-        if not module_cards:
-            return
+    def sync_repetitions(
+        self,
+        module_id: int,
+        user_id: Optional[int] = None,
+        card_ids: Optional[List[int]] = None
+    ) -> int:
+        """
+        Создать недостающие записи повторений для карточек модуля.
 
-        now = datetime.now()
-        repetitions = []
-        for card in module_cards:
-            fsrs_card = Card()
+        Один INSERT ... SELECT с анти-джойном. Без user_id - сразу для всех пользователей,
+        у которых повторения модуля включены (общие модули); с user_id - только для него.
+        Без коммита: вызывающий решает, когда фиксировать транзакцию (например, вместе
+        с созданием или импортом карточек).
+
+        Args:
+            module_id: ID модуля
+            user_id: ID пользователя; None - все пользователи, изучающие модуль
+            card_ids: Проверять только эти карточки (например, только что созданные)
+
+        Returns:
+            Число созданных записей
+        """
+        if user_id is None:
+            enrolled = select(IntervalRepetition.user_id).where(
+                IntervalRepetition.module_id == module_id
+            ).distinct().subquery("enrolled")
+            user_column = enrolled.c.user_id
+        else:
+            enrolled = None
+            user_column = literal(user_id, Integer)
+
+        existing = aliased(IntervalRepetition, name="existing")
+        has_repetition = exists().where(
+            existing.user_id == user_column,
+            existing.module_id == module_id,
+            existing.card_id == DBCard.id
+        )
+        table = IntervalRepetition.__table__
+        missing = select(
+            user_column,
+            DBCard.module_id,
+            DBCard.id,
+            literal(RepetitionState.Learning, table.c.state.type),
+            literal(0, Integer),
+            literal(table.c.stability.default.arg, Float),
+            literal(table.c.difficulty.default.arg, Float),
+            literal(datetime.now(timezone.utc), table.c.due.type)
+        ).select_from(DBCard)
+        if enrolled is not None:
+            missing = missing.join(enrolled, true())
+        missing = missing.where(DBCard.module_id == module_id, ~has_repetition)
+        if card_ids is not None:
+            missing = missing.where(DBCard.id.in_(card_ids))
+
+        statement = self._insert_ignoring_duplicates().from_select(
+            ["user_id", "module_id", "card_id", "state", "step", "stability", "difficulty", "due"],
+            missing
+        )
+        return self.db.execute(statement).rowcount
+
+    def _insert_ignoring_duplicates(self):
+        """
+        INSERT ... ON CONFLICT DO NOTHING по уникальному (user_id, module_id, card_id).
+
+        Анти-джойн не видит строки параллельной незафиксированной транзакции; конфликт
+        на уникальном индексе тогда просто пропускает строку вместо ошибки.
+        """
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(IntervalRepetition).on_conflict_do_nothing()
+        if dialect == "sqlite":
+            return sqlite.insert(IntervalRepetition).on_conflict_do_nothing()
+        return insert(IntervalRepetition)
 
-            repetition = IntervalRepetition(
-                user_id=user_id,
-                module_id=int(module_id),
-                card_id=card.id,
-                state=self._get_repetition_state(fsrs_card.state),
-                step=0,
-                stability=fsrs_card.stability,
-                difficulty=fsrs_card.difficulty,
-                due=now,
-                last_review=None
-            )
-            repetitions.append(repetition)
-        
-        self.db.bulk_save_objects(repetitions)  # ← Массовая вставка)
-        self.db.commit()
-        
     def disable_interval_repetitions(self, user_id: int, module_id: int) -> None:
         """
         Отключить интервальные повторения для модуля пользователя.
@@ -137,6 +213,7 @@ class RepetitionService:
         print('Ok')
         updated_fsrs_card = self.fsrs.review_card(fsrs_card, rating=rating, review_datetime=request.time_of_answer.astimezone(timezone.utc))[0]
         print('ok')
+        fsrs_reviews.inc(rating.name.lower())
         
         # Обновление записи в БД
         repetition.state = self._get_repetition_state(updated_fsrs_card.state)
@@ -162,7 +239,8 @@ class RepetitionService:
         user_id: int,
         module_id: int,
         skip: int = 0,
-        take: int = 10
+        take: int = 10,
+        seed: Optional[str] = None
     ) -> GetInternalRepetitionCardResponse:
         """
         Получить карточки для интервального повторения.
@@ -172,7 +250,7 @@ class RepetitionService:
             module_id: ID модуля
             skip: Число пропускаемых карточек
             take: Число взятых карточек
-            due_only: Только карточки, готовые к повторению
+            seed: seed вариантов ответа (по умолчанию - текущий день)
             
         Returns:
             Ответ с карточками и общим количеством
@@ -197,18 +275,23 @@ class RepetitionService:
         all_cards = [card.card for card in items]
         
         # Конвертируем в ответ - здесь нужно использовать CardSchema
-        card_responses = self._cardsdb_to_cards(all_cards)
+        # Один генератор на страницу: те же карточки с тем же seed получают те же варианты
+        rng = None
+        if all_cards:
+            rng = variant_random(session_seed(seed), user_id, module_id, min(card.id for card in all_cards))
+        card_responses = self._cardsdb_to_cards(all_cards, rng)
         
         return GetInternalRepetitionCardResponse(
             items=card_responses,
             total_count=total_count
         )
 
-    def _cardsdb_to_cards(self, cardsdb: List[DBCard]) -> List[CardResponse]:
+    def _cardsdb_to_cards(self, cardsdb: List[DBCard], rng: Optional[random.Random] = None) -> List[CardResponse]:
         all_answers = [card.answer for card in cardsdb]
         result = []
         for card in sorted(cardsdb, key=lambda x: x.id):
-            ans, id = self._get_three_answer(all_answers, card.answer)
+            with timed_phase("distractors"):
+                ans, id = get_three_answer(all_answers, card.answer, rng)
             result.append(CardResponse(id=str(card.id),
                                     question=card.question,
                                     answer_variant=ans,
@@ -216,39 +299,13 @@ class RepetitionService:
             
         return result
 
-    def _get_three_answer(self, answers: List[str], right_answer: str):
-        i = 0
-        result = []
-        for answer in random.sample(answers, len(answers)):
-            result.append(answer)
-            i += 1
-            if i == 4:
-                break
-            
-        if right_answer in result:
-            return result, result.index(right_answer)
-        
-        result.pop()
-        result.insert(len(result) // 2, answer)
-        return result, (len(result) // 2)
-
     def _get_repetition_state(self, fsrs_state: State) -> RepetitionState:
         """Преобразовать состояние FSRS в RepetitionState."""
-        state_mapping = {
-            State.Learning: RepetitionState.Learning,
-            State.Review: RepetitionState.Review,
-            State.Relearning: RepetitionState.Relearning,
-        }
-        return state_mapping.get(fsrs_state, RepetitionState.Learning)
+        return FSRS_TO_REPETITION_STATE.get(fsrs_state, RepetitionState.Learning)
 
     def _get_fsrs_state(self, repetition_state: RepetitionState) -> State:
         """Преобразовать RepetitionState в состояние FSRS."""
-        state_mapping = {
-            RepetitionState.Learning: State.Learning,
-            RepetitionState.Review: State.Review,
-            RepetitionState.Relearning: State.Relearning,
-        }
-        return state_mapping.get(repetition_state)
+        return REPETITION_TO_FSRS_STATE.get(repetition_state)
     
     def _serialize_fsrs_card(self, fsrs_card: Card) -> Dict[str, Any]:
         return {
@@ -261,7 +318,7 @@ class RepetitionService:
 
     def _deserialize_fsrs_card(self, data: IntervalRepetition) -> Card:
         """Десериализовать FSRS карточку из JSON."""
-        fsrs_card = Card()
+        fsrs_card = Card(card_id=data.card_id)
         
         if data.due:
             fsrs_card.due = data.due
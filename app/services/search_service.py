@@ -0,0 +1,226 @@
+import base64
+import html
+import json
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, String, and_, cast, exists, func, literal, literal_column, or_, text
+from sqlalchemy.orm import Query, Session
+
+from ..db.fulltext import PG_CONFIG, fts_table, fulltext_available, search_vector
+from ..models.card import Card
+from ..models.module import Module
+from ..models.module_access import AccessLevel, ModuleAccess
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+# БД выделяет совпадения символами из области частного использования Unicode: текст карточки
+# экранируется уже после выделения, и только эти метки превращаются в <mark>...</mark>
+_MATCH_START = "\ue000"
+_MATCH_STOP = "\ue001"
+SNIPPET_WORDS = 16
+PG_HEADLINE_OPTIONS = (
+    f"StartSel={_MATCH_START}, StopSel={_MATCH_STOP}, "
+    f"MaxWords={SNIPPET_WORDS}, MinWords=4, MaxFragments=1, FragmentDelimiter=\" … \""
+)
+
+
+def search_terms(search_string: str) -> List[str]:
+    """Слова запроса без операторов и знаков препинания"""
+    return _TERM.findall(search_string.lower())
+
+
+def pg_prefix_query(terms: List[str]) -> str:
+    """to_tsquery с префиксным совпадением каждого слова: 'pyth & bas' -> 'pyth:* & bas:*'"""
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def fts5_prefix_query(terms: List[str]) -> str:
+    """MATCH-выражение FTS5 с префиксным совпадением каждого слова"""
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+
+def highlight_html(snippet: str) -> str:
+    """
+    Фрагмент с выделением из БД -> безопасный HTML.
+
+    Текст карточки пишут пользователи, поэтому он экранируется целиком; разметкой
+    остаются только <mark> на местах меток выделения.
+    """
+    return html.escape(snippet or "").replace(_MATCH_START, HIGHLIGHT_START).replace(_MATCH_STOP, HIGHLIGHT_STOP)
+
+
+def encode_cursor(sort_value: float, card_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, card_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Позиция keyset-пагинации (значение сортировки, id); ValueError, если курсор испорчен"""
+    try:
+        sort_value, card_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(sort_value), int(card_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class SearchService:
+    def __init__(self, db: Session):
+        """
+        Поиск по модулям и карточкам с ранжированием.
+
+        Args:
+            db: Сессия SQLAlchemy
+        """
+        self.db = db
+
+    def search_modules(self, query: Query, search_string: str) -> Query:
+        """
+        Добавить к запросу модулей фильтр поиска и сортировку по релевантности.
+
+        PostgreSQL: tsvector по названию и описанию с префиксами слов плюс подстрока в названии
+        (обе ветки идут по GIN-индексам); SQLite: FTS5; иначе - ILIKE по названию.
+        Без поисковой строки запрос возвращается отсортированным по id.
+
+        Args:
+            query: Запрос модулей с фильтрами доступа
+            search_string: Строка поиска пользователя
+        """
+        terms = search_terms(search_string or "")
+        if not terms:
+            return query.order_by(Module.id)
+
+        connection = self.db.connection()
+        if not fulltext_available(connection, Module.__tablename__):
+            return query.filter(Module.name.ilike(f"%{search_string}%")).order_by(Module.id)
+
+        if connection.dialect.name == "postgresql":
+            vector = search_vector(Module.name, Module.description)
+            ts_query = func.to_tsquery(literal_column(f"'{PG_CONFIG}'"), pg_prefix_query(terms))
+            return query.filter(or_(
+                vector.op("@@")(ts_query),
+                Module.name.ilike(f"%{search_string}%")
+            )).order_by(
+                func.ts_rank(vector, ts_query).desc(),
+                func.similarity(Module.name, search_string).desc(),
+                Module.id
+            )
+
+        fts = fts_table(Module.__tablename__)
+        matches = text(
+            f"SELECT rowid AS id, bm25({fts}) AS rank FROM {fts} WHERE {fts} MATCH :match"
+        ).bindparams(match=fts5_prefix_query(terms)).columns(id=Integer, rank=Float).subquery("matches")
+        # bm25 меньше - совпадение лучше
+        return query.join(matches, matches.c.id == Module.id).order_by(matches.c.rank, Module.id)
+
+    def search_cards(
+        self,
+        user_id: int,
+        search_string: str,
+        module_id: Optional[int] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Поиск по вопросам и ответам карточек в модулях, доступных пользователю.
+
+        Результаты упорядочены по релевантности, затем по id; страницы - keyset по этой паре,
+        поэтому следующая страница не пересчитывает предыдущие.
+
+        Args:
+            user_id: ID пользователя
+            search_string: Строка поиска
+            module_id: Искать только в этом модуле
+            limit: Размер страницы
+            cursor: next_cursor предыдущей страницы
+
+        Returns:
+            Найденные карточки с фрагментами и курсор следующей страницы
+        """
+        terms = search_terms(search_string or "")
+        if not terms:
+            return [], None
+        after = decode_cursor(cursor) if cursor else None
+
+        accessible = or_(
+            Module.owner_id == user_id,
+            exists().where(
+                ModuleAccess.module_id == Module.id,
+                ModuleAccess.view_access == AccessLevel.ALL_USERS.value
+            )
+        )
+        query = self.db.query(Card).join(Module, Card.module_id == Module.id).filter(accessible)
+        if module_id is not None:
+            query = query.filter(Card.module_id == module_id)
+
+        connection = self.db.connection()
+        if not fulltext_available(connection, Card.__tablename__):
+            pattern = f"%{search_string}%"
+            query = query.filter(or_(Card.question.ilike(pattern), Card.answer.ilike(pattern)))
+            # Без индекса ранжировать нечем: все совпадения равны, порядок по id
+            sort_value = literal(0.0)
+            question_snippet, answer_snippet = Card.question, Card.answer
+            descending = False
+        elif connection.dialect.name == "postgresql":
+            vector = search_vector(Card.question, Card.answer)
+            ts_query = func.to_tsquery(literal_column(f"'{PG_CONFIG}'"), pg_prefix_query(terms))
+            query = query.filter(vector.op("@@")(ts_query))
+            # real -> double, чтобы значение в курсоре точно совпадало с пересчитанным
+            sort_value = cast(func.ts_rank(vector, ts_query), Float)
+            question_snippet = func.ts_headline(
+                literal_column(f"'{PG_CONFIG}'"), Card.question, ts_query, PG_HEADLINE_OPTIONS
+            )
+            answer_snippet = func.ts_headline(
+                literal_column(f"'{PG_CONFIG}'"), Card.answer, ts_query, PG_HEADLINE_OPTIONS
+            )
+            descending = True
+        else:
+            fts = fts_table(Card.__tablename__)
+            snippet = f"'{_MATCH_START}', '{_MATCH_STOP}', '…', {SNIPPET_WORDS}"
+            matches = text(
+                f"SELECT rowid AS id, bm25({fts}) AS rank, "
+                f"snippet({fts}, 0, {snippet}) AS question_snippet, "
+                f"snippet({fts}, 1, {snippet}) AS answer_snippet "
+                f"FROM {fts} WHERE {fts} MATCH :match"
+            ).bindparams(match=fts5_prefix_query(terms)).columns(
+                id=Integer, rank=Float, question_snippet=String, answer_snippet=String
+            ).subquery("matches")
+            query = query.join(matches, matches.c.id == Card.id)
+            # bm25 меньше - совпадение лучше
+            sort_value = matches.c.rank
+            question_snippet, answer_snippet = matches.c.question_snippet, matches.c.answer_snippet
+            descending = False
+
+        if after is not None:
+            last_value, last_id = after
+            beyond = sort_value < last_value if descending else sort_value > last_value
+            query = query.filter(or_(beyond, and_(sort_value == last_value, Card.id > last_id)))
+
+        rows = query.with_entities(
+            Card.id, Card.module_id, Card.question, Card.answer,
+            question_snippet.label("question_snippet"),
+            answer_snippet.label("answer_snippet"),
+            sort_value.label("sort_value")
+        ).order_by(
+            sort_value.desc() if descending else sort_value, Card.id
+        ).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].sort_value, rows[-1].id)
+
+        return [
+            {
+                "id": row.id,
+                "module_id": row.module_id,
+                "question": row.question,
+                "answer": row.answer,
+                "question_snippet": highlight_html(row.question_snippet),
+                "answer_snippet": highlight_html(row.answer_snippet),
+                # Наружу - «больше значит лучше» для любой БД
+                "rank": row.sort_value if descending else -row.sort_value
+            }
+            for row in rows
+        ], next_cursor
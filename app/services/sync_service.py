@@ -0,0 +1,191 @@
+import base64
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, exists, or_, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..core.config import settings
+from ..db.changefeed import sync_tombstones
+from ..models.card import Card
+from ..models.interval_repetition import IntervalRepetition
+from ..models.module import Module
+from ..models.module_access import AccessLevel, ModuleAccess
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(version: int, issued_at: datetime) -> str:
+    return base64.urlsafe_b64encode(json.dumps([version, int(issued_at.timestamp())]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[int, datetime]:
+    """Версия и время выдачи курсора; ValueError, если курсор испорчен"""
+    try:
+        version, issued_at = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(version), datetime.fromtimestamp(int(issued_at), timezone.utc)
+    except (ValueError, TypeError, OverflowError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class SyncService:
+    def __init__(self, db: Session):
+        """
+        Лента изменений для мобильных клиентов.
+
+        Args:
+            db: Сессия SQLAlchemy
+        """
+        self.db = db
+
+    def changes(self, user_id: int, cursor: Optional[str] = None, limit: int = 500) -> Dict[str, Any]:
+        """
+        Изменения после курсора: модули, доступы, карточки, повторения пользователя и удаления.
+
+        В ленте - свои модули и модули, по которым пользователь учится; модули и карточки -
+        пока модуль ему виден, доступы - всегда, чтобы закрытие модуля дошло до клиента.
+        Страница - limit изменений с наименьшими версиями по всем таблицам сразу; каждая
+        таблица читается одним запросом по индексу (..., version). Для одной сущности в
+        ответе остаётся только последнее изменение, поэтому клиент применяет сначала
+        изменения, затем удаления.
+
+        Курсор старше SYNC_TOMBSTONE_RETENTION_DAYS (надгробия уже удалены) или его
+        отсутствие дают полную выгрузку с reset=True: клиент очищает локальные данные.
+
+        Args:
+            user_id: ID пользователя
+            cursor: cursor предыдущего ответа
+            limit: Максимум изменений в ответе
+
+        Returns:
+            Изменения, новый курсор и признак has_more
+        """
+        now = datetime.now(timezone.utc)
+        after, reset = 0, True
+        if cursor:
+            after, issued_at = decode_cursor(cursor)
+            reset = issued_at < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+            if reset:
+                after = 0
+
+        scope_ids = self.db.execute(
+            select(Module.id).where(Module.owner_id == user_id).union(
+                select(IntervalRepetition.module_id).where(IntervalRepetition.user_id == user_id)
+            )
+        ).scalars().all()
+        visible_ids = self.db.execute(
+            select(Module.id).where(
+                Module.id.in_(scope_ids),
+                or_(
+                    Module.owner_id == user_id,
+                    exists().where(
+                        ModuleAccess.module_id == Module.id,
+                        ModuleAccess.view_access == AccessLevel.ALL_USERS.value
+                    )
+                )
+            )
+        ).scalars().all()
+
+        sources = (
+            ("module", select(
+                Module.id, Module.name, Module.description, Module.owner_id, Module.version
+            ).where(Module.id.in_(visible_ids), Module.version > after).order_by(Module.version)),
+            ("module_access", select(
+                ModuleAccess.id, ModuleAccess.module_id, ModuleAccess.view_access, ModuleAccess.edit_access,
+                ModuleAccess.version
+            ).where(ModuleAccess.module_id.in_(scope_ids), ModuleAccess.version > after).order_by(ModuleAccess.version)),
+            ("card", select(
+                Card.id, Card.module_id, Card.question, Card.answer, Card.version
+            ).where(Card.module_id.in_(visible_ids), Card.version > after).order_by(Card.version)),
+            ("repetition", select(
+                IntervalRepetition.card_id, IntervalRepetition.module_id, IntervalRepetition.state,
+                IntervalRepetition.step, IntervalRepetition.stability, IntervalRepetition.difficulty,
+                IntervalRepetition.due, IntervalRepetition.last_review, IntervalRepetition.version
+            ).where(
+                IntervalRepetition.user_id == user_id, IntervalRepetition.version > after
+            ).order_by(IntervalRepetition.version)),
+            ("tombstone", select(
+                sync_tombstones.c.entity, sync_tombstones.c.entity_id, sync_tombstones.c.version
+            ).where(
+                sync_tombstones.c.version > after,
+                or_(
+                    # Модуль удалён вместе с доступами и повторениями: кому он был нужен, уже не узнать
+                    sync_tombstones.c.entity == "module",
+                    and_(sync_tombstones.c.entity == "card", sync_tombstones.c.module_id.in_(visible_ids)),
+                    and_(sync_tombstones.c.entity == "repetition", sync_tombstones.c.user_id == user_id)
+                )
+            ).order_by(sync_tombstones.c.version)),
+        )
+
+        # По limit + 1 из каждой таблицы хватает, чтобы найти limit наименьших версий среди всех
+        changes: List[Tuple[int, str, Any]] = []
+        for kind, statement in sources:
+            changes.extend((row.version, kind, row) for row in self.db.execute(statement.limit(limit + 1)))
+        changes.sort(key=lambda change: change[0])
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        version = changes[-1][0] if changes else after
+
+        # Последнее изменение каждой сущности; ключ надгробия совпадает с ключом изменения
+        latest: Dict[Tuple[str, int], Tuple[str, Any]] = {}
+        for _, kind, row in changes:
+            if kind == "tombstone":
+                latest[(row.entity, row.entity_id)] = ("deleted", row)
+            elif kind == "repetition":
+                latest[(kind, row.card_id)] = (kind, row)
+            else:
+                latest[(kind, row.id)] = (kind, row)
+
+        result: Dict[str, Any] = {
+            "cursor": encode_cursor(version, now),
+            "has_more": has_more,
+            "reset": reset,
+            "modules": [],
+            "module_accesses": [],
+            "cards": [],
+            "repetitions": [],
+            "deleted": {"modules": [], "cards": [], "repetitions": []},
+        }
+        for (entity, entity_id), (kind, row) in latest.items():
+            if kind == "deleted":
+                result["deleted"][f"{entity}s"].append(entity_id)
+            elif kind == "module":
+                result["modules"].append({
+                    "id": row.id, "name": row.name, "description": row.description, "owner_id": row.owner_id
+                })
+            elif kind == "module_access":
+                result["module_accesses"].append({
+                    "module_id": row.module_id, "view_access": row.view_access, "edit_access": row.edit_access
+                })
+            elif kind == "card":
+                result["cards"].append({
+                    "id": row.id, "module_id": row.module_id, "question": row.question, "answer": row.answer
+                })
+            else:
+                result["repetitions"].append({
+                    "card_id": row.card_id, "module_id": row.module_id, "state": row.state, "step": row.step,
+                    "stability": row.stability, "difficulty": row.difficulty, "due": row.due,
+                    "last_review": row.last_review
+                })
+        return result
+
+
+def prune_tombstones(session_factory: sessionmaker, retention_days: Optional[int] = None) -> int:
+    """
+    Удалить надгробия старше срока хранения.
+
+    Курсоры старше того же срока SyncService.changes не принимает (reset), поэтому
+    ни один клиент не пропустит удалённое надгробие.
+    """
+    retention_days = retention_days or settings.SYNC_TOMBSTONE_RETENTION_DAYS
+    horizon = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    db = session_factory()
+    try:
+        deleted = db.execute(delete(sync_tombstones).where(sync_tombstones.c.created_at < horizon)).rowcount
+        db.commit()
+    finally:
+        db.close()
+    logger.info(f"🪦 Pruned {deleted} sync tombstones older than {retention_days} days")
+    return deleted
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест рассылки учебных напоминаний без Firebase и без сети.
+
+Создаёт N пользователей с push-токенами и карточками к повторению,
+прогоняет PushNotificationService.send_study_reminders через FakeFCMTransport
+и печатает время запуска, отправки в секунду и пиковую память.
+
+    python benchmarks/bench_push_pipeline.py --users 2000 --latency-ms 20
+    python benchmarks/bench_push_pipeline.py --database-url postgresql://... --users 50000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///:memory:",
+                        help="БД для прогона; таблицы создаются, данные добавляются (не используйте рабочую БД)")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--modules-per-user", type=int, default=2)
+    parser.add_argument("--cards-per-module", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=10, help="задержка ответа FakeFCM")
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--unregistered-rate", type=float, default=0.02)
+    parser.add_argument("--window", type=float, default=0, help="PUSH_DISPATCH_WINDOW_SECONDS")
+    parser.add_argument("--rate", type=float, default=0, help="PUSH_RATE_LIMIT_PER_SECOND (0 - без лимита)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="сохранить результат в JSON")
+    parser.add_argument("--verbose", action="store_true", help="логировать каждую отправку")
+    return parser.parse_args()
+
+
+def seed_database(session, users: int, modules_per_user: int, cards_per_module: int) -> None:
+    from sqlalchemy import insert, func
+    from app.models.user import User
+    from app.models.module import Module
+    from app.models.card import Card
+    from app.models.interval_repetition import IntervalRepetition, RepetitionState
+
+    user_offset = session.query(func.coalesce(func.max(User.id), 0)).scalar()
+    module_offset = session.query(func.coalesce(func.max(Module.id), 0)).scalar()
+    card_offset = session.query(func.coalesce(func.max(Card.id), 0)).scalar()
+    repetition_offset = session.query(func.coalesce(func.max(IntervalRepetition.id), 0)).scalar()
+    due = datetime.now() - timedelta(hours=1)
+
+    module_id, card_id, repetition_id = module_offset, card_offset, repetition_offset
+    for user_index in range(1, users + 1):
+        user_id = user_offset + user_index
+        session.execute(insert(User), [{
+            "id": user_id,
+            "name": f"Bench user {user_id}",
+            "oidc_sub": f"bench-{user_id}-{time.time_ns()}",
+            "push_id": f"bench-token-{user_id}"
+        }])
+
+        modules, cards, repetitions = [], [], []
+        for _ in range(modules_per_user):
+            module_id += 1
+            modules.append({"id": module_id, "name": f"Module {module_id}", "owner_id": user_id})
+            for _ in range(cards_per_module):
+                card_id += 1
+                repetition_id += 1
+                cards.append({"id": card_id, "module_id": module_id, "question": "q", "answer": "a"})
+                repetitions.append({
+                    "id": repetition_id,
+                    "user_id": user_id,
+                    "module_id": module_id,
+                    "card_id": card_id,
+                    "state": RepetitionState.Learning,
+                    "step": 0,
+                    "stability": 0.5,
+                    "difficulty": 0.3,
+                    "due": due
+                })
+        session.execute(insert(Module), modules)
+        session.execute(insert(Card), cards)
+        session.execute(insert(IntervalRepetition), repetitions)
+    session.commit()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.verbose:
+        logging.disable(logging.ERROR)
+    # Настройки читаются при импорте app, поэтому URL подставляем до него
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["PUSH_TRANSPORT"] = "fake"
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from app.core.config import settings
+    from app.db.database import Base
+    from app.models import user, module, card, interval_repetition, module_access  # noqa: F401
+    from app.services.push_service import PushNotificationService
+    from app.services.push_transport import FakeFCMTransport
+
+    if args.database_url.startswith("sqlite"):
+        engine = create_engine(args.database_url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    seed_started = time.perf_counter()
+    with session_factory() as session:
+        seed_database(session, args.users, args.modules_per_user, args.cards_per_module)
+    seed_seconds = time.perf_counter() - seed_started
+
+    settings.PUSH_DISPATCH_WINDOW_SECONDS = args.window
+    settings.PUSH_RATE_LIMIT_PER_SECOND = args.rate
+    transport = FakeFCMTransport(
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        unregistered_rate=args.unregistered_rate,
+        seed=args.seed
+    )
+    service = PushNotificationService(transport=transport, session_factory=session_factory)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    summary = asyncio.run(service.send_study_reminders())
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "users": args.users,
+        "reminders": summary["total"],
+        "sent": summary["sent"],
+        "outcomes": dict(transport.stats),
+        "seed_seconds": round(seed_seconds, 3),
+        "run_seconds": round(elapsed, 3),
+        "sends_per_second": round(summary["total"] / elapsed, 1) if elapsed else None,
+        "peak_memory_mb": round(peak / 1024 / 1024, 2),
+        "latency_ms": args.latency_ms,
+        "window_seconds": args.window,
+        "rate_limit": args.rate
+    }
+
+    print(f"Напоминаний: {result['reminders']}, отправлено: {result['sent']}, исходы: {result['outcomes']}")
+    print(f"Время запуска: {result['run_seconds']}s, {result['sends_per_second']} отправок/s")
+    print(f"Пиковая память: {result['peak_memory_mb']} MB (подготовка данных: {result['seed_seconds']}s)")
+
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
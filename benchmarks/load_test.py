@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест API: асинхронные виртуальные пользователи со смесью сценариев.
+
+Каждый виртуальный пользователь получает JWT, выпущенный локально через
+core.security.create_access_token (нужен тот же SECRET_KEY, что и у сервера),
+создаёт свой модуль с карточками, включает интервальные повторения и дальше
+выполняет сценарии по весам: список модулей, очередь повторения, ответ на карточку,
+создание карточки. В конце печатает throughput и p50/p95/p99 по каждому эндпоинту
+и при необходимости сохраняет результат в JSON для сравнения между коммитами.
+
+    python benchmarks/load_test.py --base-url http://localhost:8000 --create-users --users 50 --duration 60
+    python benchmarks/load_test.py --in-process --users 20 --duration 10 --json results/head.json
+    python benchmarks/load_test.py --in-process --compare results/base.json
+
+--create-users добавляет пользователей loadtest-N прямо в БД из DATABASE_URL;
+--in-process гоняет запросы через ASGI без сервера и сети.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCENARIO_WEIGHTS = {
+    "list_modules": 40,
+    "due_queue": 30,
+    "review": 20,
+    "create_card": 10,
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="запросы к main.app через ASGI, без сервера")
+    parser.add_argument("--users", type=int, default=20, help="число виртуальных пользователей")
+    parser.add_argument("--duration", type=float, default=30, help="длительность в секундах")
+    parser.add_argument("--cards-per-module", type=int, default=20)
+    parser.add_argument("--think-time-ms", type=float, default=0, help="пауза между запросами пользователя")
+    parser.add_argument("--create-users", action="store_true", help="создать пользователей loadtest-N в БД")
+    parser.add_argument("--sub-prefix", default="loadtest-")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="сохранить результат в JSON")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения p95 и throughput")
+    return parser.parse_args()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Перцентиль методом nearest-rank по отсортированному списку"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ensure_users(subs: List[str]) -> None:
+    from app.db.database import SessionLocal
+    from app.models.user import User
+
+    with SessionLocal() as db:
+        existing = {sub for (sub,) in db.query(User.oidc_sub).filter(User.oidc_sub.in_(subs))}
+        db.add_all(User(name=sub, oidc_sub=sub) for sub in subs if sub not in existing)
+        db.commit()
+
+
+class Recorder:
+    """Латентности и статусы по имени эндпоинта"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.latencies[name].append(time.perf_counter() - started)
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for name in sorted(self.latencies):
+            values = sorted(self.latencies[name])
+            result[name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            }
+        return result
+
+
+class VirtualUser:
+    def __init__(self, client, recorder: Recorder, sub: str, rng: random.Random, args: argparse.Namespace):
+        from app.core.security import create_access_token
+
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.args = args
+        self.headers = {"Authorization": f"Bearer {create_access_token(sub)}"}
+        self.module_id: Optional[int] = None
+        self.created = 0
+
+    async def call(self, name: str, method: str, url: str, **kwargs):
+        return await self.recorder.request(self.client, name, method, url, headers=self.headers, **kwargs)
+
+    async def setup(self) -> bool:
+        response = await self.call("setup_module", "POST", "/api/v1/modules/", json={
+            "name": "Load test module",
+            "description": "load test",
+            "ViewAccess": "only_me",
+            "EditAccess": "only_me"
+        })
+        if response is None or response.status_code >= 400:
+            return False
+        self.module_id = response.json()["id"]
+        for _ in range(self.args.cards_per_module):
+            await self.create_card("setup_card")
+        await self.call("setup_repetitions", "POST", f"/api/v1/modules/{self.module_id}/interval-repetitions/")
+        return True
+
+    async def create_card(self, name: str = "create_card") -> None:
+        self.created += 1
+        await self.call(name, "POST", f"/api/v1/modules/{self.module_id}/cards/", json={
+            "question": f"Question {self.created}",
+            "answer": f"Answer {self.created}"
+        })
+
+    async def list_modules(self) -> None:
+        await self.call("list_modules", "GET", "/api/v1/modules/")
+
+    async def due_queue(self):
+        return await self.call("due_queue", "GET", f"/api/v1/modules/{self.module_id}/interval-repetitions/",
+                               params={"take": 10})
+
+    async def review(self) -> None:
+        response = await self.due_queue()
+        if response is None or response.status_code >= 400 or not response.json()["items"]:
+            return
+        card = self.rng.choice(response.json()["items"])
+        await self.call("review", "POST", f"/api/v1/modules/{self.module_id}/interval-repetitions/{card['id']}",
+                        json={
+                            "time_of_answer": datetime.now(timezone.utc).isoformat(),
+                            "right_answer": self.rng.random() < 0.8
+                        })
+
+    async def run(self, deadline: float) -> None:
+        scenarios = list(SCENARIO_WEIGHTS)
+        weights = list(SCENARIO_WEIGHTS.values())
+        while time.perf_counter() < deadline:
+            await getattr(self, self.rng.choices(scenarios, weights)[0])()
+            if self.args.think_time_ms > 0:
+                await asyncio.sleep(self.args.think_time_ms / 1000)
+
+
+async def run_load(args: argparse.Namespace, subs: List[str]) -> Dict[str, object]:
+    import httpx
+
+    if args.in_process:
+        from main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://loadtest"
+    else:
+        transport = None
+        base_url = args.base_url
+
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=30) as client:
+        users = [VirtualUser(client, recorder, sub, random.Random(args.seed + index), args)
+                 for index, sub in enumerate(subs)]
+        ready = await asyncio.gather(*(user.setup() for user in users))
+        users = [user for user, ok in zip(users, ready) if ok]
+        if not users:
+            raise SystemExit("Ни один виртуальный пользователь не прошёл подготовку: проверьте SECRET_KEY и --create-users")
+
+        # Подготовку в итог не включаем: меряем только установившуюся нагрузку
+        setup_summary = recorder.summary(1)
+        recorder.latencies.clear()
+        recorder.errors.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user.run(started + args.duration) for user in users))
+        elapsed = time.perf_counter() - started
+
+    endpoints = recorder.summary(elapsed)
+    total = sum(item["requests"] for item in endpoints.values())
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "target": "in-process" if args.in_process else args.base_url,
+        "users": len(users),
+        "duration_seconds": round(elapsed, 2),
+        "scenario_weights": SCENARIO_WEIGHTS,
+        "requests": total,
+        "errors": sum(item["errors"] for item in endpoints.values()),
+        "throughput_rps": round(total / elapsed, 2),
+        "setup_errors": sum(item["errors"] for item in setup_summary.values()),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(result: Dict[str, object], baseline: Optional[Dict[str, object]] = None) -> None:
+    print(f"Коммит {result['commit']}, {result['users']} пользователей, {result['duration_seconds']}s")
+    print(f"Запросов: {result['requests']}, ошибок: {result['errors']}, throughput: {result['throughput_rps']} rps")
+    print(f"{'endpoint':<16}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, item in result["endpoints"].items():
+        line = (f"{name:<16}{item['requests']:>10}{item['errors']:>8}{item['rps']:>10}"
+                f"{item['p50_ms']:>10}{item['p95_ms']:>10}{item['p99_ms']:>10}")
+        previous = (baseline or {}).get("endpoints", {}).get(name)
+        if previous and previous["p95_ms"]:
+            line += f"   p95 {(item['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}% vs {baseline['commit']}"
+        print(line)
+    if baseline and baseline.get("throughput_rps"):
+        change = (result["throughput_rps"] / baseline["throughput_rps"] - 1) * 100
+        print(f"Throughput {change:+.0f}% vs {baseline['commit']}")
+
+
+def main() -> None:
+    args = parse_args()
+    logging.disable(logging.WARNING)
+    if args.in_process:
+        os.environ.setdefault("PUSH_SCHEDULER_ENABLED", "false")
+
+    subs = [f"{args.sub_prefix}{index}" for index in range(1, args.users + 1)]
+    if args.create_users or args.in_process:
+        if args.in_process:
+            from app.db.database import Base, engine
+            from app.models import user, module, card, interval_repetition, module_access  # noqa: F401
+            Base.metadata.create_all(bind=engine)
+        ensure_users(subs)
+
+    result = asyncio.run(run_load(args, subs))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_report(result, baseline)
+
+    if args.json_path:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json_path)), exist_ok=True)
+        with open(args.json_path, "w") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
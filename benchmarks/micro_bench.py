@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарки горячих путей на чистом Python.
+
+Каждый бенчмарк запускается на нескольких размерах данных (число карточек в модуле/странице).
+Для каждого случая печатается время вызова (timeit, лучшая из --repeat серий)
+и выделенная за вызов память (tracemalloc).
+
+    python benchmarks/micro_bench.py
+    python benchmarks/micro_bench.py --save benchmarks/baseline.json
+    python benchmarks/micro_bench.py --baseline benchmarks/baseline.json --threshold 0.25
+
+С --baseline скрипт завершается с кодом 1, если какой-то путь стал медленнее порога.
+Сравнивать имеет смысл только прогоны на одной машине.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+SIZES = (10, 100, 1000)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="минимальная длительность серии, с")
+    parser.add_argument("--filter", help="запускать только бенчмарки, в имени которых есть подстрока")
+    parser.add_argument("--save", help="сохранить результат в JSON")
+    parser.add_argument("--baseline", help="JSON предыдущего прогона для регрессионной проверки")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление, доля")
+    return parser.parse_args()
+
+
+def make_cards(size: int):
+    from app.models.card import Card
+
+    return [Card(id=index, module_id=1, question=f"Question {index}", answer=f"Answer {index}")
+            for index in range(size, 0, -1)]
+
+
+def make_repetition():
+    from app.models.interval_repetition import IntervalRepetition, RepetitionState
+
+    now = datetime.now(timezone.utc)
+    return IntervalRepetition(
+        user_id=1, module_id=1, card_id=1, state=RepetitionState.Review, step=3,
+        stability=12.5, difficulty=5.1, due=now, last_review=now - timedelta(days=12)
+    )
+
+
+class PreloadedSession:
+    """Сессия, отдающая заранее загруженные строки: меряем сборку схемы, а не SQL"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def query(self, *entities):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+def make_module(size: int):
+    from app.models.module import Module
+    from app.models.module_access import ModuleAccess
+    from app.models.interval_repetition import IntervalRepetition, RepetitionState
+
+    now = datetime.now(timezone.utc)
+    module = Module(id=1, name="Bench", owner_id=1, created_at=now, cards=make_cards(size))
+    access = ModuleAccess(module_id=1, owner_id=1, view_access="only_me", edit_access="only_me")
+    repetitions = [
+        IntervalRepetition(user_id=1, module_id=1, card_id=card.id, state=RepetitionState.Review,
+                           stability=1.0, difficulty=5.0, due=now + timedelta(hours=index % 48 - 24))
+        for index, card in enumerate(module.cards)
+    ]
+    return PreloadedSession(repetitions), module, access
+
+
+def benchmarks(sizes: List[int]) -> Dict[str, Tuple[int, Callable[[], object]]]:
+    """Имя случая -> (размер, вызов)"""
+    from app.api.endpoints.cards import cardsdb_to_cards, get_three_answer
+    from app.api.endpoints.modules import CreateModuleScema
+    from app.services.repetition_service import RepetitionService
+    from fsrs import State
+
+    service = RepetitionService(db=None)
+    repetition = make_repetition()
+    cases: Dict[str, Tuple[int, Callable[[], object]]] = {
+        "_deserialize_fsrs_card": (1, lambda: service._deserialize_fsrs_card(repetition)),
+        "_get_repetition_state": (1, lambda: service._get_repetition_state(State.Review)),
+        "_get_fsrs_state": (1, lambda: service._get_fsrs_state(repetition.state)),
+    }
+
+    for size in sizes:
+        cards = make_cards(size)
+        answers = [card.answer for card in cards]
+        cases[f"get_three_answer[{size}]"] = (size, lambda answers=answers: get_three_answer(answers, answers[0]))
+        cases[f"cardsdb_to_cards[{size}]"] = (size, lambda cards=cards: cardsdb_to_cards(cards))
+        cases[f"RepetitionService._cardsdb_to_cards[{size}]"] = (
+            size, lambda cards=cards: service._cardsdb_to_cards(cards)
+        )
+        db, module, access = make_module(size)
+        cases[f"CreateModuleScema[{size}]"] = (
+            size, lambda db=db, module=module, access=access: CreateModuleScema(module, access, db, 1)
+        )
+    return cases
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> Dict[str, float]:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    # autorange подбирает число вызовов на ~0.2с; растягиваем до min_time
+    number = max(1, int(number * max(min_time / 0.2, 1)))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    func()
+    tracemalloc.start()
+    func()
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak, "retained_bytes": allocated}
+
+
+def check_regressions(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                      threshold: float) -> List[str]:
+    failures = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous and previous["seconds"] > 0:
+            change = current["seconds"] / previous["seconds"] - 1
+            if change > threshold:
+                failures.append(f"{name}: {change * 100:+.0f}% ({previous['seconds'] * 1e6:.1f} -> "
+                                f"{current['seconds'] * 1e6:.1f} us)")
+    return failures
+
+
+def main() -> None:
+    args = parse_args()
+    logging.disable(logging.WARNING)
+    random.seed(0)
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'benchmark':<44}{'us/call':>12}{'peak KiB':>12}")
+    for name, (size, func) in benchmarks(args.sizes).items():
+        if args.filter and args.filter not in name:
+            continue
+        result = measure(func, args.repeat, args.min_time)
+        result["size"] = size
+        results[name] = result
+        print(f"{name:<44}{result['seconds'] * 1e6:>12.2f}{result['peak_bytes'] / 1024:>12.1f}")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            failures = check_regressions(results, json.load(file), args.threshold)
+        if failures:
+            print(f"\nМедленнее базового прогона больше чем на {args.threshold * 100:.0f}%:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print(f"\nРегрессий больше {args.threshold * 100:.0f}% нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Генератор синтетических данных для бенчмарков на больших объёмах.
+
+Заливает пользователей, модули, module_accesses, карточки и состояния интервальных
+повторений. В PostgreSQL пишет через COPY ... FROM STDIN порциями по --chunk-size строк,
+в остальных БД - пакетными INSERT. Одинаковые --seed и параметры дают одинаковые данные
+(id отсчитываются от текущего максимума в таблицах).
+
+    python benchmarks/seed_dataset.py --database-url postgresql://... --users 20000 --cards-per-module 100
+    python benchmarks/seed_dataset.py --database-url sqlite:///bench.db --users 200 --big-modules 2
+
+Примерный объём: users * modules_per_user * cards_per_module карточек и столько же
+повторений у владельцев (для доли --enrolled-share), плюс повторения учеников
+публичных модулей (--learners-per-public-module).
+"""
+
+import argparse
+import csv
+import io
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Порядок заливки совпадает с зависимостями внешних ключей
+TABLES: Dict[str, Tuple[str, ...]] = {
+    "users": ("id", "name", "email", "oidc_sub", "push_id"),
+    "modules": ("id", "name", "description", "owner_id", "created_at"),
+    "module_accesses": ("id", "module_id", "owner_id", "view_access", "edit_access"),
+    "cards": ("id", "module_id", "question", "answer", "created_at"),
+    "interval_repetitions": (
+        "id", "user_id", "module_id", "card_id", "state", "step",
+        "stability", "difficulty", "due", "last_review", "created_at"
+    ),
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                        help="куда заливать (по умолчанию DATABASE_URL); не используйте рабочую БД")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--modules-per-user", type=int, default=3)
+    parser.add_argument("--cards-per-module", type=int, default=50)
+    parser.add_argument("--big-modules", type=int, default=0, help="сколько модулей сделать большими")
+    parser.add_argument("--big-module-cards", type=int, default=10000)
+    parser.add_argument("--public-share", type=float, default=0.2, help="доля модулей с view_access=all_users")
+    parser.add_argument("--enrolled-share", type=float, default=0.7,
+                        help="доля модулей, в которых владелец включил повторения")
+    parser.add_argument("--learners-per-public-module", type=int, default=2,
+                        help="сколько других пользователей учат каждый публичный модуль")
+    parser.add_argument("--push-share", type=float, default=0.6, help="доля пользователей с push-токеном")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--create-tables", action="store_true", help="создать таблицы по моделям")
+    return parser.parse_args()
+
+
+class RepetitionGenerator:
+    """
+    Состояния повторений с правдоподобным распределением сроков:
+    большая часть карточек в Review со сроком в ближайшие недели (логнормально),
+    заметная доля просрочена, остальные в Learning/Relearning со сроком в пределах часа.
+    """
+
+    def __init__(self, rng: random.Random, now: datetime):
+        self.rng = rng
+        self.now = now
+
+    def state(self) -> Tuple[str, int, float, float, datetime, datetime]:
+        rng = self.rng
+        roll = rng.random()
+        if roll < 0.2:
+            due = self.now + timedelta(minutes=rng.uniform(-60, 60))
+            return "Learning", rng.randint(0, 1), 0.5, 0.3, due, due - timedelta(minutes=10)
+        if roll < 0.3:
+            due = self.now + timedelta(minutes=rng.uniform(-120, 30))
+            stability = rng.uniform(0.5, 5)
+            return "Relearning", 0, stability, rng.uniform(5, 9), due, due - timedelta(minutes=10)
+
+        stability = rng.lognormvariate(math.log(10), 1.0)
+        interval = timedelta(days=max(stability, 1))
+        # 15% карточек просрочены на экспоненциально распределённое время
+        if rng.random() < 0.15:
+            due = self.now - timedelta(hours=rng.expovariate(1 / 48))
+        else:
+            due = self.now + timedelta(days=rng.uniform(0, stability))
+        return "Review", 0, stability, rng.uniform(1, 10), due, due - interval
+
+
+class Buffers:
+    """Строки по таблицам; при заполнении сбрасываются все таблицы по порядку внешних ключей"""
+
+    def __init__(self, writer, chunk_size: int):
+        self.writer = writer
+        self.chunk_size = chunk_size
+        self.rows: Dict[str, List[tuple]] = {table: [] for table in TABLES}
+        self.written: Dict[str, int] = {table: 0 for table in TABLES}
+
+    def add(self, table: str, row: tuple) -> None:
+        rows = self.rows[table]
+        rows.append(row)
+        if len(rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        for table, rows in self.rows.items():
+            if rows:
+                self.writer.write(table, TABLES[table], rows)
+                self.written[table] += len(rows)
+                rows.clear()
+        self.writer.commit()
+
+
+class CopyWriter:
+    """PostgreSQL: COPY FROM STDIN в формате CSV"""
+
+    def __init__(self, engine):
+        self.connection = engine.raw_connection()
+        self.cursor = self.connection.cursor()
+
+    def write(self, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+        stream = io.StringIO()
+        csv.writer(stream).writerows(
+            tuple(value.isoformat() if isinstance(value, datetime) else value for value in row) for row in rows
+        )
+        stream.seek(0)
+        self.cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", stream)
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def close(self) -> None:
+        # Последовательности не знают о явно заданных id - двигаем их за максимум
+        for table in TABLES:
+            self.cursor.execute(
+                f"SELECT setval('{table}_id_seq', (SELECT COALESCE(MAX(id), 1) FROM {table}))"
+            )
+        self.connection.commit()
+        self.connection.close()
+
+
+class InsertWriter:
+    """Остальные БД: пакетный INSERT через executemany"""
+
+    def __init__(self, engine):
+        from sqlalchemy import MetaData
+
+        self.connection = engine.connect()
+        self.metadata = MetaData()
+        self.metadata.reflect(bind=engine, only=list(TABLES))
+
+    def write(self, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+        self.connection.execute(self.metadata.tables[table].insert(), [dict(zip(columns, row)) for row in rows])
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def id_offsets(engine) -> Dict[str, int]:
+    from sqlalchemy import text
+
+    with engine.connect() as connection:
+        return {
+            table: connection.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {table}")).scalar()
+            for table in TABLES
+        }
+
+
+def generate(buffers: Buffers, args: argparse.Namespace, offsets: Dict[str, int]) -> None:
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    repetitions = RepetitionGenerator(rng, now)
+    next_id = dict(offsets)
+
+    def new_id(table: str) -> int:
+        next_id[table] += 1
+        return next_id[table]
+
+    def add_repetitions(user_id: int, module_id: int, card_ids: range) -> None:
+        for card_id in card_ids:
+            state, step, stability, difficulty, due, last_review = repetitions.state()
+            buffers.add("interval_repetitions", (
+                new_id("interval_repetitions"), user_id, module_id, card_id, state, step,
+                round(stability, 4), round(difficulty, 4), due, last_review, last_review
+            ))
+
+    total_modules = args.users * args.modules_per_user
+    big_modules = set(rng.sample(range(total_modules), min(args.big_modules, total_modules)))
+    user_ids: List[int] = []
+    module_index = 0
+
+    for _ in range(args.users):
+        user_id = new_id("users")
+        user_ids.append(user_id)
+        push_id = f"seed-token-{args.seed}-{user_id}" if rng.random() < args.push_share else None
+        buffers.add("users", (
+            user_id, f"Seed user {user_id}", f"user{user_id}@example.com", f"seed-{args.seed}-{user_id}", push_id
+        ))
+
+        for _ in range(args.modules_per_user):
+            module_id = new_id("modules")
+            created_at = now - timedelta(days=rng.uniform(0, 365))
+            buffers.add("modules", (
+                module_id, f"Module {module_id}", f"Synthetic module {module_id}", user_id, created_at
+            ))
+            is_public = rng.random() < args.public_share
+            buffers.add("module_accesses", (
+                new_id("module_accesses"), module_id, user_id,
+                "all_users" if is_public else "only_me", "only_me"
+            ))
+
+            cards = args.big_module_cards if module_index in big_modules else args.cards_per_module
+            module_index += 1
+            first_card = next_id["cards"] + 1
+            for _ in range(cards):
+                card_id = new_id("cards")
+                buffers.add("cards", (
+                    card_id, module_id, f"Question {card_id}: what is term {card_id}?",
+                    f"Answer {card_id}", created_at
+                ))
+            card_ids = range(first_card, next_id["cards"] + 1)
+
+            if rng.random() < args.enrolled_share:
+                add_repetitions(user_id, module_id, card_ids)
+            if is_public and len(user_ids) > 1:
+                learners = rng.sample(user_ids[:-1], min(args.learners_per_public_module, len(user_ids) - 1))
+                for learner_id in learners:
+                    add_repetitions(learner_id, module_id, card_ids)
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.database_url:
+        raise SystemExit("Укажите --database-url или DATABASE_URL")
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from sqlalchemy import create_engine
+
+    engine = create_engine(args.database_url)
+    if args.create_tables:
+        from app.db.database import Base
+        from app.models import user, module, card, interval_repetition, module_access  # noqa: F401
+        Base.metadata.create_all(bind=engine)
+
+    offsets = id_offsets(engine)
+    writer = CopyWriter(engine) if engine.dialect.name == "postgresql" else InsertWriter(engine)
+    buffers = Buffers(writer, args.chunk_size)
+
+    started = time.perf_counter()
+    try:
+        generate(buffers, args, offsets)
+        buffers.flush()
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - started
+
+    total = sum(buffers.written.values())
+    for table, count in buffers.written.items():
+        print(f"{table:<22}{count:>12}")
+    print(f"Всего {total} строк за {elapsed:.1f}s ({total / elapsed:,.0f} строк/s, {engine.dialect.name})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Симуляция волны запросов после рассылки учебных напоминаний.
+
+Сравнивает кривую прихода запросов к API без растягивания рассылки
+и с окном + token bucket из app/services/push_dispatch.py.
+Работает в виртуальном времени, без БД и Firebase.
+
+    python benchmarks/simulate_push_wave.py --users 20000 --window 300 --rate 20
+"""
+
+import argparse
+import os
+import random
+import sys
+from collections import Counter
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.push_dispatch import TokenBucket, plan_dispatch  # noqa: E402
+
+
+def simulate_send_times(user_ids: List[int], window: float, rate: float, burst: int) -> List[float]:
+    """Моменты отправки пушей (секунды от начала запуска) так, как их выдаёт send_study_reminders"""
+    now = 0.0
+    bucket = TokenBucket(rate, burst, clock=lambda: now)
+    send_times = []
+    for offset, _ in plan_dispatch(user_ids, lambda user_id: user_id, window):
+        now = max(now, offset)
+        now += bucket.reserve()
+        send_times.append(now)
+    return send_times
+
+
+def simulate_arrivals(
+    send_times: List[float],
+    reaction_mean: float,
+    open_rate: float,
+    requests_per_open: int,
+    seed: int
+) -> List[float]:
+    """Моменты прихода запросов: часть пользователей открывает приложение через случайное время после пуша"""
+    rng = random.Random(seed)
+    arrivals = []
+    for sent_at in send_times:
+        if rng.random() > open_rate:
+            continue
+        opened_at = sent_at + rng.expovariate(1 / reaction_mean)
+        # GET /modules и GET /interval-repetitions почти одновременно
+        arrivals.extend(opened_at + i * 0.05 for i in range(requests_per_open))
+    return arrivals
+
+
+def histogram(arrivals: List[float], bucket_seconds: float) -> Dict[int, int]:
+    return Counter(int(t // bucket_seconds) for t in arrivals)
+
+
+def print_curve(title: str, arrivals: List[float], bucket_seconds: float, width: int = 50) -> None:
+    hist = histogram(arrivals, bucket_seconds)
+    per_second = Counter(int(t) for t in arrivals)
+    peak = max(per_second.values(), default=0)
+    print(f"\n{title}")
+    print(f"  запросов: {len(arrivals)}, пик: {peak} req/s")
+    if not hist:
+        return
+    top = max(hist.values())
+    for index in range(max(hist) + 1):
+        count = hist.get(index, 0)
+        bar = "#" * round(count / top * width) if top else ""
+        start = index * bucket_seconds
+        print(f"  {start:5.0f}-{start + bucket_seconds:5.0f}s | {bar} {count}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000, help="пользователей с карточками к повторению")
+    parser.add_argument("--window", type=float, default=300, help="PUSH_DISPATCH_WINDOW_SECONDS")
+    parser.add_argument("--rate", type=float, default=20, help="PUSH_RATE_LIMIT_PER_SECOND (0 - без лимита)")
+    parser.add_argument("--burst", type=int, default=20, help="PUSH_RATE_LIMIT_BURST")
+    parser.add_argument("--reaction-mean", type=float, default=20, help="среднее время реакции на пуш, с")
+    parser.add_argument("--open-rate", type=float, default=0.3, help="доля пользователей, открывающих приложение")
+    parser.add_argument("--requests-per-open", type=int, default=2)
+    parser.add_argument("--bucket", type=float, default=15, help="ширина столбца гистограммы, с")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    user_ids = list(range(1, args.users + 1))
+
+    baseline = simulate_arrivals(
+        simulate_send_times(user_ids, window=0, rate=0, burst=1),
+        args.reaction_mean, args.open_rate, args.requests_per_open, args.seed
+    )
+    spread = simulate_arrivals(
+        simulate_send_times(user_ids, window=args.window, rate=args.rate, burst=args.burst),
+        args.reaction_mean, args.open_rate, args.requests_per_open, args.seed
+    )
+
+    print_curve("Без растягивания рассылки", baseline, args.bucket)
+    print_curve(
+        f"Окно {args.window:.0f}s, лимит {args.rate:g}/s (burst {args.burst})",
+        spread, args.bucket
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,60 @@
-from fastapi import FastAPI
+import secrets
+import time
+from typing import Optional
+
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, register_pool_metrics, render_metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.timing import ServerTimingMiddleware
+from app.db.database import engine
 from app.services.push_scheduler_service import push_scheduler
 
+_import_seconds = time.perf_counter() - _import_started
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: создаём таблицы при запуске приложения
-    try:
-        from app.db.database import engine
-        from app.models import user, module, card, interval_repetition, module_access
-        
-        user.Base.metadata.create_all(bind=engine)
-        module.Base.metadata.create_all(bind=engine)
-        card.Base.metadata.create_all(bind=engine)
-        interval_repetition.Base.metadata.create_all(bind=engine)
-        module_access.Base.metadata.create_all(bind=engine)
-        print("✅ Database tables created successfully!")
-    except Exception as e:
-        print(f"⚠️  Warning: Could not create database tables: {e}")
-
-    print(f"⏰ Starting push scheduler (interval: {settings.PUSH_INTERVAL_MINUTES}min)...")
-    try:
-        push_scheduler.start()
-        print("✅ Push scheduler started")
-    except Exception as e:
-        print(f"❌ Failed to start push scheduler: {e}")
+    startup_started = time.perf_counter()
+    timings = {"imports": _import_seconds}
+
+    # Startup: создаём таблицы при запуске приложения, если схемой не управляет Alembic
+    if settings.DB_AUTO_CREATE:
+        phase_started = time.perf_counter()
+        try:
+            from app.db.database import Base
+            from app.db.changefeed import ensure_sqlite_changefeed
+            from app.db.fulltext import ensure_sqlite_fulltext
+            from app.models import user, module, card, interval_repetition, module_access  # noqa: F401
+
+            # Все модели висят на одном Base, поэтому достаточно одной проверки схемы
+            Base.metadata.create_all(bind=engine)
+            # Локальная SQLite-база, созданная до появления поиска
+            ensure_sqlite_fulltext(engine)
+            ensure_sqlite_changefeed(engine)
+            print("✅ Database tables created successfully!")
+        except Exception as e:
+            print(f"⚠️  Warning: Could not create database tables: {e}")
+        timings["schema"] = time.perf_counter() - phase_started
+
+    if settings.PUSH_SCHEDULER_ENABLED:
+        phase_started = time.perf_counter()
+        print(f"⏰ Starting push scheduler (interval: {settings.PUSH_INTERVAL_MINUTES}min)...")
+        try:
+            push_scheduler.start()
+            print("✅ Push scheduler started")
+        except Exception as e:
+            print(f"❌ Failed to start push scheduler: {e}")
+        timings["scheduler"] = time.perf_counter() - phase_started
+
+    report = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items())
+    print(f"🚀 Startup finished in {(time.perf_counter() - startup_started + _import_seconds) * 1000:.0f}ms ({report})")
     
     yield
 
@@ -52,6 +78,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latency histograms and per-request SQL accounting for /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    register_pool_metrics(engine)
+
+# On-demand cProfile of single requests (admin header or sampling)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Outermost: Server-Timing headers with per-request SQL and phase timings
+if settings.SERVER_TIMING_ENABLED or settings.QUERY_DEBUG:
+    app.add_middleware(ServerTimingMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
@@ -64,6 +103,22 @@ async def root():
     return {"message": "T-Prep API is running"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """
+    Prometheus metrics.
+
+    Отдаются только при заданном METRICS_TOKEN и с заголовком Authorization: Bearer <token>;
+    nginx дополнительно закрывает /metrics снаружи.
+    """
+    from fastapi.responses import PlainTextResponse
+    if not settings.METRICS_ENABLED or not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Онлайн-перевод interval_repetitions на hash-партиционирование по user_id (PostgreSQL).
+
+Приложение продолжает работать всё время, кроме финальной подмены таблиц
+(одна короткая транзакция под ACCESS EXCLUSIVE блокировкой).
+
+    python scripts/partition_repetitions.py prepare --partitions 16   # таблица-тень и триггер синхронизации
+    python scripts/partition_repetitions.py copy --batch-size 20000 --pause 0.05
+    python scripts/partition_repetitions.py status
+    python scripts/partition_repetitions.py swap                      # старая таблица остаётся как *_retired
+    python scripts/partition_repetitions.py drop-retired
+    python scripts/partition_repetitions.py abort                     # отменить незаконченный перевод
+    python scripts/partition_repetitions.py run --partitions 16       # prepare + copy + swap
+
+copy можно прерывать и запускать снова с --after-id (последний id из лога).
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from app.db import partitioning  # noqa: E402
+# Регистрирует триггеры версий, которые swap переносит на новую таблицу
+from app.models import interval_repetition  # noqa: E402,F401
+
+logger = logging.getLogger("partition_repetitions")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["prepare", "copy", "status", "swap", "drop-retired", "abort", "run"])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    parser.add_argument("--pause", type=float, default=0.0, help="пауза между пачками, с")
+    parser.add_argument("--after-id", type=int, default=0, help="продолжить переливку после этого id")
+    parser.add_argument("--lock-timeout", default="5s", help="сколько ждать блокировку при swap")
+    return parser.parse_args()
+
+
+def prepare(engine, partitions: int) -> None:
+    with engine.begin() as connection:
+        if partitioning.is_partitioned(connection):
+            raise SystemExit("interval_repetitions уже партиционирована")
+        if partitioning.table_exists(connection, partitioning.NEW_TABLE):
+            raise SystemExit(f"{partitioning.NEW_TABLE} уже существует: продолжите copy или выполните abort")
+        partitioning.create_shadow_table(connection, partitions)
+        partitioning.install_sync_trigger(connection)
+    logger.info(f"✅ {partitioning.NEW_TABLE} created with {partitions} partitions, sync trigger installed")
+
+
+def copy(engine, batch_size: int, pause: float, after_id: int) -> None:
+    with engine.connect() as connection:
+        last_id = partitioning.copy_all(connection, batch_size, pause, commit=connection.commit, after_id=after_id)
+    logger.info(f"✅ Copy finished at id {last_id}")
+
+
+def status(engine) -> None:
+    with engine.connect() as connection:
+        print(f"partitioned: {partitioning.is_partitioned(connection)}")
+        for table in (partitioning.TABLE, partitioning.NEW_TABLE, partitioning.OLD_TABLE):
+            if partitioning.table_exists(connection, table):
+                count = connection.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+                print(f"{table:<34}{count:>12}")
+
+
+def swap(engine, lock_timeout: str) -> None:
+    with engine.begin() as connection:
+        # Не вставать в очередь за долгими транзакциями надолго: лучше повторить swap позже
+        connection.execute(text(f"SET LOCAL lock_timeout = '{lock_timeout}'"))
+        partitioning.swap_tables(connection, drop_old=False)
+    logger.info(f"✅ interval_repetitions swapped, previous table kept as {partitioning.OLD_TABLE}")
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not args.database_url:
+        raise SystemExit("Укажите --database-url или DATABASE_URL")
+    engine = create_engine(args.database_url)
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Партиционирование поддерживается только в PostgreSQL")
+
+    if args.command in ("prepare", "run"):
+        prepare(engine, args.partitions)
+    if args.command in ("copy", "run"):
+        copy(engine, args.batch_size, args.pause, args.after_id)
+    if args.command in ("swap", "run"):
+        swap(engine, args.lock_timeout)
+    if args.command == "status":
+        status(engine)
+    if args.command == "drop-retired":
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP TABLE IF EXISTS {partitioning.OLD_TABLE}"))
+    if args.command == "abort":
+        with engine.begin() as connection:
+            partitioning.abort(connection)
+
+
+if __name__ == "__main__":
+    main()
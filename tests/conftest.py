@@ -0,0 +1,11 @@
+import pytest
+
+from app.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_read_cache():
+    # Тесты создают свои БД с теми же id: данные из кэша предыдущего теста им чужие
+    cache.clear()
+    yield
+    cache.clear()
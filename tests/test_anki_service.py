@@ -0,0 +1,135 @@
+import io
+import json
+import sqlite3
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.models import module_access  # noqa: F401
+from app.models.card import Card
+from app.models.interval_repetition import IntervalRepetition, RepetitionState
+from app.models.module import Module
+from app.models.user import User
+from app.services.anki_service import SCHEMA, AnkiService, difficulty_to_factor, factor_to_difficulty
+
+CREATED = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add(User(id=1, name="owner", oidc_sub="owner"))
+        session.add_all([Module(id=1, name="Deck", owner_id=1), Module(id=2, name="Copy", owner_id=1)])
+        session.commit()
+        yield session
+
+
+def _package(tmp_path, name="collection.anki2") -> io.BytesIO:
+    path = tmp_path / "collection.sqlite"
+    collection = sqlite3.connect(path)
+    collection.executescript(SCHEMA)
+    collection.execute(
+        "INSERT INTO col VALUES (1, ?, 0, 0, 11, 0, 0, 0, '{}', '{}', '{}', '{}', '{}')", (int(CREATED.timestamp()),)
+    )
+    notes = [
+        (1, "Capital of France?\x1fParis"),
+        (2, "<b>2 &amp; 2</b><br>=\x1f4"),
+        (3, "Front only\x1f"),
+        (4, "Learning\x1fnow"),
+    ]
+    collection.executemany("INSERT INTO notes VALUES (?, 'g', 1, 0, 0, '', ?, '', 0, 0, '')", notes)
+    # id, nid, ord, type, queue, due, ivl, factor, reps, data
+    cards = [
+        (10, 1, 0, 2, 2, 30, 12, 2500, 5, ""),
+        (11, 1, 1, 0, 0, 1, 0, 0, 0, ""),
+        (20, 2, 0, 2, 2, 3, 4, 1300, 2, json.dumps({"s": 7.5, "d": 6.25})),
+        (30, 3, 0, 0, 0, 2, 0, 0, 0, ""),
+        (40, 4, 0, 1, 1, int(CREATED.timestamp()) + 600, 0, 2500, 1, ""),
+    ]
+    collection.executemany(
+        "INSERT INTO cards VALUES (?, ?, 1, ?, 0, 0, ?, ?, ?, ?, ?, ?, 0, 0, 0, 0, 0, ?)", cards
+    )
+    collection.execute("INSERT INTO revlog VALUES (?, 10, 0, 3, 12, 5, 2500, 0, 1)", (int(CREATED.timestamp()) * 1000,))
+    collection.commit()
+    collection.close()
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as package:
+        package.write(path, name)
+        package.writestr("media", "{}")
+    buffer.seek(0)
+    return buffer
+
+
+def _repetitions(db, module_id):
+    rows = db.query(Card, IntervalRepetition).join(
+        IntervalRepetition, IntervalRepetition.card_id == Card.id
+    ).filter(Card.module_id == module_id).order_by(Card.id).all()
+    return {card.question: repetition for card, repetition in rows}
+
+
+def test_import_maps_notes_and_scheduling(db, tmp_path):
+    result = AnkiService(db).import_package(1, 1, _package(tmp_path))
+
+    assert (result.imported, result.failed, result.repetitions_created) == (3, 1, 3)
+    assert result.errors[0].line == 3
+    repetitions = _repetitions(db, 1)
+    assert set(repetitions) == {"Capital of France?", "2 & 2\n=", "Learning"}
+
+    review = repetitions["Capital of France?"]
+    assert review.state == RepetitionState.Review
+    assert review.stability == 12 and review.difficulty == factor_to_difficulty(2500)
+    assert review.due.replace(tzinfo=timezone.utc) == CREATED + timedelta(days=30)
+    assert review.last_review.replace(tzinfo=timezone.utc) == CREATED
+    # Состояние памяти FSRS из Anki важнее интервала и лёгкости
+    assert (repetitions["2 & 2\n="].stability, repetitions["2 & 2\n="].difficulty) == (7.5, 6.25)
+    learning = repetitions["Learning"]
+    assert learning.state == RepetitionState.Learning
+    assert learning.due.replace(tzinfo=timezone.utc) == CREATED + timedelta(minutes=10)
+
+
+def test_import_without_scheduling_creates_cards_only(db, tmp_path):
+    result = AnkiService(db).import_package(1, 1, _package(tmp_path, "collection.anki21"), include_scheduling=False)
+
+    assert result.imported == 3
+    assert db.query(IntervalRepetition).count() == 0
+
+
+def test_new_format_only_package_is_rejected(db):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as package:
+        package.writestr("collection.anki21b", b"zstd")
+        package.writestr("collection.anki2", b"placeholder")
+    buffer.seek(0)
+
+    with pytest.raises(ValueError, match="2.1.50"):
+        AnkiService(db).import_package(1, 1, buffer)
+
+
+def test_export_round_trips_cards_and_schedule(db, tmp_path):
+    AnkiService(db).import_package(1, 1, _package(tmp_path))
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+
+    path = AnkiService(db).export_package(1, db.get(Module, 1), str(export_dir))
+    with open(path, "rb") as package:
+        AnkiService(db).import_package(1, 2, io.BytesIO(package.read()))
+
+    original, copied = _repetitions(db, 1), _repetitions(db, 2)
+    assert set(copied) == set(original)
+    for question, repetition in original.items():
+        assert copied[question].state == repetition.state
+        assert (copied[question].stability, copied[question].difficulty) == (repetition.stability, repetition.difficulty)
+        assert copied[question].last_review == repetition.last_review
+
+
+def test_factor_and_difficulty_are_inverse():
+    for factor in (1300, 1800, 2500, 3000):
+        assert difficulty_to_factor(factor_to_difficulty(factor)) == factor
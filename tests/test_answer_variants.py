@@ -0,0 +1,94 @@
+import pytest
+from fastapi import Response
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+
+from app.api.endpoints.cards import get_module_cards
+from app.db.database import Base, enable_sqlite_foreign_keys
+from app.models import interval_repetition, module_access  # noqa: F401
+from app.models.card import Card
+from app.models.module import Module
+from app.models.user import User
+from app.services.answer_variants import get_three_answer, session_seed, variant_random
+from app.services.module_cache import invalidate_module
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    enable_sqlite_foreign_keys(engine)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add_all([User(id=1, name="first", oidc_sub="first"), User(id=2, name="second", oidc_sub="second")])
+        session.add(Module(id=1, name="Big", owner_id=1))
+        session.add_all([Card(id=i, module_id=1, question=f"q{i}", answer=f"a{i}") for i in range(1, 101)])
+        session.commit()
+        yield session
+
+
+def _page(db, seed=None, user_id=1, etag=None):
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+    response = Response()
+    page = get_module_cards(
+        module_id=1, request=request, response=response, skip=0, take=5, after_id=None, seed=seed,
+        current_user=db.get(User, user_id), db=db
+    )
+    return page, response
+
+
+def _variants(page):
+    return [(card.answer_variant, card.right_answer) for card in page.items]
+
+
+def test_right_answer_is_always_among_variants():
+    answers = [f"Answer {index}" for index in range(1000)]
+
+    for card in range(200):
+        variants, right = get_three_answer(answers, "Right", variant_random("seed", 1, card))
+        assert variants[right] == "Right"
+        assert len(variants) == len(set(variants)) == 4
+
+
+def test_duplicate_answers_do_not_repeat_variants():
+    variants, right = get_three_answer(["yes", "no", "no", "yes", "no"], "yes", variant_random("seed", 1, 1))
+
+    assert sorted(variants) == ["no", "yes"]
+    assert variants[right] == "yes"
+    assert get_three_answer([], "only") == (["only"], 0)
+
+
+def test_same_seed_gives_same_variants():
+    answers = [f"Answer {index}" for index in range(1000)]
+
+    first = get_three_answer(answers, answers[5], variant_random("session", 1, 5))
+    again = get_three_answer(answers, answers[5], variant_random("session", 1, 5))
+    others = {tuple(get_three_answer(answers, answers[5], variant_random(seed, 1, 5))[0]) for seed in "abcdefgh"}
+
+    assert first == again
+    assert len(others) > 1
+
+
+def test_default_seed_is_current_day():
+    assert session_seed("session") == "session"
+    assert session_seed(None) == session_seed("")
+
+
+def test_page_is_stable_for_seed_and_revalidates(db):
+    page, response = _page(db, seed="session")
+    again, _ = _page(db, seed="session")
+    assert _variants(page) == _variants(again)
+    assert _variants(page) != _variants(_page(db, seed="other")[0])
+    assert _variants(page) != _variants(_page(db, seed="session", user_id=2)[0])
+
+    cached, _ = _page(db, seed="session", etag=response.headers["ETag"])
+    assert cached.status_code == 304
+
+    db.get(Card, 3).answer = "changed"
+    db.commit()
+    invalidate_module(1)
+    page, _ = _page(db, seed="session", etag=response.headers["ETag"])
+    assert not isinstance(page, Response)
+    assert "changed" in page.items[2].answer_variant
@@ -0,0 +1,277 @@
+import asyncio
+import io
+import json
+import threading
+import time
+
+import pytest
+from fastapi import Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+
+from app.api.endpoints.cards import create_card, get_module_cards
+from app.api.endpoints.modules import router as modules_router, update_module
+from app.core.cache import MISSING, LocalCache, MemorySharedCache, SharedCache, TwoTierCache
+from app.db.database import Base, enable_sqlite_foreign_keys
+from app.models.card import Card
+from app.models.module import Module
+from app.models.module_access import AccessLevel, ModuleAccess
+from app.models.user import User
+from app.services.module_cache import ModuleCache
+from app.schemas.card import CreateCardRequest
+from app.schemas.module import AccessLevel as SchemaAccessLevel, ModuleUpdate
+from app.services.export_service import ExportService
+
+
+def _two_tier(shared=None, local_ttl=5):
+    return TwoTierCache(LocalCache(100), shared, local_ttl=local_ttl, shared_ttl=60)
+
+
+class BrokenSharedCache(SharedCache):
+    name = "broken"
+
+    def get_many(self, keys):
+        raise ConnectionError("connection refused")
+
+    def set_many(self, items, ttl):
+        raise ConnectionError("connection refused")
+
+
+def test_local_cache_evicts_least_recently_used_and_expired():
+    local = LocalCache(2)
+    local.set("a", 1, ttl=60)
+    local.set("b", 2, ttl=60)
+    local.get("a")
+    local.set("c", 3, ttl=60)
+
+    assert (local.get("a"), local.get("b"), local.get("c")) == (1, MISSING, 3)
+
+    local.set("old", 4, ttl=-1)
+    assert local.get("old") is MISSING
+    assert len(local) == 1
+
+
+def test_workers_share_values_and_see_invalidation():
+    shared = MemorySharedCache()
+    first, second = _two_tier(shared, local_ttl=0), _two_tier(shared, local_ttl=0)
+    loads = []
+
+    def loader(value):
+        return lambda: loads.append(value) or value
+
+    assert first.get_or_load(first.key("module:1", "summary"), loader("v1"), "module") == "v1"
+    assert second.get_or_load(second.key("module:1", "summary"), loader("v1"), "module") == "v1"
+    assert loads == ["v1"]
+
+    first.invalidate("module:1")
+    assert second.get_or_load(second.key("module:1", "summary"), loader("v2"), "module") == "v2"
+    assert first.get_or_load(first.key("module:1", "summary"), loader("v3"), "module") == "v2"
+    assert loads == ["v1", "v2"]
+
+
+def test_local_only_cache_invalidates_in_process():
+    cache = _two_tier()
+    assert cache.get_or_load(cache.key("catalog", "modules"), lambda: [1], "catalog") == [1]
+    assert cache.get_or_load(cache.key("catalog", "modules"), lambda: [2], "catalog") == [1]
+
+    cache.invalidate("catalog")
+
+    assert cache.get_or_load(cache.key("catalog", "modules"), lambda: [2], "catalog") == [2]
+
+
+def test_concurrent_misses_load_once():
+    cache = _two_tier(MemorySharedCache())
+    loads, results = [], []
+    started = threading.Barrier(8)
+
+    def slow_loader():
+        loads.append(1)
+        time.sleep(0.1)
+        return {"cards": 10}
+
+    def read():
+        started.wait()
+        results.append(cache.get_or_load("module:1@0:summary", slow_loader, "module"))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert results == [{"cards": 10}] * 8
+
+
+def test_unavailable_shared_tier_falls_back_to_loader():
+    cache = _two_tier(BrokenSharedCache())
+
+    assert cache.get_or_load(cache.key("module:1", "summary"), lambda: "db", "module") == "db"
+    cache.invalidate("module:1")
+    assert cache.get_or_load(cache.key("module:1", "summary"), lambda: "db", "module") == "db"
+
+
+def _populate(engine):
+    enable_sqlite_foreign_keys(engine)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add_all([User(id=1, name="author", oidc_sub="author"), User(id=2, name="reader", oidc_sub="reader")])
+        session.add_all([Module(id=1, name="Popular", owner_id=1), Module(id=2, name="Other", owner_id=2)])
+        session.add_all([
+            ModuleAccess(module_id=1, owner_id=1, view_access=AccessLevel.ALL_USERS.value,
+                         edit_access=AccessLevel.ONLY_ME.value),
+            ModuleAccess(module_id=2, owner_id=2, view_access=AccessLevel.ALL_USERS.value,
+                         edit_access=AccessLevel.ONLY_ME.value),
+        ])
+        session.add_all([Card(module_id=1, question=f"q{i}", answer=f"a{i}") for i in range(100)])
+        session.commit()
+    return engine
+
+
+@pytest.fixture
+def db():
+    engine = _populate(create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool))
+    with Session(engine) as session:
+        yield session
+
+
+list_modules = next(route.endpoint for route in modules_router.routes if route.path == "/" and "GET" in route.methods)
+get_module = next(route.endpoint for route in modules_router.routes if route.path == "/{module_id}")
+
+
+def _request():
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+
+
+def _statements(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def _cards(db, user_id=2, take=10):
+    return get_module_cards(
+        module_id=1, request=_request(), response=Response(), skip=0, take=take, after_id=None, seed="s",
+        current_user=db.get(User, user_id), db=db
+    )
+
+
+def _catalog(db, user_id):
+    return list_modules(
+        request=_request(), response=Response(), skip=0, take=10, search_string=None,
+        filter=SchemaAccessLevel.ALL_USERS, current_user=db.get(User, user_id), db=db
+    )
+
+
+def test_warm_card_page_reads_only_the_version(db):
+    first = _cards(db)
+    reader = db.get(User, 2)
+    statements = _statements(db)
+
+    again = _cards(db)
+
+    assert again == first
+    assert len(statements) == 1
+    assert reader.id == 2
+
+
+def test_card_mutation_refreshes_cached_page(db):
+    assert _cards(db, take=100).total_count == 100
+
+    asyncio.run(create_card(
+        module_id=1, card=CreateCardRequest(question="new", answer="new"), current_user=db.get(User, 1), db=db
+    ))
+
+    assert _cards(db, take=100).total_count == 101
+
+
+def test_warm_module_detail_reads_only_the_version(db):
+    first = get_module(
+        module_id=1, request=_request(), response=Response(), filter=SchemaAccessLevel.ONLY_ME,
+        current_user=db.get(User, 2), db=db
+    )
+    reader = db.get(User, 2)
+    statements = _statements(db)
+
+    again = get_module(
+        module_id=1, request=_request(), response=Response(), filter=SchemaAccessLevel.ONLY_ME,
+        current_user=reader, db=db
+    )
+
+    assert again == first
+    assert first.TotalCards == 100
+    assert len(statements) == 1
+
+
+def test_catalog_is_shared_but_hides_own_modules(db):
+    assert [module.id for module in _catalog(db, 1).items] == [2]
+    assert [module.id for module in _catalog(db, 2).items] == [1]
+
+    asyncio.run(update_module(
+        module_id=1, module_update=ModuleUpdate(ViewAccess=SchemaAccessLevel.ONLY_ME),
+        current_user=db.get(User, 1), db=db
+    ))
+
+    page = _catalog(db, 2)
+    assert page.items == []
+    assert page.total_count == 0
+
+
+def test_card_page_follows_content_version_without_invalidation(db):
+    assert "edited" not in _cards(db).items[0].answer_variant
+
+    # Изменение мимо invalidate_module (как пачки фонового удаления): версия новая - страница тоже
+    db.query(Card).filter(Card.module_id == 1).order_by(Card.id).first().answer = "edited"
+    db.commit()
+
+    assert "edited" in _cards(db).items[0].answer_variant
+
+
+def test_restored_public_module_appears_in_cached_catalog(db):
+    assert [module.id for module in _catalog(db, 2).items] == [1]
+
+    export = "\n".join(json.dumps(record) for record in [
+        {"type": "export", "version": 1},
+        {"type": "module", "id": 7, "name": "Restored"},
+        {"type": "module_access", "module_id": 7, "view_access": "all_users", "edit_access": "only_me"},
+    ])
+    ExportService(db).restore(1, io.BytesIO(export.encode()))
+
+    assert [module.name for module in _catalog(db, 2).items] == ["Popular", "Restored"]
+
+
+def test_concurrent_card_page_misses_load_once(tmp_path, monkeypatch):
+    # Синхронный эндпоинт: FastAPI выполняет его в пуле потоков, где работает single-flight
+    assert not asyncio.iscoroutinefunction(get_module_cards)
+    engine = _populate(create_engine(f"sqlite:///{tmp_path / 'cache.db'}", connect_args={"check_same_thread": False}))
+    loads, pages = [], []
+    load_card_page = ModuleCache._load_card_page
+
+    def slow_load(self, *args):
+        loads.append(args)
+        time.sleep(0.1)
+        return load_card_page(self, *args)
+
+    monkeypatch.setattr(ModuleCache, "_load_card_page", slow_load)
+    started = threading.Barrier(8)
+
+    def read():
+        with Session(engine) as session:
+            reader = session.get(User, 2)
+            started.wait()
+            pages.append(get_module_cards(
+                module_id=1, request=_request(), response=Response(), skip=0, take=10, after_id=None, seed="s",
+                current_user=reader, db=session
+            ))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert len(pages) == 8 and all(page == pages[0] for page in pages)
@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.db.database import Base
+from app.models import module_access  # noqa: F401
+from app.models.card import Card
+from app.models.interval_repetition import IntervalRepetition
+from app.models.module import Module
+from app.models.user import User
+from app.services.card_import_service import CardImportService, detect_format, parse_rows
+from app.services.repetition_service import RepetitionService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add(User(id=1, name="owner", oidc_sub="owner"))
+        session.add(Module(id=1, name="Deck", owner_id=1))
+        session.commit()
+        yield session
+
+
+def _rows(content: str, file_format: str):
+    return list(parse_rows(io.BytesIO(content.encode("utf-8")), file_format))
+
+
+def test_csv_header_is_optional_and_columns_follow_it():
+    with_header = _rows("﻿answer,question\nA1,Q1\n", "csv")
+    without_header = _rows('Q1,A1\n"Q2, with comma",A2\n', "csv")
+
+    assert with_header == [(2, ("Q1", "A1"), None)]
+    assert [card for _, card, _ in without_header] == [("Q1", "A1"), ("Q2, with comma", "A2")]
+
+
+def test_invalid_rows_are_reported_by_line():
+    tsv = _rows("Q1\tA1\nonly question\n\t \n", "tsv")
+    ndjson = _rows('{"question": "Q", "answer": "A"}\n{broken\n[1]\n{"question": "Q"}\n', "ndjson")
+
+    assert [(line, error is None) for line, _, error in tsv] == [(1, True), (2, False)]
+    assert [line for line, _, error in ndjson if error] == [2, 3, 4]
+
+
+def test_format_from_parameter_or_extension():
+    assert detect_format("deck.jsonl") == "ndjson"
+    assert detect_format("deck.bin", "tsv") == "tsv"
+    with pytest.raises(ValueError):
+        detect_format("deck.bin")
+
+
+def test_import_writes_batches_and_creates_repetitions(db, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 7)
+    db.add(Card(module_id=1, question="old", answer="old"))
+    db.commit()
+    RepetitionService(db).enable_interval_repetitions(1, 1)
+
+    content = "\n".join(json.dumps({"question": f"q{i}", "answer": f"a{i}"}) for i in range(20)) + "\n{}\n"
+    result = CardImportService(db).import_cards(1, io.BytesIO(content.encode()), "ndjson")
+
+    assert (result.imported, result.failed, result.repetitions_created) == (20, 1, 20)
+    assert db.query(Card).count() == 21
+    assert db.query(IntervalRepetition).filter(IntervalRepetition.user_id == 1).count() == 21
+
+
+def test_import_without_repetitions_enabled_creates_none(db):
+    result = CardImportService(db).import_cards(1, io.BytesIO(b"q,a\n"), "csv")
+
+    assert (result.imported, result.repetitions_created) == (1, 0)
+    assert db.query(IntervalRepetition).count() == 0
+
+
+def test_import_rejects_non_utf8(db):
+    with pytest.raises(ValueError):
+        CardImportService(db).import_cards(1, io.BytesIO("вопрос,ответ\n".encode("cp1251")), "csv")
+    assert db.query(Card).count() == 0
+
+
+def test_oversized_csv_field_is_a_row_error(db):
+    content = f"question,answer\nq1,a1\nq2,{'x' * 200_000}\nq3,a3\n"
+
+    result = CardImportService(db).import_cards(1, io.BytesIO(content.encode()), "csv")
+
+    assert (result.imported, result.failed) == (2, 1)
+    assert result.errors[0].line == 3
+    assert db.query(Card).count() == 2
+
+
+def test_csv_limit_follows_max_field_length(monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_MAX_FIELD_LENGTH", 300_000)
+    long_answer = "y" * 200_000
+    # Лимит модуля csv общий для процесса: возвращаем его для остальных тестов
+    limit = csv.field_size_limit()
+    try:
+        rows = _rows(f"q,{long_answer}\n", "csv")
+    finally:
+        csv.field_size_limit(limit)
+
+    assert rows == [(1, ("q", long_answer), None)]
@@ -0,0 +1,64 @@
+import pytest
+from fastapi import Response
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+
+from app.api.endpoints.cards import get_module_cards
+from app.db.database import Base
+from app.models import interval_repetition, module_access  # noqa: F401
+from app.models.card import Card
+from app.models.module import Module
+from app.models.user import User
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        user = User(id=1, name="owner", oidc_sub="owner")
+        session.add(user)
+        session.add(Module(id=1, name="Big", owner_id=1))
+        session.add_all([Card(module_id=1, question=f"q{i}", answer=f"a{i}") for i in range(200)])
+        session.commit()
+        yield session
+
+
+def _page(db, skip=0, take=10, after_id=None):
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+    return get_module_cards(
+        module_id=1, request=request, response=Response(), skip=skip, take=take, after_id=after_id, seed=None,
+        current_user=db.get(User, 1), db=db
+    )
+
+
+def test_page_has_take_items_and_real_total(db):
+    page = _page(db, skip=20, take=10)
+
+    assert [card.question for card in page.items] == [f"q{i}" for i in range(20, 30)]
+    assert page.total_count == 200
+
+
+def test_keyset_pages_cover_module_once(db):
+    seen, after_id = [], None
+    while True:
+        page = _page(db, take=64, after_id=after_id)
+        seen.extend(card.question for card in page.items)
+        if page.next_after_id is None:
+            break
+        after_id = page.next_after_id
+
+    assert seen == [f"q{i}" for i in range(200)]
+
+
+def test_page_variants_draw_distractors_from_module(db):
+    # На странице одна карточка - остальные три варианта приходят из пула ответов модуля
+    page = _page(db, take=1)
+
+    for card in page.items:
+        assert len(card.answer_variant) == 4
+        assert len(set(card.answer_variant)) == 4
+        assert 0 <= card.right_answer < 4
+    assert len(page.items) == 1
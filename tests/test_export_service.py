@@ -0,0 +1,92 @@
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.models.card import Card
+from app.models.interval_repetition import IntervalRepetition, RepetitionState
+from app.models.module import Module
+from app.models.module_access import AccessLevel, ModuleAccess
+from app.models.user import User
+from app.services import export_service
+from app.services.export_service import ExportService, export_stream
+
+DUE = datetime(2026, 11, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add_all([User(id=1, name="owner", oidc_sub="owner"), User(id=2, name="other", oidc_sub="other")])
+        db.add_all([Module(id=1, name="Mine", description="d", owner_id=1), Module(id=2, name="Theirs", owner_id=2)])
+        db.add_all([
+            ModuleAccess(module_id=1, owner_id=1, view_access=AccessLevel.ALL_USERS.value,
+                         edit_access=AccessLevel.ONLY_ME.value),
+            ModuleAccess(module_id=2, owner_id=2, view_access=AccessLevel.ALL_USERS.value,
+                         edit_access=AccessLevel.ONLY_ME.value),
+        ])
+        db.add_all([Card(id=i, module_id=1, question=f"q{i}", answer=f"a{i}") for i in range(1, 6)])
+        db.add(Card(id=10, module_id=2, question="foreign", answer="card"))
+        db.add_all([
+            IntervalRepetition(user_id=1, module_id=1, card_id=i, state=RepetitionState.Review, step=2,
+                               stability=3.5, difficulty=4.0, due=DUE, last_review=DUE)
+            for i in range(1, 6)
+        ])
+        # Повторения по чужому модулю в экспорт не попадают
+        db.add(IntervalRepetition(user_id=1, module_id=2, card_id=10, state=RepetitionState.Learning,
+                                  step=0, stability=0.5, difficulty=0.3, due=DUE))
+        db.commit()
+    return factory
+
+
+def _records(factory, user_id=1, compress=False):
+    data = b"".join(export_stream(factory, user_id, compress=compress))
+    if compress:
+        data = gzip.decompress(data)
+    return data, [json.loads(line) for line in data.splitlines()]
+
+
+def test_export_contains_only_own_modules(factory, monkeypatch):
+    # Маленькие куски: ответ действительно собирается из нескольких частей
+    monkeypatch.setattr(export_service, "CHUNK_BYTES", 100)
+    chunks = list(export_stream(factory, 1))
+    _, records = _records(factory)
+
+    assert len(chunks) > 1
+    assert [record["type"] for record in records].count("card") == 5
+    assert {record["module_id"] for record in records if "module_id" in record} == {1}
+    assert records[0] == {**records[0], "type": "export", "version": 1}
+
+
+def test_gzip_export_restores_as_new_modules(factory):
+    compressed = b"".join(export_stream(factory, 1, compress=True))
+
+    with factory() as db:
+        result = ExportService(db).restore(2, io.BytesIO(compressed))
+        assert (result.modules, result.cards, result.repetitions) == (1, 5, 5)
+
+        module = db.query(Module).filter(Module.owner_id == 2, Module.name == "Mine").one()
+        assert module.id != 1
+        assert module.access[0].view_access == AccessLevel.ALL_USERS.value
+        restored = db.query(IntervalRepetition).filter(IntervalRepetition.module_id == module.id).all()
+        assert {repetition.card.question for repetition in restored} == {f"q{i}" for i in range(1, 6)}
+        assert all(repetition.user_id == 2 and repetition.stability == 3.5 for repetition in restored)
+
+
+def test_broken_reference_rolls_back_everything(factory):
+    data, _ = _records(factory)
+    broken = data + json.dumps({"type": "card", "id": 99, "module_id": 42, "question": "q", "answer": "a"}).encode()
+
+    with factory() as db:
+        with pytest.raises(ValueError, match="Line"):
+            ExportService(db).restore(2, io.BytesIO(broken))
+        assert db.query(Module).filter(Module.owner_id == 2).count() == 1
@@ -0,0 +1,188 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+
+from app.api.endpoints.cards import get_card
+from app.api.endpoints.modules import get_user_modules, router as modules_router
+from app.core.http_cache import etag_matches
+from app.db.database import Base, enable_sqlite_foreign_keys
+from app.models.card import Card
+from app.models.interval_repetition import IntervalRepetition
+from app.models.module import Module
+from app.models.module_access import AccessLevel, ModuleAccess
+from app.models.user import User
+from app.schemas.module import AccessLevel as SchemaAccessLevel
+from app.services.module_cache import invalidate_module
+from app.services.module_service import ModuleService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    enable_sqlite_foreign_keys(engine)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add_all([User(id=1, name="author", oidc_sub="author"), User(id=2, name="reader", oidc_sub="reader")])
+        session.add_all([Module(id=1, name="Public", owner_id=1), Module(id=2, name="Private", owner_id=1)])
+        session.add_all([
+            ModuleAccess(module_id=1, owner_id=1, view_access=AccessLevel.ALL_USERS.value,
+                         edit_access=AccessLevel.ONLY_ME.value),
+            ModuleAccess(module_id=2, owner_id=1, view_access=AccessLevel.ONLY_ME.value,
+                         edit_access=AccessLevel.ONLY_ME.value),
+        ])
+        session.add_all([Card(id=card_id, module_id=1, question=f"q{card_id}", answer=f"a{card_id}") for card_id in range(1, 4)])
+        session.add(Card(id=4, module_id=2, question="q4", answer="a4"))
+        session.commit()
+        yield session
+
+
+# Оба обработчика модулей называются get_user_modules: список берём из маршрута
+list_modules = next(route.endpoint for route in modules_router.routes if route.path == "/" and "GET" in route.methods)
+
+
+def _request(etag=None):
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+
+
+def _module(db, etag=None, user_id=1, module_id=1):
+    response = Response()
+    user = db.get(User, user_id)
+    result = get_user_modules(
+        module_id=module_id, request=_request(etag), response=response,
+        filter=SchemaAccessLevel.ONLY_ME, current_user=user, db=db
+    )
+    return result, response
+
+
+def _modules(db, etag=None):
+    response = Response()
+    result = list_modules(
+        request=_request(etag), response=response, skip=0, take=10, search_string=None,
+        filter=SchemaAccessLevel.ONLY_ME, current_user=db.get(User, 1), db=db
+    )
+    return result, response
+
+
+def _card(db, card_id, etag=None, module_id=1):
+    response = Response()
+    result = asyncio.run(get_card(
+        module_id=module_id, card_id=card_id, request=_request(etag), response=response,
+        current_user=db.get(User, 2), db=db
+    ))
+    return result, response
+
+
+def test_if_none_match_parsing():
+    assert etag_matches(_request('W/"abc"'), 'W/"abc"')
+    assert etag_matches(_request('"abc"'), 'W/"abc"')
+    assert etag_matches(_request('W/"old", W/"abc"'), 'W/"abc"')
+    assert etag_matches(_request("*"), 'W/"abc"')
+    assert not etag_matches(_request('W/"old"'), 'W/"abc"')
+    assert not etag_matches(_request(), 'W/"abc"')
+
+
+def test_unchanged_module_is_answered_with_single_query(db):
+    module, response = _module(db)
+    etag = response.headers["ETag"]
+    assert module.TotalCards == 3
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    # Пользователь уже в сессии, как после get_current_active_user
+    author = db.get(User, 1)
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    cached, _ = _module(db, etag)
+
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert len(statements) == 1
+    assert author.id == 1
+
+
+@pytest.mark.parametrize("change", ["module", "access", "card_added", "card_edited", "card_deleted"])
+def test_module_etag_follows_module_changes(db, change):
+    _, response = _module(db)
+    etag = response.headers["ETag"]
+
+    if change == "module":
+        db.get(Module, 1).description = "new"
+    elif change == "access":
+        db.query(ModuleAccess).filter(ModuleAccess.module_id == 1).one().edit_access = AccessLevel.ALL_USERS.value
+    elif change == "card_added":
+        db.add(Card(module_id=1, question="q", answer="a"))
+    elif change == "card_edited":
+        db.get(Card, 2).answer = "changed"
+    else:
+        db.delete(db.get(Card, 3))
+    db.commit()
+
+    result, response = _module(db, etag)
+    assert not isinstance(result, Response)
+    assert response.headers["ETag"] != etag
+
+
+def test_module_versions_follow_users_review_state(db):
+    service = ModuleService(db)
+    before = service.versions([1], user_id=2)[1]
+    assert service.versions([1], user_id=1)[1] == before
+
+    repetition = IntervalRepetition(user_id=2, module_id=1, card_id=1, due=datetime.now(timezone.utc) + timedelta(hours=1))
+    db.add(repetition)
+    db.commit()
+    enabled = service.versions([1], user_id=2)[1]
+    assert enabled != before
+
+    # Карточка стала к повторению со временем - без изменения строк
+    repetition.due = datetime.now(timezone.utc) - timedelta(minutes=1)
+    db.commit()
+    assert service.versions([1], user_id=2)[1] != enabled
+    assert service.versions([1], user_id=1)[1] == before
+
+
+def test_module_list_revalidates(db):
+    page, response = _modules(db)
+    etag = response.headers["ETag"]
+    assert page.total_count == 2
+
+    cached, _ = _modules(db, etag)
+    assert cached.status_code == 304
+
+    db.get(Module, 2).name = "Renamed"
+    db.commit()
+    invalidate_module(2, catalog=True)
+    page, response = _modules(db, etag)
+    assert [module.name for module in page.items] == ["Public", "Renamed"]
+    assert response.headers["ETag"] != etag
+
+
+def test_public_card_is_cacheable_by_proxy(db):
+    card, response = _card(db, 1)
+    assert card.question == "q1"
+    assert response.headers["Cache-Control"] == "public, max-age=0, s-maxage=5"
+
+    cached, _ = _card(db, 1, response.headers["ETag"])
+    assert cached.status_code == 304
+    assert cached.headers["Cache-Control"] == "public, max-age=0, s-maxage=5"
+
+    _, private = _card(db, 4, module_id=2)
+    assert private.headers["Cache-Control"] == "private, no-cache"
+
+
+def test_edited_card_gets_new_etag(db):
+    _, response = _card(db, 1)
+    etag = response.headers["ETag"]
+
+    db.get(Card, 1).question = "changed"
+    db.commit()
+
+    card, response = _card(db, 1, etag)
+    assert card.question == "changed"
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,53 @@
+import pytest
+
+from app.core.metrics import Counter, Histogram, Metric, REGISTRY
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry():
+    saved = list(REGISTRY)
+    yield
+    REGISTRY[:] = saved
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency_seconds", "Test latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, "/api/v1/modules/")
+
+    lines = histogram.collect()
+
+    assert 'test_latency_seconds_bucket{route="/api/v1/modules/",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="/api/v1/modules/",le="1.0"} 3' in lines
+    assert 'test_latency_seconds_bucket{route="/api/v1/modules/",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_count{route="/api/v1/modules/"} 4' in lines
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("test_total", "Test counter", ("outcome",))
+    counter.inc('say "hi"', amount=2)
+
+    assert 'test_total{outcome="say \\"hi\\""} 2.0' in counter.collect()
+
+
+def test_incomplete_metric_cannot_be_created():
+    class Incomplete(Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("test_incomplete", "Incomplete metric")
+
+
+def test_send_outcomes_are_fixed_labels():
+    from app.services.push_service import PushNotificationService
+    from app.services.push_transport import FakeFCMTransport
+    from app.core.metrics import push_sends
+
+    service = PushNotificationService(transport=FakeFCMTransport(unregistered_tokens={"dead"}))
+    service.send_push("", "title", "body")
+    service.send_push("dead", "title", "body")
+    service.send_push("live", "title", "body")
+
+    outcomes = {labels[0] for labels in push_sends._values}
+    assert {"empty_token", "unregistered", "sent"} <= outcomes
+    assert outcomes <= {"sent", "not_initialized", "empty_token", "unregistered", "error"}
@@ -0,0 +1,113 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base, enable_sqlite_foreign_keys
+from app.models.card import Card
+from app.models.interval_repetition import IntervalRepetition
+from app.models.module import Module
+from app.models.module_access import AccessLevel, ModuleAccess
+from app.models.user import User
+from app.services.module_service import ModuleService, delete_module_in_batches
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    enable_sqlite_foreign_keys(engine)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add_all([User(id=1, name="author", oidc_sub="author"), User(id=2, name="reader", oidc_sub="reader")])
+        session.add_all([
+            Module(id=1, name="Public", description="shared", owner_id=1),
+            Module(id=2, name="Private", owner_id=1),
+        ])
+        session.add_all([
+            ModuleAccess(module_id=1, owner_id=1, view_access=AccessLevel.ALL_USERS.value,
+                         edit_access=AccessLevel.ONLY_ME.value),
+            ModuleAccess(module_id=2, owner_id=1, view_access=AccessLevel.ONLY_ME.value,
+                         edit_access=AccessLevel.ONLY_ME.value),
+        ])
+        session.add_all([Card(module_id=1, question=f"q{i}", answer=f"a{i}") for i in range(500)])
+        session.commit()
+        yield session
+
+
+def test_clone_copies_cards_inside_database(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    clone = ModuleService(db).clone_module(1, 2, view_access=AccessLevel.ONLY_ME, enable_repetitions=True)
+    clone_statements = list(statements)
+
+    assert (clone.owner_id, clone.name, clone.description) == (2, "Public", "shared")
+    assert clone.access[0].view_access == AccessLevel.ONLY_ME.value
+    assert clone.access[0].edit_access == AccessLevel.ONLY_ME.value
+    questions = [card.question for card in db.query(Card).filter(Card.module_id == clone.id).order_by(Card.id)]
+    assert questions == [f"q{i}" for i in range(500)]
+    assert db.query(IntervalRepetition).filter(
+        IntervalRepetition.user_id == 2, IntervalRepetition.module_id == clone.id
+    ).count() == 500
+    # Ни одного SELECT, который вытаскивал бы карточки в Python
+    assert not [s for s in clone_statements if s.lstrip().startswith("SELECT") and "FROM cards" in s]
+
+
+def test_private_module_of_another_user_is_not_cloned(db):
+    assert ModuleService(db).clone_module(2, 2) is None
+    assert ModuleService(db).clone_module(2, 1).name == "Private"
+
+
+def _enroll(db, user_id, module_id):
+    now = datetime.now(timezone.utc)
+    cards = db.query(Card.id).filter(Card.module_id == module_id).all()
+    db.add_all([
+        IntervalRepetition(user_id=user_id, module_id=module_id, card_id=card_id, due=now)
+        for (card_id,) in cards
+    ])
+    db.commit()
+
+
+def test_delete_is_cascaded_by_database(db):
+    _enroll(db, 2, 1)
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    ModuleService(db).delete_module(1)
+
+    assert [statement.split()[0] for statement in statements] == ["DELETE"]
+    assert db.query(Card).count() == 0
+    assert db.query(IntervalRepetition).count() == 0
+    assert db.query(ModuleAccess).filter(ModuleAccess.module_id == 1).count() == 0
+
+
+def test_deleting_loaded_card_does_not_load_repetitions(db):
+    _enroll(db, 2, 1)
+    card = db.query(Card).filter(Card.module_id == 1).first()
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    db.delete(card)
+    db.commit()
+
+    assert not [statement for statement in statements if "interval_repetitions" in statement]
+    assert db.query(IntervalRepetition).count() == 499
+
+
+def test_background_deletion_runs_in_batches(db):
+    _enroll(db, 2, 1)
+    deletes = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statement.startswith("DELETE") and deletes.append(statement))
+
+    delete_module_in_batches(sessionmaker(bind=db.get_bind()), 1, batch_size=200)
+
+    # 500 повторений и 500 карточек пачками по 200, затем модуль и их 1000 надгробий
+    assert len(deletes) == 3 + 3 + 1 + 6
+    assert db.query(Module).filter(Module.id == 1).count() == 0
+    assert db.query(Card).count() == 0
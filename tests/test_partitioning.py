@@ -0,0 +1,79 @@
+"""Онлайн-партиционирование interval_repetitions; нужен TEST_DATABASE_URL=postgresql://... (таблица будет изменена)"""
+import os
+from argparse import Namespace
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.db import partitioning
+from app.db.database import Base
+from app.models import card, interval_repetition, module, module_access, user  # noqa: F401
+from benchmarks.seed_dataset import Buffers, CopyWriter, generate, id_offsets
+
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+
+pytestmark = pytest.mark.skipif(
+    not DATABASE_URL.startswith("postgresql"), reason="partitioning needs TEST_DATABASE_URL with PostgreSQL"
+)
+
+SEED = Namespace(
+    users=50, modules_per_user=2, cards_per_module=20, big_modules=0, big_module_cards=0,
+    public_share=0.2, enrolled_share=1.0, learners_per_public_module=1, push_share=0.5, seed=11
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    writer = CopyWriter(engine)
+    buffers = Buffers(writer, chunk_size=10_000)
+    try:
+        generate(buffers, SEED, id_offsets(engine))
+        buffers.flush()
+    finally:
+        writer.close()
+    yield engine
+    # Возвращаем обычную таблицу тем же путём, что и downgrade миграции c58e0b3a9d17
+    with engine.begin() as connection:
+        partitioning.abort(connection)
+        connection.execute(text(f"DROP TABLE IF EXISTS {partitioning.OLD_TABLE}"))
+        if partitioning.is_partitioned(connection):
+            partitioning.create_shadow_table(connection, partitions=None)
+            partitioning.copy_all(connection, batch_size=10_000)
+            partitioning.swap_tables(connection, drop_old=True)
+    engine.dispose()
+
+
+def test_online_partitioning_keeps_concurrent_writes(engine):
+    with engine.begin() as connection:
+        partitioning.create_shadow_table(connection, partitions=4)
+        partitioning.install_sync_trigger(connection)
+        first_id, user_id = connection.execute(text("SELECT MIN(id), MIN(user_id) FROM interval_repetitions")).one()
+
+    with engine.connect() as connection:
+        partitioning.copy_batch(connection, 0, 100)
+        connection.commit()
+        # Изменения во время переливки: и в уже скопированной части, и в ещё не скопированной
+        connection.execute(text("UPDATE interval_repetitions SET step = 99 WHERE id = :id"), {"id": first_id})
+        connection.execute(text("DELETE FROM interval_repetitions WHERE id = (SELECT MAX(id) FROM interval_repetitions)"))
+        connection.commit()
+        partitioning.copy_all(connection, batch_size=500, commit=connection.commit)
+
+    with engine.begin() as connection:
+        partitioning.swap_tables(connection, drop_old=False)
+
+    with engine.connect() as connection:
+        assert partitioning.is_partitioned(connection)
+        assert connection.execute(text(
+            f"SELECT COUNT(*) FROM interval_repetitions FULL JOIN {partitioning.OLD_TABLE} USING (id) "
+            f"WHERE interval_repetitions.id IS NULL OR {partitioning.OLD_TABLE}.id IS NULL"
+        )).scalar() == 0
+        assert connection.execute(
+            text("SELECT step FROM interval_repetitions WHERE id = :id"), {"id": first_id}
+        ).scalar() == 99
+
+        plan = connection.execute(text(
+            "EXPLAIN (FORMAT JSON) SELECT * FROM interval_repetitions WHERE user_id = :user_id"
+        ), {"user_id": user_id}).scalar()
+        assert str(plan).count("interval_repetitions_p") == 1
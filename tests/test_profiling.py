@@ -0,0 +1,69 @@
+import asyncio
+import cProfile
+
+from app.core.config import settings
+from app.core.profiling import ProfileStore, ProfilingMiddleware
+from app.core.security import create_access_token
+
+
+def _scope(sub=None, path="/api/v1/modules/1/interval-repetitions/", profile_header=False):
+    headers = []
+    if sub is not None:
+        headers.append((b"authorization", f"Bearer {create_access_token(sub)}".encode()))
+    if profile_header:
+        headers.append((b"x-profile", b"1"))
+    return {"type": "http", "method": "GET", "path": path, "headers": headers}
+
+
+def test_store_keeps_only_latest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=2)
+    for _ in range(4):
+        store.save(cProfile.Profile(), "GET", "/api/v1/modules/{module_id}", "u1", 0.01)
+
+    names = [item["name"] for item in store.list()]
+
+    assert len(names) == 2
+    assert store.path(names[0]) is not None
+    assert store.path("../" + names[0]) is None
+
+
+def test_only_admins_can_request_profile_by_header(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_ADMIN_SUBS", "admin")
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 0.0)
+    middleware = ProfilingMiddleware(app=None)
+
+    assert middleware.should_profile(_scope(profile_header=True), "admin")
+    assert not middleware.should_profile(_scope(profile_header=True), "u1")
+    assert not middleware.should_profile(_scope(), "admin")
+
+
+def test_sampling_respects_route_and_user_filters(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(settings, "PROFILE_ROUTES", "/api/v1/modules/*/interval-repetitions/")
+    monkeypatch.setattr(settings, "PROFILE_USER_SUBS", "slow-user")
+    middleware = ProfilingMiddleware(app=None)
+
+    assert middleware.should_profile(_scope(), "slow-user")
+    assert not middleware.should_profile(_scope(), "u1")
+    assert not middleware.should_profile(_scope(path="/api/v1/modules/"), "slow-user")
+
+
+def test_overlapping_requests_take_one_profile(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILE_ADMIN_SUBS", "admin")
+    store = ProfileStore(str(tmp_path), max_files=10)
+    served = []
+
+    async def app(scope, receive, send):
+        # Оба запроса ждут одновременно: второй приходит, пока профиль первого ещё снимается
+        await asyncio.sleep(0.05)
+        served.append(scope["path"])
+
+    async def run():
+        first, second = ProfilingMiddleware(app, store), ProfilingMiddleware(app, store)
+        scope = _scope("admin", profile_header=True)
+        await asyncio.gather(first(scope, None, None), second(dict(scope, path="/other"), None, None))
+
+    asyncio.run(run())
+
+    assert sorted(served) == ["/api/v1/modules/1/interval-repetitions/", "/other"]
+    assert len(store.list()) == 1
@@ -0,0 +1,102 @@
+import asyncio
+import random
+from collections import Counter
+
+from app.services.push_dispatch import TokenBucket, dispatch_duration, dispatch_offset, plan_dispatch
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def simulate_peak_arrivals(users: int, window: float, rate: float, burst: int, seed: int = 42) -> int:
+    """Пиковое число запросов в секунду, если 30% пользователей открывают приложение после пуша"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate, burst, clock=clock)
+    rng = random.Random(seed)
+    arrivals = Counter()
+    for offset, _ in plan_dispatch(range(1, users + 1), lambda user_id: user_id, window):
+        clock.now = max(clock.now, offset)
+        clock.now += bucket.reserve()
+        if rng.random() < 0.3:
+            arrivals[int(clock.now + rng.expovariate(1 / 20))] += 2
+    return max(arrivals.values())
+
+
+def test_dispatch_offset_is_deterministic_and_inside_window():
+    offsets = [dispatch_offset(user_id, 300) for user_id in range(1, 2001)]
+
+    assert offsets == [dispatch_offset(user_id, 300) for user_id in range(1, 2001)]
+    assert all(0 <= offset < 300 for offset in offsets)
+    # Пользователи разбросаны по всему окну, а не собраны в его начале
+    assert min(offsets) < 30 and max(offsets) > 270
+    assert dispatch_offset(7, 0) == 0.0
+
+
+def test_plan_dispatch_is_sorted_by_offset():
+    planned = plan_dispatch(range(1, 100), lambda user_id: user_id, 60)
+
+    assert [offset for offset, _ in planned] == sorted(offset for offset, _ in planned)
+    assert sorted(user_id for _, user_id in planned) == list(range(1, 100))
+
+
+def test_token_bucket_paces_after_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=3, clock=clock)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Дальше токены выдаются в долг: каждый следующий на 1/rate секунды позже
+    assert [round(bucket.reserve(), 6) for _ in range(3)] == [0.1, 0.2, 0.3]
+
+    clock.now = 10.0
+    assert bucket.reserve() == 0.0
+
+
+def test_token_bucket_without_limit_never_waits():
+    bucket = TokenBucket(rate=0, capacity=1, clock=FakeClock())
+
+    assert all(bucket.reserve() == 0.0 for _ in range(1000))
+
+
+def test_overflowing_run_keeps_configured_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=20, capacity=20, clock=clock)
+    sends = Counter()
+    for offset, _ in plan_dispatch(range(1, 10001), lambda user_id: user_id, 300):
+        clock.now = max(clock.now, offset)
+        clock.now += bucket.reserve()
+        sends[int(clock.now)] += 1
+
+    # 10000 напоминаний при 20/s не укладываются в 300s: запуск длиннее окна, но лимит тот же
+    assert dispatch_duration(20, 10000) == 500
+    assert max(sends) >= 499
+    assert max(sends.values()) <= 20 + 20
+    assert dispatch_duration(0, 10000) == 0.0
+
+
+def test_scheduler_skips_overlapping_reminder_runs():
+    from app.services.push_scheduler_service import PushScheduler
+
+    async def start_and_inspect():
+        # Как в приложении: планировщик запускается внутри работающего цикла событий
+        scheduler = PushScheduler()
+        scheduler.start()
+        try:
+            return scheduler.scheduler.get_job("study_reminders")
+        finally:
+            scheduler.stop()
+
+    job = asyncio.run(start_and_inspect())
+    assert job.max_instances == 1
+    assert job.coalesce is True
+
+
+def test_spread_dispatch_flattens_arrival_peak():
+    baseline = simulate_peak_arrivals(10000, window=0, rate=0, burst=1)
+    spread = simulate_peak_arrivals(10000, window=300, rate=20, burst=20)
+
+    assert spread * 4 < baseline
@@ -0,0 +1,53 @@
+import pytest
+
+from app.services.push_transport import FakeFCMTransport, PushSendError, PushTokenUnregistered, PushTransport
+
+
+def test_incomplete_transport_cannot_be_created():
+    class Incomplete(PushTransport):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_fake_fcm_reports_unregistered_tokens():
+    transport = FakeFCMTransport(unregistered_tokens={"dead-token"})
+
+    assert transport.send("live-token", "title", "body", {}).startswith("projects/fake/messages/")
+    with pytest.raises(PushTokenUnregistered):
+        transport.send("dead-token", "title", "body", {})
+    assert transport.stats == {"sent": 1, "unregistered": 1}
+
+
+def test_fake_fcm_error_rate_is_seeded():
+    def outcomes():
+        transport = FakeFCMTransport(error_rate=0.3, seed=1)
+        for _ in range(200):
+            try:
+                transport.send("token", "title", "body", {})
+            except PushSendError:
+                pass
+        return dict(transport.stats)
+
+    first = outcomes()
+    assert first == outcomes()
+    assert 30 < first["error"] < 90
+
+
+def test_failed_initialization_is_cached():
+    from app.services.push_service import PushNotificationService
+
+    class BrokenTransport(FakeFCMTransport):
+        calls = 0
+
+        def initialize(self):
+            BrokenTransport.calls += 1
+            raise ValueError("Invalid service account certificate")
+
+    service = PushNotificationService(transport=BrokenTransport())
+
+    assert service.is_initialized is False
+    assert service.is_initialized is False
+    assert BrokenTransport.calls == 1
+    assert service.send_push("token", "title", "body") == {"error": "Push service not initialized"}
@@ -0,0 +1,120 @@
+"""
+Горячие запросы должны идти по индексам, а не полным сканированием таблиц.
+
+По умолчанию проверяется SQLite (EXPLAIN QUERY PLAN); с TEST_DATABASE_URL=postgresql://...
+те же запросы проверяются через EXPLAIN (FORMAT JSON) на PostgreSQL.
+"""
+import os
+from argparse import Namespace
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import Session
+
+from app.db.database import Base
+from app.models.card import Card
+from app.models.interval_repetition import IntervalRepetition
+from app.models.module import Module
+from app.models.module_access import ModuleAccess
+from app.models.user import User
+from benchmarks.seed_dataset import Buffers, CopyWriter, InsertWriter, generate, id_offsets
+
+SEED = Namespace(
+    users=300, modules_per_user=3, cards_per_module=30, big_modules=1, big_module_cards=2000,
+    public_share=0.2, enrolled_share=0.7, learners_per_public_module=2, push_share=0.6, seed=7
+)
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    url = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    writer = CopyWriter(engine) if engine.dialect.name == "postgresql" else InsertWriter(engine)
+    buffers = Buffers(writer, chunk_size=50_000)
+    try:
+        generate(buffers, SEED, id_offsets(engine))
+        buffers.flush()
+    finally:
+        writer.close()
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    yield engine
+    engine.dispose()
+
+
+def _hot_queries(db: Session):
+    user_id, module_id, card_id = db.query(
+        IntervalRepetition.user_id, IntervalRepetition.module_id, IntervalRepetition.card_id
+    ).first()
+    now = datetime.now(timezone.utc)
+    return {
+        "interval_repetitions": [
+            # get_cards_for_repetition
+            db.query(IntervalRepetition).filter(
+                IntervalRepetition.user_id == user_id,
+                IntervalRepetition.module_id == module_id,
+                IntervalRepetition.due < now
+            ).order_by(IntervalRepetition.due).limit(10),
+            # update_card_status
+            db.query(IntervalRepetition).filter(
+                IntervalRepetition.user_id == user_id,
+                IntervalRepetition.module_id == module_id,
+                IntervalRepetition.card_id == card_id
+            ),
+            # CreateModuleScema
+            db.query(IntervalRepetition).filter(
+                IntervalRepetition.module_id == module_id,
+                IntervalRepetition.user_id == user_id
+            ),
+            # ON DELETE CASCADE из cards и modules
+            db.query(IntervalRepetition.id).filter(IntervalRepetition.card_id == card_id),
+            db.query(IntervalRepetition.id).filter(IntervalRepetition.module_id == module_id),
+        ],
+        "cards": [
+            db.query(Card).filter(Card.module_id == module_id),
+            # get_module_cards: страница после after_id и подсчёт
+            db.query(Card).filter(Card.module_id == module_id, Card.id > 10).order_by(Card.id).limit(10),
+            db.query(func.count(Card.id)).filter(Card.module_id == module_id),
+        ],
+        "module_accesses": [
+            db.query(ModuleAccess).filter(ModuleAccess.module_id == module_id),
+        ],
+        "users": [
+            # Напоминания: пользователи с push-токеном и их просроченные карточки
+            db.query(User.id, IntervalRepetition.module_id, func.count(IntervalRepetition.id)).join(
+                IntervalRepetition, User.id == IntervalRepetition.user_id
+            ).join(
+                Module, IntervalRepetition.module_id == Module.id
+            ).filter(
+                User.push_id.isnot(None),
+                IntervalRepetition.due <= now
+            ).group_by(User.id, IntervalRepetition.module_id),
+        ],
+    }
+
+
+def _full_scans(engine, query) -> set:
+    """Таблицы, которые план читает целиком"""
+    compiled = query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        if engine.dialect.name == "postgresql":
+            plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+            nodes, scans = [plan[0]["Plan"]], set()
+            while nodes:
+                node = nodes.pop()
+                if node["Node Type"] == "Seq Scan":
+                    scans.add(node["Relation Name"])
+                nodes.extend(node.get("Plans", []))
+            return scans
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+        # "SCAN table" без USING INDEX - полный проход по таблице
+        return {row[-1].split()[1] for row in rows if row[-1].startswith("SCAN ") and " USING " not in row[-1]}
+
+
+@pytest.mark.parametrize("table", ["interval_repetitions", "cards", "module_accesses", "users"])
+def test_hot_queries_use_indexes(engine, table):
+    with Session(engine) as db:
+        for query in _hot_queries(db)[table]:
+            assert table not in _full_scans(engine, query), str(query.statement)
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fsrs import State
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.models import module_access  # noqa: F401
+from app.models.card import Card
+from app.models.interval_repetition import IntervalRepetition, RepetitionState
+from app.models.module import Module
+from app.models.user import User
+from app.services.answer_variants import get_three_answer, variant_random
+from app.services.repetition_service import RepetitionService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add_all([User(id=user_id, name=f"u{user_id}", oidc_sub=f"u{user_id}") for user_id in (1, 2, 3)])
+        session.add(Module(id=1, name="Shared", owner_id=1))
+        session.add_all([Card(id=card_id, module_id=1, question=f"q{card_id}", answer=f"a{card_id}") for card_id in range(1, 11)])
+        session.commit()
+        yield session
+
+
+def _scheduled(db, user_id):
+    return {card_id for (card_id,) in db.query(IntervalRepetition.card_id).filter(IntervalRepetition.user_id == user_id)}
+
+
+def test_state_mappings_round_trip():
+    service = RepetitionService(db=None)
+
+    for state in State:
+        assert service._get_fsrs_state(service._get_repetition_state(state)) == state
+
+
+def test_deserialize_keeps_card_id_and_schedule():
+    now = datetime.now(timezone.utc)
+    repetition = IntervalRepetition(
+        card_id=42, state=RepetitionState.Review, stability=12.5, difficulty=5.1,
+        due=now, last_review=now - timedelta(days=12)
+    )
+
+    fsrs_card = RepetitionService(db=None)._deserialize_fsrs_card(repetition)
+
+    assert fsrs_card.card_id == 42
+    assert fsrs_card.state == State.Review
+    assert (fsrs_card.stability, fsrs_card.due) == (12.5, now)
+
+
+def test_three_answer_picks_four_distinct_variants():
+    answers = [f"Answer {index}" for index in range(1000)]
+
+    variants, right = get_three_answer(answers, answers[0])
+
+    assert len(variants) == len(set(variants)) == 4
+    assert 0 <= right < 4
+    assert variants[right] == answers[0]
+
+
+def test_repetition_cards_point_at_their_own_answer(db):
+    cards = db.query(Card).order_by(Card.id).all()
+
+    responses = RepetitionService(db)._cardsdb_to_cards(cards, variant_random("seed", 1, 1))
+
+    for card, response in zip(cards, responses):
+        assert response.answer_variant[response.right_answer] == card.answer
+
+
+def test_sync_fans_out_new_cards_to_enrolled_users_in_one_statement(db):
+    service = RepetitionService(db)
+    service.enable_interval_repetitions(1, 1)
+    service.enable_interval_repetitions(2, 1)
+    db.add_all([Card(id=card_id, module_id=1, question="new", answer="new") for card_id in (11, 12)])
+    db.commit()
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    created = service.sync_repetitions(1)
+    db.commit()
+
+    assert created == 4
+    assert len(statements) == 1
+    assert _scheduled(db, 1) == _scheduled(db, 2) == set(range(1, 13))
+    # Пользователь без включённых повторений не затронут
+    assert _scheduled(db, 3) == set()
+    assert service.sync_repetitions(1) == 0
+
+
+def test_sync_limited_to_user_and_cards(db):
+    service = RepetitionService(db)
+    service.enable_interval_repetitions(1, 1)
+    db.add_all([Card(id=card_id, module_id=1, question="new", answer="new") for card_id in (11, 12)])
+    db.flush()
+
+    assert service.sync_repetitions(1, card_ids=[11]) == 1
+    assert service.sync_repetitions(1, user_id=3, card_ids=[12]) == 1
+    assert _scheduled(db, 1) == set(range(1, 12))
+    assert _scheduled(db, 3) == {12}
+
+
+def test_enable_is_one_insert_with_initial_values(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    assert RepetitionService(db).enable_interval_repetitions(1, 1) == 10
+    assert RepetitionService(db).enable_interval_repetitions(1, 1) == 0
+
+    assert [statement.split()[0] for statement in statements] == ["INSERT", "INSERT"]
+    rows = db.query(IntervalRepetition).filter(IntervalRepetition.user_id == 1).all()
+    assert {(row.state, row.step, row.stability, row.difficulty, row.last_review) for row in rows} == {
+        (RepetitionState.Learning, 0, 0.5, 0.3, None)
+    }
+
+
+def test_duplicate_insert_is_ignored(db):
+    # Параллельный двойной тап: вторая вставка той же записи не падает на уникальном индексе
+    service = RepetitionService(db)
+    row = {"user_id": 1, "module_id": 1, "card_id": 1, "due": datetime.now(timezone.utc)}
+
+    assert db.execute(service._insert_ignoring_duplicates().values(**row)).rowcount == 1
+    assert db.execute(service._insert_ignoring_duplicates().values(**row)).rowcount == 0
@@ -0,0 +1,145 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.db.fulltext import ensure_sqlite_fulltext
+from app.models import card, interval_repetition, module_access  # noqa: F401
+from app.models.module import Module
+from app.models.user import User
+from app.services.search_service import SearchService, fts5_prefix_query, pg_prefix_query, search_terms
+
+
+def _engine():
+    return create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+
+@pytest.fixture
+def db():
+    engine = _engine()
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add(User(id=1, name="owner", oidc_sub="owner"))
+        session.add_all([
+            Module(id=1, name="Python basics", description="Syntax and types", owner_id=1),
+            Module(id=2, name="Advanced Python", description="Metaclasses, python internals", owner_id=1),
+            Module(id=3, name="История России", description="Даты и события", owner_id=1),
+            Module(id=4, name="Pythagoras", description=None, owner_id=1),
+        ])
+        session.commit()
+        yield session
+
+
+def _search(db, search_string):
+    return [module.id for module in SearchService(db).search_modules(db.query(Module), search_string)]
+
+
+def test_query_builders_keep_only_words():
+    terms = search_terms('Pyth" OR bas*')
+
+    assert terms == ["pyth", "or", "bas"]
+    assert pg_prefix_query(terms) == "pyth:* & or:* & bas:*"
+    assert fts5_prefix_query(["py"]) == '"py"*'
+
+
+def test_prefix_search_ranks_matches(db):
+    assert set(_search(db, "pyth")) == {1, 2, 4}
+    # Слово встречается в названии и описании - модуль выше
+    assert _search(db, "python")[0] == 2
+    assert _search(db, "python syn") == [1]
+    assert _search(db, "истор") == [3]
+
+
+def test_search_follows_updates_and_deletes(db):
+    db.get(Module, 3).name = "Chemistry"
+    db.delete(db.get(Module, 4))
+    db.commit()
+
+    assert _search(db, "chem") == [3]
+    assert _search(db, "pythagoras") == []
+
+
+def test_existing_database_gets_index_and_empty_search_lists_all(db):
+    assert _search(db, "   ") == [1, 2, 3, 4]
+
+    engine = _engine()
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        # База, созданная до появления поиска: ни FTS-таблицы, ни триггеров
+        for trigger in ("ai", "ad", "au"):
+            connection.exec_driver_sql(f"DROP TRIGGER modules_fts_{trigger}")
+        connection.exec_driver_sql("DROP TABLE modules_fts")
+        connection.exec_driver_sql("INSERT INTO users (id, name, oidc_sub) VALUES (1, 'owner', 'owner')")
+        connection.exec_driver_sql("INSERT INTO modules (id, name, owner_id) VALUES (1, 'Biology', 1)")
+    with Session(engine) as session:
+        # Без FTS-таблицы - подстрока через ILIKE
+        assert _search(session, "olog") == [1]
+    ensure_sqlite_fulltext(engine)
+    with Session(engine) as session:
+        assert _search(session, "bio") == [1]
+
+
+@pytest.fixture
+def cards_db(db):
+    from app.models.card import Card
+    from app.models.module_access import ModuleAccess
+
+    db.add(User(id=2, name="other", oidc_sub="other"))
+    db.add_all([
+        Module(id=10, name="Public", owner_id=2),
+        Module(id=11, name="Private", owner_id=2),
+        ModuleAccess(module_id=10, owner_id=2, view_access="all_users", edit_access="only_me"),
+        ModuleAccess(module_id=11, owner_id=2, view_access="only_me", edit_access="only_me"),
+    ])
+    db.add_all(Card(module_id=1, question=f"What does decorator {index} do?", answer="Wraps a function")
+               for index in range(7))
+    db.add(Card(module_id=10, question="Decorators in public module", answer="Shared"))
+    db.add(Card(module_id=11, question="Decorators in private module", answer="Hidden"))
+    db.commit()
+    return db
+
+
+def test_card_search_pages_with_keyset_cursor(cards_db):
+    service = SearchService(cards_db)
+    seen, cursor = [], None
+    while True:
+        items, cursor = service.search_cards(1, "decor", limit=3, cursor=cursor)
+        seen.extend(items)
+        if cursor is None:
+            break
+
+    ids = [item["id"] for item in seen]
+    assert len(ids) == len(set(ids)) == 8
+    assert {item["module_id"] for item in seen} == {1, 10}
+    assert "<mark>" in seen[0]["question_snippet"]
+    assert [item["rank"] for item in seen] == sorted((item["rank"] for item in seen), reverse=True)
+
+
+def test_card_search_scoped_to_module(cards_db):
+    items, cursor = SearchService(cards_db).search_cards(1, "wraps func", module_id=1)
+
+    assert len(items) == 7 and cursor is None
+    assert SearchService(cards_db).search_cards(1, "hidden", module_id=11) == ([], None)
+
+
+def test_card_search_rejects_broken_cursor(cards_db):
+    with pytest.raises(ValueError):
+        SearchService(cards_db).search_cards(1, "decor", cursor="not-a-cursor")
+
+
+def test_card_snippets_escape_card_html(cards_db):
+    from app.models.card import Card
+
+    cards_db.add(Card(module_id=1, question="<script>alert('xss')</script> payload", answer="<b>bold</b> payload"))
+    cards_db.commit()
+
+    items, _ = SearchService(cards_db).search_cards(1, "payload", module_id=1)
+
+    assert len(items) == 1
+    assert items[0]["question_snippet"] == (
+        "&lt;script&gt;alert(&#x27;xss&#x27;)&lt;/script&gt; <mark>payload</mark>"
+    )
+    assert items[0]["answer_snippet"] == "&lt;b&gt;bold&lt;/b&gt; <mark>payload</mark>"
+    # Исходный текст отдаётся как есть: это данные, а не HTML
+    assert items[0]["question"].startswith("<script>")
@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.changefeed import sync_tombstones
+from app.db.database import Base, enable_sqlite_foreign_keys
+from app.models.card import Card
+from app.models.interval_repetition import IntervalRepetition
+from app.models.module import Module
+from app.models.module_access import AccessLevel, ModuleAccess
+from app.models.user import User
+from app.services.module_service import ModuleService, delete_module_in_batches
+from app.services.repetition_service import RepetitionService
+from app.services.sync_service import SyncService, encode_cursor, prune_tombstones
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    enable_sqlite_foreign_keys(engine)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add_all([User(id=1, name="author", oidc_sub="author"), User(id=2, name="learner", oidc_sub="learner")])
+        session.add_all([
+            Module(id=1, name="Public", owner_id=1),
+            Module(id=2, name="Private", owner_id=1),
+        ])
+        session.add_all([
+            ModuleAccess(module_id=1, owner_id=1, view_access=AccessLevel.ALL_USERS.value,
+                         edit_access=AccessLevel.ONLY_ME.value),
+            ModuleAccess(module_id=2, owner_id=1, view_access=AccessLevel.ONLY_ME.value,
+                         edit_access=AccessLevel.ONLY_ME.value),
+        ])
+        session.add_all([Card(id=card_id, module_id=1, question=f"q{card_id}", answer=f"a{card_id}") for card_id in range(1, 6)])
+        session.add_all([Card(id=card_id, module_id=2, question=f"q{card_id}", answer=f"a{card_id}") for card_id in range(6, 9)])
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        yield session
+
+
+def _sync_all(db, user_id, cursor=None, limit=500):
+    """Пройти все страницы ленты; вернуть ответы и последний курсор"""
+    pages = []
+    while True:
+        page = SyncService(db).changes(user_id, cursor, limit)
+        pages.append(page)
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            return pages, cursor
+
+
+def test_first_sync_returns_everything_in_scope(db):
+    RepetitionService(db).enable_interval_repetitions(2, 1)
+
+    (page,), cursor = _sync_all(db, 2)
+
+    assert page["reset"] is True
+    assert [module["id"] for module in page["modules"]] == [1]
+    assert [access["module_id"] for access in page["module_accesses"]] == [1]
+    assert sorted(card["id"] for card in page["cards"]) == [1, 2, 3, 4, 5]
+    assert sorted(repetition["card_id"] for repetition in page["repetitions"]) == [1, 2, 3, 4, 5]
+
+    again = SyncService(db).changes(2, cursor)
+    assert again["reset"] is False
+    assert again["cards"] == again["modules"] == again["repetitions"] == []
+    assert again["cursor"] is not None
+
+
+def test_incremental_sync_returns_only_changes(db):
+    _, cursor = _sync_all(db, 1)
+
+    db.get(Card, 1).answer = "changed"
+    db.execute(insert(Card), [{"module_id": 2, "question": "bulk", "answer": "bulk"}])
+    db.execute(delete(Card).where(Card.id == 7))
+    db.commit()
+
+    (page,), _ = _sync_all(db, 1, cursor)
+    assert sorted((card["id"], card["answer"]) for card in page["cards"]) == [(1, "changed"), (9, "bulk")]
+    assert page["deleted"]["cards"] == [7]
+    assert page["modules"] == []
+
+
+def test_pages_cover_every_change_once(db):
+    pages, _ = _sync_all(db, 1, limit=3)
+
+    cards = [card["id"] for page in pages for card in page["cards"]]
+    assert len(pages) > 2
+    assert sorted(cards) == list(range(1, 9))
+    assert all(len(page["cards"]) + len(page["modules"]) + len(page["module_accesses"]) <= 3 for page in pages)
+
+
+def test_closed_module_sends_access_change_but_not_cards(db):
+    RepetitionService(db).enable_interval_repetitions(2, 1)
+    _, cursor = _sync_all(db, 2)
+
+    db.query(ModuleAccess).filter(ModuleAccess.module_id == 1).one().view_access = AccessLevel.ONLY_ME.value
+    db.get(Card, 2).question = "secret"
+    db.commit()
+
+    (page,), _ = _sync_all(db, 2, cursor)
+    assert page["module_accesses"] == [
+        {"module_id": 1, "view_access": AccessLevel.ONLY_ME.value, "edit_access": AccessLevel.ONLY_ME.value}
+    ]
+    assert page["cards"] == []
+
+
+def test_module_delete_leaves_single_tombstone(db):
+    RepetitionService(db).enable_interval_repetitions(1, 2)
+    _, cursor = _sync_all(db, 1)
+
+    ModuleService(db).delete_module(2)
+
+    (page,), _ = _sync_all(db, 1, cursor)
+    assert page["deleted"] == {"modules": [2], "cards": [], "repetitions": []}
+
+
+def test_background_delete_removes_intermediate_tombstones(engine, db):
+    RepetitionService(db).enable_interval_repetitions(1, 2)
+
+    delete_module_in_batches(sessionmaker(bind=engine), 2, batch_size=2)
+
+    assert db.execute(select(sync_tombstones.c.entity, sync_tombstones.c.entity_id)).all() == [("module", 2)]
+
+
+def test_recreated_repetition_is_not_reported_deleted(db):
+    RepetitionService(db).enable_interval_repetitions(1, 1)
+    _, cursor = _sync_all(db, 1)
+
+    db.execute(
+        delete(IntervalRepetition).where(IntervalRepetition.card_id == 3).execution_options(synchronize_session=False)
+    )
+    RepetitionService(db).enable_interval_repetitions(1, 1)
+
+    (page,), _ = _sync_all(db, 1, cursor)
+    assert [repetition["card_id"] for repetition in page["repetitions"]] == [3]
+    assert page["deleted"]["repetitions"] == []
+
+
+def test_expired_cursor_resets(db):
+    stale = encode_cursor(10_000, datetime.now(timezone.utc) - timedelta(days=365))
+
+    page = SyncService(db).changes(1, stale)
+
+    assert page["reset"] is True
+    assert len(page["cards"]) == 8
+
+
+def test_prune_removes_only_expired_tombstones(engine, db):
+    db.execute(delete(Card).where(Card.id.in_([1, 2])))
+    db.execute(sync_tombstones.update().where(sync_tombstones.c.entity_id == 1).values(
+        created_at=datetime.now(timezone.utc) - timedelta(days=365)
+    ))
+    db.commit()
+
+    assert prune_tombstones(sessionmaker(bind=engine), retention_days=90) == 1
+    assert db.execute(select(sync_tombstones.c.entity_id)).scalars().all() == [2]
+
+
+def test_invalid_cursor_is_rejected(db):
+    with pytest.raises(ValueError):
+        SyncService(db).changes(1, "not-a-cursor")
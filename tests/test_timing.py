@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.core.request_context import RequestStats, request_stats, timed_phase
+from app.core.timing import ServerTimingMiddleware, format_server_timing, statement_shape
+
+
+def test_statement_shape_collapses_parameter_lists():
+    short = "SELECT cards.id FROM cards WHERE cards.id IN (?, ?)"
+    long = "SELECT cards.id\n  FROM cards WHERE cards.id IN (?, ?, ?, ?, ?)"
+
+    assert statement_shape(short) == statement_shape(long)
+    assert statement_shape(short) == "SELECT cards.id FROM cards WHERE cards.id IN (...)"
+
+
+def test_server_timing_header_lists_db_phases_and_total():
+    stats = RequestStats(db_queries=3, db_seconds=0.0125, phases={"auth": 0.002})
+
+    header = format_server_timing(stats, 0.05)
+
+    assert header == 'db;dur=12.5;desc="3 queries", auth;dur=2.0, total;dur=50.0'
+
+
+def test_timed_phase_outside_request_is_noop():
+    with timed_phase("serialize"):
+        pass
+
+    assert request_stats.get() is None
+
+
+def _run(app, scope):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(ServerTimingMiddleware(app)(scope, receive, send))
+    return messages
+
+
+def test_middleware_reports_repeated_statements(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "QUERY_DEBUG", True)
+    monkeypatch.setattr(settings, "QUERY_REPEAT_THRESHOLD", 2)
+
+    async def app(scope, receive, send):
+        stats = request_stats.get()
+        with timed_phase("serialize"):
+            for card_id in range(5):
+                stats.statement_shapes[statement_shape(f"SELECT * FROM cards WHERE id IN (?, ?{', ?' * card_id})")] += 1
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    with caplog.at_level(logging.WARNING, logger="app.core.timing"):
+        messages = _run(app, {
+            "type": "http",
+            "method": "GET",
+            "route": SimpleNamespace(path="/api/v1/modules/{module_id}")
+        })
+
+    headers = dict(messages[0]["headers"])
+    assert b"serialize;dur=" in headers[b"server-timing"]
+    assert "Possible N+1 in GET /api/v1/modules/{module_id}: 5x" in caplog.text
+    assert request_stats.get() is None